@@ -0,0 +1,180 @@
+"""
+batch.py
+
+headless qr generation: a stream of payloads in, one png or svg file per payload out.
+
+payloads come one per line, or as jsonl with {"data": ..., "name": ..., "level": ...}
+(name and level optional). each payload is encoded, masked and rendered by a worker
+process (symbol.py does the first two), which writes its own file and only sends back a
+short status line, so memory stays flat however long the input is: the input is read and
+handed out batch_size payloads at a time.
+
+    png  1-bit grayscale, the scaled module rows packed with np.packbits and zlib
+         compressed directly, no drawing library
+    svg  one <path>, each horizontal run of dark modules is a single rectangle
+
+    python batch.py payloads.txt --out codes/ --format svg -j 4
+    seq 10000 | python batch.py - --out codes/
+"""
+
+import argparse
+import itertools
+import json
+import multiprocessing as mp
+import os
+import struct
+import sys
+import time
+import zlib
+
+import numpy as np
+
+from rs_encoder import LEVELS
+from symbol import make_symbol
+
+FORMATS = ("png", "svg")
+
+# -----------------------
+# rendering
+# -----------------------
+def _chunk(tag, data):
+    return struct.pack(">I", len(data)) + tag + data + struct.pack(">I", zlib.crc32(tag + data))
+
+def to_png(m, scale=4, border=4, compression=6):
+    """png bytes of the matrix, scale pixels per module, border light modules around it."""
+    light = ~np.pad(np.asarray(m, dtype=bool), border)  # 1 bits are white in 1-bit grayscale
+    img = light.repeat(scale, axis=0).repeat(scale, axis=1)
+    h, w = img.shape
+    rows = np.packbits(img, axis=1)
+    raw = np.concatenate([np.zeros((h, 1), dtype=np.uint8), rows], axis=1)  # filter type 0 per row
+    return (b"\x89PNG\r\n\x1a\n"
+            + _chunk(b"IHDR", struct.pack(">IIBBBBB", w, h, 1, 0, 0, 0, 0))
+            + _chunk(b"IDAT", zlib.compress(raw.tobytes(), compression))
+            + _chunk(b"IEND", b""))
+
+def to_svg(m, scale=4, border=4):
+    """svg text of the matrix, one path, a rectangle per run of dark modules in a row."""
+    m = np.asarray(m, dtype=bool)
+    n = m.shape[0]
+    size = n + 2 * border
+    # +1 where a run starts, -1 one past where it ends
+    edges = np.diff(np.pad(m.astype(np.int8), [(0, 0), (1, 1)]), axis=1)
+    rows, starts = np.nonzero(edges == 1)
+    ends = np.nonzero(edges == -1)[1]
+    d = "".join(f"M{x + border} {y + border}h{w}v1h-{w}z"
+                for y, x, w in zip(rows.tolist(), starts.tolist(), (ends - starts).tolist()))
+    px = size * scale
+    return (f'<svg xmlns="http://www.w3.org/2000/svg" width="{px}" height="{px}" '
+            f'viewBox="0 0 {size} {size}" shape-rendering="crispEdges">'
+            f'<rect width="{size}" height="{size}" fill="#fff"/><path fill="#000" d="{d}"/></svg>\n')
+
+def render(m, fmt, scale=4, border=4):
+    if fmt == "png":
+        return to_png(m, scale, border)
+    return to_svg(m, scale, border).encode()
+
+# -----------------------
+# pipeline
+# -----------------------
+def _parse_jsonl(line):
+    item = json.loads(line)
+    if not isinstance(item, dict):
+        raise ValueError("not a json object")
+    data, level = item.get("data"), item.get("level")
+    if isinstance(data, (int, float)) and not isinstance(data, bool):
+        data = str(data)
+    if not isinstance(data, str):
+        raise ValueError(f"data must be a string, got {type(data).__name__}")
+    if level is not None and level not in LEVELS:
+        raise ValueError(f"bad level {level!r}")
+    return item.get("name"), data, level
+
+def read_payloads(lines, jsonl=False):
+    """
+    yields (name or None, data, level or None) from an iterable of lines. numbers as jsonl
+    data are encoded as their text; for a line that can't be used, data is the ValueError,
+    which generate() reports as a failed payload.
+    """
+    for n, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if not line:
+            continue
+        if jsonl:
+            try:
+                yield _parse_jsonl(line)
+            except ValueError as e:
+                yield None, ValueError(f"line {n}: {e}"), None
+        else:
+            yield None, line, None
+
+def _make(task):
+    i, name, data, level, fmt, out_dir, scale, border = task
+    name = os.path.basename(str(name)) if name else f"{i:06d}"
+    path = os.path.join(out_dir, f"{name}.{fmt}")
+    if isinstance(data, ValueError):
+        return i, name, None, str(data)
+    try:
+        m, version, mask = make_symbol(data, level)
+    except ValueError as e:
+        return i, name, None, str(e)
+    with open(path, "wb") as f:
+        f.write(render(m, fmt, scale, border))
+    return i, name, path, f"{version}-{level} mask {mask}"
+
+def generate(payloads, out_dir, fmt="png", level="M", scale=4, border=4, workers=None, batch_size=1000):
+    """
+    payloads: iterable of (name or None, data, level or None), e.g. from read_payloads().
+    writes out_dir/<name>.<fmt> for each and yields (index, name, path or None, info) as
+    they finish; path is None and info the error for payloads that don't fit any version or
+    couldn't be read.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    tasks = ((i, name, data, lvl or level, fmt, out_dir, scale, border)
+             for i, (name, data, lvl) in enumerate(payloads))
+    if workers == 1:
+        yield from map(_make, tasks)
+        return
+    with mp.Pool(workers) as pool:
+        while True:
+            batch = list(itertools.islice(tasks, batch_size))
+            if not batch:
+                break
+            chunksize = max(1, len(batch) // (4 * (workers or os.cpu_count())))
+            yield from pool.imap_unordered(_make, batch, chunksize)
+
+def main():
+    parser = argparse.ArgumentParser(description="render a qr code for every payload in a file.")
+    parser.add_argument("input", help="payload file, one per line, or - for stdin")
+    parser.add_argument("--out", "-o", default="qr_out", help="output folder")
+    parser.add_argument("--format", "-f", choices=FORMATS, default="png")
+    parser.add_argument("--jsonl", action="store_true", help="input lines are json objects")
+    parser.add_argument("--level", "-l", choices=list(LEVELS), default="M", help="default ec level")
+    parser.add_argument("--scale", type=int, default=4, help="pixels per module (png) / svg size factor")
+    parser.add_argument("--border", type=int, default=4, help="quiet zone in modules")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument("--batch", type=int, default=1000, help="payloads handed to the pool at a time")
+    parser.add_argument("--verbose", "-v", action="store_true", help="a line per code")
+    args = parser.parse_args()
+
+    f = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    start = time.perf_counter()
+    done = failed = 0
+    try:
+        for i, name, path, info in generate(read_payloads(f, args.jsonl), args.out, args.format, args.level,
+                                            args.scale, args.border, args.jobs, args.batch):
+            if path is None:
+                failed += 1
+                print(f"{name}: {info}", file=sys.stderr)
+                continue
+            done += 1
+            if args.verbose:
+                print(f"{path}: {info}")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+    elapsed = time.perf_counter() - start
+    print(f"{done} codes in {elapsed:.2f}s ({done / elapsed if elapsed > 0 else 0:.0f}/s)"
+          + (f", {failed} failed" if failed else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+"""
+gf256.py
+
+gf(2^8) arithmetic as numpy table lookups, built from main.py's power_to_value / value_to_power.
+
+    EXP[i]     = 2^i for i in 0..509, the 255 powers written out twice, so EXP[LOG[a] + LOG[b]]
+                 needs no % 255
+    LOG[a]     = log_2(a) for a != 0 (LOG[0] is unused)
+    MUL[a, b]  = a*b, the full 256x256 table (64 KiB), which also covers 0
+    INV[a]     = 1/a for a != 0
+
+every operation takes and returns uint8 arrays and works elementwise, so whole blocks
+(or stacks of blocks) go through a single fancy-indexing lookup instead of a python loop.
+
+polynomials are 1-d uint8 arrays, low-order first like main.py (p[i] is the coefficient
+of x^i).
+
+    python gf256.py              # check against main.py's tables + benchmark
+"""
+
+import argparse
+
+import numpy as np
+
+from main import power_to_value, value_to_power
+
+def _build_tables():
+    exp = np.zeros(510, dtype=np.uint8)
+    exp[:255] = power_to_value[:255]
+    exp[255:] = power_to_value[:255]
+    log = np.zeros(256, dtype=np.int32)
+    log[1:] = value_to_power[:255]
+
+    a = np.arange(256)
+    mul = exp[log[a][:, None] + log[a][None, :]]
+    mul[0, :] = 0
+    mul[:, 0] = 0
+    inv = np.zeros(256, dtype=np.uint8)
+    inv[1:] = exp[(255 - log[1:]) % 255]
+    return exp, log, mul, inv
+
+EXP, LOG, MUL, INV = _build_tables()
+
+def mul(a, b):
+    return MUL[a, b]
+
+def div(a, b):
+    if np.any(np.asarray(b) == 0):
+        raise ZeroDivisionError("division by zero in gf(256)")
+    return MUL[a, INV[b]]
+
+def power(a, n):
+    """a^n elementwise (a may be an array, n an int >= 0; 0^0 = 1)."""
+    a = np.asarray(a, dtype=np.uint8)
+    out = EXP[(LOG[a] * n) % 255]
+    return np.where(a == 0, np.uint8(1 if n == 0 else 0), out).astype(np.uint8)
+
+def poly_scale(p, c):
+    return MUL[np.asarray(p, dtype=np.uint8), c]
+
+def poly_add(p, q):
+    p = np.asarray(p, dtype=np.uint8)
+    q = np.asarray(q, dtype=np.uint8)
+    if len(p) < len(q):
+        p, q = q, p
+    r = p.copy()
+    r[:len(q)] ^= q
+    return r
+
+def poly_mul(p, q):
+    """product of two polynomials: one outer-product lookup, then xor along the diagonals."""
+    p = np.asarray(p, dtype=np.uint8)
+    q = np.asarray(q, dtype=np.uint8)
+    prod = MUL[p[:, None], q[None, :]]
+    r = np.zeros(len(p) + len(q) - 1, dtype=np.uint8)
+    for i in range(len(p)):
+        r[i:i+len(q)] ^= prod[i]
+    return r
+
+def poly_eval(p, x):
+    """p(x) for every x in the array x at once (horner, one vector step per coefficient)."""
+    p = np.asarray(p, dtype=np.uint8)
+    x = np.asarray(x, dtype=np.uint8)
+    y = np.zeros(x.shape, dtype=np.uint8)
+    for c in p[::-1]:
+        y = MUL[y, x] ^ c
+    return y
+
+def poly_eval_batch(polys, x):
+    """
+    polys is a 2-d array, one polynomial per row (same length, low-order first).
+    returns a (rows, len(x)) array of every polynomial at every point.
+    """
+    polys = np.asarray(polys, dtype=np.uint8)
+    x = np.asarray(x, dtype=np.uint8)
+    y = np.zeros((polys.shape[0], len(x)), dtype=np.uint8)
+    for k in range(polys.shape[1] - 1, -1, -1):
+        y = MUL[y, x[None, :]] ^ polys[:, k:k+1]
+    return y
+
+# -----------------------
+# check + benchmark
+# -----------------------
+def check():
+    import main
+    for a in range(256):
+        for b in range(256):
+            assert MUL[a, b] == main.gf_mul(a, b), (a, b)
+    for a in range(1, 256):
+        assert MUL[a, INV[a]] == 1
+        assert EXP[LOG[a]] == a
+    for i in range(510):
+        assert EXP[i] == power_to_value[i % 255]
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        p = rng.integers(0, 256, rng.integers(1, 20)).astype(np.uint8)
+        q = rng.integers(0, 256, rng.integers(1, 20)).astype(np.uint8)
+        assert poly_mul(p, q).tolist() == main.poly_mul_gl(p.tolist(), q.tolist())
+        x = np.arange(256, dtype=np.uint8)
+        y = poly_eval(p, x)
+        for xi in (0, 1, 2, 77, 255):
+            acc = 0
+            for c in p[::-1].tolist():
+                acc = main.gf_mul(acc, xi) ^ c
+            assert y[xi] == acc
+
+def bench(seconds):
+    import main
+    from rs_encoder import rate
+    rng = np.random.default_rng(1)
+    print(f"{'operation':<34} {'python /s':>12} {'numpy /s':>12}")
+    for n in (10, 30, 100):
+        p = rng.integers(0, 256, n).astype(np.uint8)
+        q = rng.integers(0, 256, n).astype(np.uint8)
+        pl, ql = p.tolist(), q.tolist()
+        a = rate(lambda: main.poly_mul_gl(pl, ql), seconds)
+        b = rate(lambda: poly_mul(p, q), seconds)
+        print(f"{f'poly_mul {n}x{n}':<34} {a:>12.0f} {b:>12.0f}")
+    for n in (1000, 100000):
+        x = rng.integers(0, 256, n).astype(np.uint8)
+        y = rng.integers(0, 256, n).astype(np.uint8)
+        xl, yl = x.tolist(), y.tolist()
+        a = rate(lambda: [main.gf_mul(u, v) for u, v in zip(xl, yl)], seconds) * n
+        b = rate(lambda: MUL[x, y], seconds) * n
+        print(f"{f'elementwise mul, {n} bytes (prod/s)':<34} {a:>12.0f} {b:>12.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="check the gf(256) tables against main.py and benchmark them.")
+    parser.add_argument("--seconds", type=float, default=0.3, help="time per benchmark")
+    args = parser.parse_args()
+
+    check()
+    print("tables match main.py")
+    bench(args.seconds)
+
+if __name__ == "__main__":
+    main()
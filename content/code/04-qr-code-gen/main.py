@@ -67,8 +67,8 @@ def gl_longdiv(p,q):
 
         counter += 1
 
-    print(counter)
     return p
 
-# print([value_to_power[e-1] for e in calc_gen(10)])
-print(gl_longdiv([17, 236, 17, 236, 17, 236, 64, 67, 77, 220, 114, 209, 120, 11, 91, 32], calc_gen(10)))
+if __name__ == "__main__":
+    # print([value_to_power[e-1] for e in calc_gen(10)])
+    print(gl_longdiv([17, 236, 17, 236, 17, 236, 64, 67, 77, 220, 114, 209, 120, 11, 91, 32], calc_gen(10)))
@@ -0,0 +1,257 @@
+"""
+mask.py
+
+the eight qr data masks as cached numpy arrays, the function pattern layout, the four
+iso 18004 penalty rules and automatic mask selection, for symbol.py and the mask viewer
+(unordered/04-qr-code-gen/code, whose mask.py only adds reading the matrix out of an image).
+
+masks are indexed 0-7 like the standard. all eight masks of a version are built once, as
+one (8, n, n) boolean array, and applying them is a single xor restricted to the cells
+outside the function patterns.
+
+penalties, all computed for the eight candidates at once:
+
+    N1  3 + (run - 5) for every run of 5 or more same coloured modules in a row or column
+    N2  3 for every 2x2 block of one colour (overlapping blocks all count)
+    N3  40 for every 1:1:3:1:1 finder-like pattern with 4 light modules before or after it
+        (counted once if both), in rows and columns; the quiet zone counts as light
+    N4  10 for every full 5% the share of dark modules is away from 50%
+
+    python mask.py                 # self check + benchmark
+"""
+
+import argparse
+import time
+from functools import lru_cache
+
+import numpy as np
+
+MASK_FUNCTIONS = [
+    lambda i, j: (i + j) % 2 == 0,
+    lambda i, j: i % 2 == 0,
+    lambda i, j: j % 3 == 0,
+    lambda i, j: (i + j) % 3 == 0,
+    lambda i, j: (i // 2 + j // 3) % 2 == 0,
+    lambda i, j: (i * j) % 2 + (i * j) % 3 == 0,
+    lambda i, j: ((i * j) % 3 + i * j) % 2 == 0,
+    lambda i, j: ((i * j) % 3 + i + j) % 2 == 0,
+]
+
+N1, N2, N3, N4 = 3, 3, 40, 10
+
+# dark:light:dark:light:dark 1:1:3:1:1, as a 7-bit number
+_FINDER_CORE = 0b1011101
+
+def size_of(version):
+    return 17 + 4 * version
+
+def version_of(size):
+    if (size - 17) % 4 or not 1 <= (size - 17) // 4 <= 40:
+        raise ValueError(f"{size}x{size} is not a qr symbol size")
+    return (size - 17) // 4
+
+@lru_cache(maxsize=None)
+def mask_patterns(version):
+    """(8, n, n) bool array, [k, i, j] true where mask k flips module (row i, column j). read only."""
+    n = size_of(version)
+    i, j = np.indices((n, n))
+    masks = np.stack([f(i, j) for f in MASK_FUNCTIONS])
+    masks.flags.writeable = False
+    return masks
+
+def alignment_positions(version):
+    # row/column centres of the alignment patterns, same formula as the iso table
+    if version == 1:
+        return []
+    num = version // 7 + 2
+    step = 26 if version == 32 else (version * 8 + num * 3 + 5) // (num * 4 - 4) * 2
+    return [6] + [size_of(version) - 7 - k * step for k in range(num - 1)][::-1]
+
+@lru_cache(maxsize=None)
+def function_pattern_mask(version):
+    """
+    bool (n, n) array, true on the modules that are not data: finder patterns with their
+    separators, format information, timing patterns, alignment patterns, the dark module
+    and the version information. the same cells the viewer's skeleton image marks. read only.
+    """
+    n = size_of(version)
+    f = np.zeros((n, n), dtype=bool)
+    f[:9, :9] = True           # top left finder, separator, format bits
+    f[:9, n - 8:] = True       # top right
+    f[n - 8:, :9] = True       # bottom left, including the dark module
+    f[6, :] = True             # timing
+    f[:, 6] = True
+    pos = alignment_positions(version)
+    corners = {(pos[0], pos[0]), (pos[0], pos[-1]), (pos[-1], pos[0])} if pos else set()
+    for r in pos:
+        for c in pos:
+            if (r, c) in corners:
+                continue  # would sit on a finder
+            f[r - 2:r + 3, c - 2:c + 3] = True
+    if version >= 7:
+        f[:6, n - 11:n - 8] = True
+        f[n - 11:n - 8, :6] = True
+    f.flags.writeable = False
+    return f
+
+def apply_mask(matrix, k, reserved=None):
+    """matrix xor mask k outside the reserved (function pattern) cells. returns a new bool array."""
+    m = np.asarray(matrix, dtype=bool)
+    version = version_of(m.shape[0])
+    if reserved is None:
+        reserved = function_pattern_mask(version)
+    return m ^ (mask_patterns(version)[k] & ~np.asarray(reserved, dtype=bool))
+
+def apply_all_masks(matrix, reserved=None):
+    """the (8, n, n) stack of matrix under every mask."""
+    m = np.asarray(matrix, dtype=bool)
+    version = version_of(m.shape[0])
+    if reserved is None:
+        reserved = function_pattern_mask(version)
+    return m[None] ^ (mask_patterns(version) & ~np.asarray(reserved, dtype=bool)[None])
+
+# -----------------------
+# penalty rules, each takes a (..., n, n) stack and returns one score per matrix
+# -----------------------
+def _lines(stack):
+    # every row and every column as rows of one (..., 2n, n) array
+    return np.concatenate([stack, stack.swapaxes(-1, -2)], axis=-2)
+
+def penalty_runs(stack):
+    lines = _lines(np.asarray(stack, dtype=bool))
+    # a run of length L >= 5 holds L-4 windows of five equal modules and scores
+    # 3 + L-5 = (L-4) + 2, so count the windows plus 2 for every first window of a run
+    eq = lines[..., 1:] == lines[..., :-1]
+    five = eq[..., :-3] & eq[..., 1:-2] & eq[..., 2:-1] & eq[..., 3:]
+    first = five.copy()
+    first[..., 1:] &= ~five[..., :-1]
+    return five.sum(axis=(-1, -2)) + (N1 - 1) * first.sum(axis=(-1, -2))
+
+def penalty_blocks(stack):
+    s = np.asarray(stack, dtype=bool)
+    a, b, c, d = s[..., :-1, :-1], s[..., 1:, :-1], s[..., :-1, 1:], s[..., 1:, 1:]
+    same = (a == b) & (a == c) & (a == d)
+    return same.sum(axis=(-1, -2)) * N2
+
+def penalty_finder_like(stack):
+    lines = _lines(np.asarray(stack, dtype=np.int16))
+    padded = np.pad(lines, [(0, 0)] * (lines.ndim - 1) + [(8, 8)])
+    # every 15 module window (4 before, the 7 module core, 4 after) read as a binary
+    # number, first module highest
+    width = padded.shape[-1] - 14
+    code = np.zeros(padded.shape[:-1] + (width,), dtype=np.int16)
+    for t in range(15):
+        code = (code << 1) | padded[..., t:t + width]
+    hits = ((code >> 4) & 0x7F == _FINDER_CORE) & ((code >> 11 == 0) | (code & 0xF == 0))
+    return hits.sum(axis=(-1, -2)) * N3
+
+def penalty_balance(stack):
+    s = np.asarray(stack, dtype=bool)
+    total = s.shape[-1] * s.shape[-2]
+    dark = s.sum(axis=(-1, -2))
+    # smallest k with 45-5k <= dark% <= 55+5k
+    k = (np.abs(dark * 20 - total * 10) + total - 1) // total - 1
+    return np.maximum(k, 0) * N4
+
+def penalties(stack):
+    """(..., 4) array with the N1-N4 scores of every matrix in the stack."""
+    return np.stack([penalty_runs(stack), penalty_blocks(stack),
+                     penalty_finder_like(stack), penalty_balance(stack)], axis=-1)
+
+def best_mask(matrix, reserved=None):
+    """
+    returns (k, masked matrix, (8, 4) penalties) for the mask with the lowest total penalty,
+    the lowest k on ties.
+    """
+    stack = apply_all_masks(matrix, reserved)
+    scores = penalties(stack)
+    k = int(np.argmin(scores.sum(axis=1)))
+    return k, stack[k], scores
+
+# -----------------------
+# self check + benchmark
+# -----------------------
+def _penalties_loop(m):
+    # straight from the rules, one cell at a time, to check the vectorized versions against
+    n = len(m)
+    lines = [list(r) for r in m] + [[m[i][j] for i in range(n)] for j in range(n)]
+    p1 = 0
+    for line in lines:
+        run = 1
+        for x in range(1, n + 1):
+            if x < n and line[x] == line[x - 1]:
+                run += 1
+                continue
+            if run >= 5:
+                p1 += N1 + run - 5
+            run = 1
+    p2 = sum(N2 for i in range(n - 1) for j in range(n - 1)
+             if m[i][j] == m[i + 1][j] == m[i][j + 1] == m[i + 1][j + 1])
+    p3 = 0
+    for line in lines:
+        padded = [0] * 4 + list(line) + [0] * 4
+        for x in range(4, n + 4 - 6):
+            if padded[x:x + 7] == [1, 0, 1, 1, 1, 0, 1] and (not any(padded[x - 4:x]) or not any(padded[x + 7:x + 11])):
+                p3 += N3
+    dark = sum(map(sum, m))
+    percent = dark * 100 / (n * n)
+    k = 0
+    while not 45 - 5 * k <= percent <= 55 + 5 * k:
+        k += 1
+    return [p1, p2, p3, k * N4]
+
+def check():
+    rng = np.random.default_rng(0)
+    for version in (1, 3, 7, 20):
+        n = size_of(version)
+        masks = mask_patterns(version)
+        for k, f in enumerate(MASK_FUNCTIONS):
+            for i in range(0, n, 5):
+                for j in range(0, n, 3):
+                    assert masks[k, i, j] == bool(f(i, j))
+        for _ in range(3):
+            m = rng.random((n, n)) < rng.uniform(0.2, 0.8)
+            assert penalties(m).tolist() == _penalties_loop(m.astype(int).tolist())
+        reserved = function_pattern_mask(version)
+        m = rng.random((n, n)) < 0.5
+        for k in range(8):
+            assert (apply_mask(m, k)[reserved] == m[reserved]).all()
+    assert alignment_positions(7) == [6, 22, 38]
+    assert alignment_positions(32) == [6, 34, 60, 86, 112, 138]
+    assert alignment_positions(40) == [6, 30, 58, 86, 114, 142, 170]
+    # data modules: iso says version 1 has 208, version 7 has 1568
+    assert (~function_pattern_mask(1)).sum() == 208
+    assert (~function_pattern_mask(7)).sum() == 1568
+
+def bench(versions, seconds):
+    rng = np.random.default_rng(1)
+    print(f"{'version':>8} {'size':>5} {'best_mask us':>13} {'loop ms':>9}")
+    for v in versions:
+        n = size_of(v)
+        m = rng.random((n, n)) < 0.5
+        best_mask(m)  # build the caches outside the timing
+        runs = 0
+        start = time.perf_counter()
+        while time.perf_counter() - start < seconds:
+            best_mask(m)
+            runs += 1
+        fast = (time.perf_counter() - start) / runs
+        stack = apply_all_masks(m).astype(int).tolist()
+        start = time.perf_counter()
+        for s in stack:
+            _penalties_loop(s)
+        slow = time.perf_counter() - start
+        print(f"{v:>8} {n:>5} {fast * 1e6:>13.0f} {slow * 1e3:>9.1f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="qr mask penalties self check and benchmark.")
+    parser.add_argument("--versions", default="1,3,10,25,40", help="comma separated versions to benchmark")
+    parser.add_argument("--seconds", type=float, default=0.3, help="time per version")
+    args = parser.parse_args()
+
+    check()
+    print("self check ok")
+    bench([int(v) for v in args.versions.split(",")], args.seconds)
+
+if __name__ == "__main__":
+    main()
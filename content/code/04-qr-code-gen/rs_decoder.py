@@ -0,0 +1,261 @@
+"""
+rs_decoder.py
+
+reed-solomon decoding for qr codes: finds and fixes up to ec//2 wrong codewords per block.
+
+a block is n codewords in transmission order, read as the polynomial
+C(x) = c[0] x^(n-1) + ... + c[n-1], with the ec codewords from rs_encoder at the end,
+so C(x) is divisible by the generator (x - a^0)...(x - a^(ec-1)). decoding a block:
+
+    syndromes       S_i = C(a^i) for i < ec, all zero iff nothing is wrong
+    berlekamp-massey the error locator L(x), whose roots are a^-p for every wrong power p
+    chien search    try L(a^-p) for every p in the block
+    forney          the error value at each root from S(x)L(x) mod x^ec and L'(x)
+
+syndromes for many blocks are a single table lookup (gf256.MUL) against a precomputed
+matrix of powers, so undamaged blocks, the common case, cost one vector operation and
+skip the rest.
+
+    python rs_decoder.py          # self check + throughput / correction limit benchmark
+"""
+
+import argparse
+import time
+from functools import lru_cache
+
+import numpy as np
+
+from gf256 import EXP, INV, LOG, MUL
+from rs_encoder import LEVELS, block_layout, data_capacity, ec_codewords_batch, encode
+
+class DecodeError(Exception):
+    pass
+
+def _mul(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return int(EXP[LOG[a] + LOG[b]])
+
+def _inv(a):
+    return int(INV[a])
+
+def _eval(p, x):
+    # p low-order first
+    y = 0
+    for c in reversed(p):
+        y = _mul(y, x) ^ c
+    return y
+
+@lru_cache(maxsize=None)
+def _syndrome_matrix(n, ec):
+    # M[i, j] = (a^i)^(n-1-j), so S_i = xor over j of MUL[c_j, M[i, j]]
+    i = np.arange(ec)[:, None]
+    j = np.arange(n)[None, :]
+    return EXP[(i * (n - 1 - j)) % 255]
+
+def syndromes_batch(blocks, ec):
+    """blocks: (m, n) uint8 array. returns the (m, ec) syndromes."""
+    blocks = np.asarray(blocks, dtype=np.uint8)
+    m = _syndrome_matrix(blocks.shape[1], ec)
+    return np.bitwise_xor.reduce(MUL[blocks[:, None, :], m[None, :, :]], axis=2)
+
+def berlekamp_massey(s):
+    """error locator from syndromes s[0..ec-1], low-order first with constant term 1."""
+    c = [1]
+    b = [1]
+    l = 0
+    shift = 1
+    last = 1
+    for n in range(len(s)):
+        d = s[n]
+        for i in range(1, l + 1):
+            if i < len(c):
+                d ^= _mul(c[i], s[n - i])
+        if d == 0:
+            shift += 1
+            continue
+        coef = _mul(d, _inv(last))
+        new = c + [0] * max(0, len(b) + shift - len(c))
+        for i, bi in enumerate(b):
+            new[i + shift] ^= _mul(coef, bi)
+        if 2 * l <= n:
+            b, l, last, shift = c, n + 1 - l, d, 1
+        else:
+            shift += 1
+        c = new
+    while len(c) > 1 and c[-1] == 0:
+        c.pop()
+    return c, l
+
+def chien_search(locator, n):
+    """powers p in 0..n-1 with locator(a^-p) == 0."""
+    x = EXP[(255 - np.arange(n)) % 255]
+    y = np.zeros(n, dtype=np.uint8)
+    for c in reversed(locator):
+        y = MUL[y, x] ^ np.uint8(c)
+    return np.nonzero(y == 0)[0].tolist()
+
+def forney(s, locator, powers):
+    """error values at the given powers (generator roots start at a^0)."""
+    ec = len(s)
+    # omega = S(x) * L(x) mod x^ec
+    omega = [0] * ec
+    for i, si in enumerate(s):
+        if si:
+            for j, lj in enumerate(locator):
+                if i + j < ec:
+                    omega[i + j] ^= _mul(si, lj)
+    # formal derivative, only odd terms survive in characteristic 2
+    deriv = [locator[i] if i % 2 else 0 for i in range(1, len(locator))]
+    values = []
+    for p in powers:
+        x = int(EXP[p % 255])
+        x_inv = _inv(x)
+        den = _eval(deriv, x_inv)
+        if den == 0:
+            raise DecodeError("error locator has a repeated root")
+        values.append(_mul(x, _mul(_eval(omega, x_inv), _inv(den))))
+    return values
+
+def decode_block(block, ec, syndromes=None):
+    """
+    returns (corrected codewords, number of errors fixed).
+    raises DecodeError if the block has more errors than the code can correct.
+    """
+    block = list(block)
+    n = len(block)
+    s = syndromes if syndromes is not None else syndromes_batch([block], ec)[0]
+    s = [int(v) for v in s]
+    if not any(s):
+        return block, 0
+    locator, l = berlekamp_massey(s)
+    if 2 * l > ec:
+        raise DecodeError(f"more than {ec // 2} errors")
+    powers = chien_search(locator, n)
+    if len(powers) != l:
+        raise DecodeError(f"more than {ec // 2} errors")
+    for p, e in zip(powers, forney(s, locator, powers)):
+        block[n - 1 - p] ^= e
+    if syndromes_batch([block], ec).any():
+        raise DecodeError(f"more than {ec // 2} errors")
+    return block, l
+
+def decode_batch(blocks, ec):
+    """
+    decodes many blocks of the same length at once.
+    returns (corrected (m, n) array, errors per block with -1 where decoding failed;
+    failed blocks are returned unchanged).
+    """
+    blocks = np.array(blocks, dtype=np.uint8)
+    s = syndromes_batch(blocks, ec)
+    errors = np.zeros(len(blocks), dtype=np.int32)
+    for k in np.nonzero(s.any(axis=1))[0]:
+        try:
+            fixed, errors[k] = decode_block(blocks[k].tolist(), ec, s[k])
+            blocks[k] = fixed
+        except DecodeError:
+            errors[k] = -1
+    return blocks, errors
+
+def deinterleave(codewords, version, level):
+    """inverse of rs_encoder.encode's interleaving: the list of blocks, each data + ec."""
+    ec, lengths = block_layout(version, level)
+    codewords = list(codewords)
+    nblocks = len(lengths)
+    data = [[] for _ in lengths]
+    i = 0
+    for col in range(max(lengths)):
+        for b in range(nblocks):
+            if col < lengths[b]:
+                data[b].append(codewords[i])
+                i += 1
+    ecs = [[] for _ in lengths]
+    for col in range(ec):
+        for b in range(nblocks):
+            ecs[b].append(codewords[i])
+            i += 1
+    return [d + e for d, e in zip(data, ecs)]
+
+def decode(codewords, version, level):
+    """
+    final codeword sequence of a symbol -> (data codewords, errors fixed).
+    raises DecodeError if any block is beyond repair.
+    """
+    ec, lengths = block_layout(version, level)
+    data = []
+    total = 0
+    for block, length in zip(deinterleave(codewords, version, level), lengths):
+        fixed, n = decode_block(block, ec)
+        data += fixed[:length]
+        total += n
+    return data, total
+
+# -----------------------
+# self check + benchmark
+# -----------------------
+def _corrupt(rng, blocks, num_errors):
+    # num_errors distinct positions per block, each xored with a non-zero value
+    m, n = blocks.shape
+    out = blocks.copy()
+    if num_errors == 0:
+        return out
+    pos = np.argsort(rng.random((m, n)), axis=1)[:, :num_errors]
+    vals = rng.integers(1, 256, (m, num_errors), dtype=np.uint8)
+    rows = np.arange(m)[:, None]
+    out[rows, pos] ^= vals
+    return out
+
+def check():
+    import random
+    r = random.Random(0)
+    for v in (1, 3, 5, 10, 27, 40):
+        for level in LEVELS:
+            ec, _ = block_layout(v, level)
+            data = [r.randrange(256) for _ in range(data_capacity(v, level))]
+            cw = encode(data, v, level)
+            assert decode(cw, v, level) == (data, 0)
+            bad = list(cw)
+            for i in r.sample(range(len(cw)), ec // 2):  # at most ec//2 hits per block, spread over the symbol
+                bad[i] ^= r.randrange(1, 256)
+            assert decode(bad, v, level) == (data, ec // 2)
+
+def bench(version, count, seconds):
+    rng = np.random.default_rng(0)
+    print(f"version {version}, {count} blocks per batch")
+    print(f"{'level':>6} {'n':>5} {'ec':>4} {'errors':>7} {'blocks/s':>10} {'codewords/s':>12} {'fixed':>7} {'failed':>7} {'wrong':>7}")
+    for level in LEVELS:
+        ec, lengths = block_layout(version, level)
+        k = lengths[0]
+        data = rng.integers(0, 256, (count, k), dtype=np.uint8)
+        clean = np.concatenate([data, ec_codewords_batch(data, ec)], axis=1)
+        t = ec // 2
+        for num_errors in sorted({0, t // 2, t, t + 1}):
+            bad = _corrupt(rng, clean, num_errors)
+            runs = 0
+            start = time.perf_counter()
+            while True:
+                fixed, errors = decode_batch(bad, ec)
+                runs += 1
+                if time.perf_counter() - start >= seconds:
+                    break
+            elapsed = time.perf_counter() - start
+            ok = (fixed == clean).all(axis=1)
+            failed = int((errors < 0).sum())
+            wrong = int((~ok & (errors >= 0)).sum())  # "corrected" to a different codeword
+            rate = runs * count / elapsed
+            print(f"{level:>6} {clean.shape[1]:>5} {ec:>4} {num_errors:>7} {rate:>10.0f} {rate*clean.shape[1]:>12.0f} "
+                  f"{int(ok.sum()):>7} {failed:>7} {wrong:>7}")
+
+def main():
+    parser = argparse.ArgumentParser(description="qr reed-solomon decoder self check and benchmark.")
+    parser.add_argument("--version", type=int, default=10, help="qr version whose block sizes to use")
+    parser.add_argument("--count", type=int, default=1000, help="blocks per batch")
+    parser.add_argument("--seconds", type=float, default=0.3, help="minimum time per row")
+    args = parser.parse_args()
+
+    check()
+    print("self check ok")
+    bench(args.version, args.count, args.seconds)
+
+if __name__ == "__main__":
+    main()
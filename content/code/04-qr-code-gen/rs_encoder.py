@@ -0,0 +1,235 @@
+"""
+rs_encoder.py
+
+reed-solomon encoding of qr data codewords, for every version (1-40) and ec level (L, M, Q, H).
+
+main.py builds the generator polynomial again for every message and divides with
+gl_longdiv. here the generator for each ec codeword count is built once and cached,
+together with a 256-row table of its multiples, so computing the remainder is one
+xor of a table row per data codeword (the usual lfsr formulation of the division).
+
+polynomial order: main.py keeps polynomials low-order first (calc_gen(10)[0] is the
+constant term). generator() below returns that same order. the encoder itself works on
+codewords in transmission order, which is high-order first: the first data codeword is
+the highest coefficient of the message, and the first ec codeword is the highest
+coefficient of the remainder. for the hello world example at the bottom of main.py,
+gl_longdiv(data reversed, calc_gen(10)) is ec_codewords(data, 10) reversed.
+
+encode_batch() does the same with numpy (see gf256.py), running the division for all
+blocks of a symbol, or all blocks of many symbols, as one array per step.
+
+    python rs_encoder.py            # self check + throughput benchmark
+"""
+
+import argparse
+import time
+from functools import lru_cache
+
+from main import power_to_value, value_to_power
+
+# ecc codewords per block and number of blocks, indexed [level][version], from the iso 18004 tables
+ECC_CODEWORDS_PER_BLOCK = {
+    "L": [None, 7, 10, 15, 20, 26, 18, 20, 24, 30, 18, 20, 24, 26, 30, 22, 24, 28, 30, 28, 28, 28, 28, 30, 30, 26, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30],
+    "M": [None, 10, 16, 26, 18, 24, 16, 18, 22, 22, 26, 30, 22, 22, 24, 24, 28, 28, 26, 26, 26, 26, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28, 28],
+    "Q": [None, 13, 22, 18, 26, 18, 24, 18, 22, 20, 24, 28, 26, 24, 20, 30, 24, 28, 28, 26, 30, 28, 30, 30, 30, 30, 28, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30],
+    "H": [None, 17, 28, 22, 16, 22, 28, 26, 26, 24, 28, 24, 28, 22, 24, 24, 30, 28, 28, 26, 28, 30, 24, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30, 30],
+}
+NUM_BLOCKS = {
+    "L": [None, 1, 1, 1, 1, 1, 2, 2, 2, 2, 4, 4, 4, 4, 4, 6, 6, 6, 6, 7, 8, 8, 9, 9, 10, 12, 12, 12, 13, 14, 15, 16, 17, 18, 19, 19, 20, 21, 22, 24, 25],
+    "M": [None, 1, 1, 1, 2, 2, 4, 4, 4, 5, 5, 5, 8, 9, 9, 10, 10, 11, 13, 14, 16, 17, 17, 18, 20, 21, 23, 25, 26, 28, 29, 31, 33, 35, 37, 38, 40, 43, 45, 47, 49],
+    "Q": [None, 1, 1, 2, 2, 4, 4, 6, 6, 8, 8, 8, 10, 12, 16, 12, 17, 16, 18, 21, 20, 23, 23, 25, 27, 29, 34, 34, 35, 38, 40, 43, 45, 48, 51, 53, 56, 59, 62, 65, 68],
+    "H": [None, 1, 1, 2, 4, 4, 4, 5, 6, 8, 8, 11, 11, 16, 16, 18, 16, 19, 21, 25, 25, 25, 34, 30, 32, 35, 37, 40, 42, 45, 48, 51, 54, 57, 60, 63, 66, 70, 74, 77, 81],
+}
+LEVELS = "LMQH"
+
+def gf_mul(a, b):
+    if a == 0 or b == 0:
+        return 0
+    return power_to_value[(value_to_power[a-1] + value_to_power[b-1]) % 255]
+
+def total_codewords(version):
+    # modules left for data + ec after the function patterns, divided into bytes
+    n = (16*version + 128)*version + 64
+    if version >= 2:
+        num_align = version // 7 + 2
+        n -= (25*num_align - 10)*num_align - 55
+        if version >= 7:
+            n -= 36  # the two version information blocks
+    return n // 8
+
+@lru_cache(maxsize=None)
+def block_layout(version, level):
+    """
+    returns (ec_per_block, [data codewords of each block]).
+    blocks of group 1 come first, group 2 blocks are one codeword longer.
+    """
+    if not 1 <= version <= 40 or level not in LEVELS:
+        raise ValueError(f"no qr version {version}-{level}")
+    ec = ECC_CODEWORDS_PER_BLOCK[level][version]
+    blocks = NUM_BLOCKS[level][version]
+    total = total_codewords(version)
+    short_len = total // blocks
+    num_short = blocks - total % blocks
+    return ec, [short_len - ec]*num_short + [short_len - ec + 1]*(blocks - num_short)
+
+def data_capacity(version, level):
+    return sum(block_layout(version, level)[1])
+
+@lru_cache(maxsize=None)
+def generator(degree):
+    """(x - a^0)(x - a^1)...(x - a^(degree-1)), low-order first like main.calc_gen."""
+    p = [1]
+    for i in range(degree):
+        root = power_to_value[i]
+        r = [0]*(len(p) + 1)
+        for j, c in enumerate(p):
+            r[j] ^= gf_mul(c, root)  # minus is plus in gf(2^8)
+            r[j+1] ^= c
+        p = r
+    return tuple(p)
+
+@lru_cache(maxsize=None)
+def _remainder_table(degree):
+    # row f holds f times the generator's coefficients below the leading 1, high-order first
+    g = generator(degree)[-2::-1]
+    return tuple(tuple(gf_mul(f, c) for c in g) for f in range(256))
+
+def ec_codewords(data, degree):
+    """the degree ec codewords of one block, i.e. data * x^degree mod generator(degree)."""
+    table = _remainder_table(degree)
+    rem = [0]*degree
+    for b in data:
+        row = table[b ^ rem[0]]
+        rem = [r ^ t for r, t in zip(rem[1:] + [0], row)]
+    return rem
+
+def split_blocks(data, version, level):
+    ec, lengths = block_layout(version, level)
+    if len(data) != sum(lengths):
+        raise ValueError(f"version {version}-{level} takes {sum(lengths)} data codewords, got {len(data)}")
+    blocks = []
+    i = 0
+    for n in lengths:
+        blocks.append(list(data[i:i+n]))
+        i += n
+    return blocks
+
+def interleave(blocks):
+    # first codeword of every block, then the second of every block, ...; shorter blocks run out first
+    out = []
+    for i in range(max(len(b) for b in blocks)):
+        for b in blocks:
+            if i < len(b):
+                out.append(b[i])
+    return out
+
+def encode(data, version, level):
+    """
+    data codewords (already padded to data_capacity) -> the final codeword sequence:
+    interleaved data blocks followed by interleaved ec blocks.
+    """
+    ec, _ = block_layout(version, level)
+    blocks = split_blocks(data, version, level)
+    return interleave(blocks) + interleave([ec_codewords(b, ec) for b in blocks])
+
+# -----------------------
+# numpy version, many blocks at once
+# -----------------------
+@lru_cache(maxsize=None)
+def _remainder_table_np(degree):
+    import numpy as np
+    from gf256 import MUL
+    g = np.array(generator(degree)[-2::-1], dtype=np.uint8)
+    return MUL[np.arange(256)[:, None], g[None, :]]
+
+def ec_codewords_batch(blocks, degree):
+    """
+    blocks: 2-d uint8 array, one block per row. returns the (rows, degree) ec codewords.
+    shorter blocks can be left-padded with zeros, leading zeros don't change the remainder.
+    """
+    import numpy as np
+    table = _remainder_table_np(degree)
+    rem = np.zeros((blocks.shape[0], degree), dtype=np.uint8)
+    for k in range(blocks.shape[1]):
+        f = blocks[:, k] ^ rem[:, 0]
+        rem[:, :-1] = rem[:, 1:]
+        rem[:, -1] = 0
+        rem ^= table[f]
+    return rem
+
+def encode_batch(messages, version, level):
+    """
+    encode() for many data codeword sequences of the same version and level.
+    messages: list of sequences or a (n, data_capacity) uint8 array. returns a (n, total_codewords) array.
+    """
+    import numpy as np
+    ec, lengths = block_layout(version, level)
+    msgs = np.asarray(messages, dtype=np.uint8)
+    if msgs.ndim != 2 or msgs.shape[1] != sum(lengths):
+        raise ValueError(f"version {version}-{level} takes {sum(lengths)} data codewords per message")
+    n, nblocks, longest = msgs.shape[0], len(lengths), max(lengths)
+
+    # (n, blocks, longest), short blocks left-padded with one zero
+    padded = np.zeros((n, nblocks, longest), dtype=np.uint8)
+    i = 0
+    for b, length in enumerate(lengths):
+        padded[:, b, longest - length:] = msgs[:, i:i+length]
+        i += length
+    ecw = ec_codewords_batch(padded.reshape(n*nblocks, longest), ec).reshape(n, nblocks, ec)
+
+    # interleave: i-th codeword of every block in turn, the i-th of a short block sits one further right
+    order = [b*longest + (longest - length) + i
+             for i in range(longest) for b, length in enumerate(lengths) if i < length]
+    data = padded.reshape(n, -1)[:, order]
+    return np.concatenate([data, ecw.transpose(0, 2, 1).reshape(n, -1)], axis=1)
+
+# -----------------------
+# self check + benchmark
+# -----------------------
+HELLO_WORLD_1M = [32, 91, 11, 120, 209, 114, 220, 77, 67, 64, 236, 17, 236, 17, 236, 17]
+HELLO_WORLD_1M_EC = [196, 35, 39, 119, 235, 215, 231, 226, 93, 23]
+
+def check():
+    assert ec_codewords(HELLO_WORLD_1M, 10) == HELLO_WORLD_1M_EC
+    # data capacities from the iso tables
+    assert [data_capacity(v, "L") for v in (1, 2, 10, 40)] == [19, 34, 274, 2956]
+    assert [data_capacity(v, "H") for v in (1, 2, 10, 40)] == [9, 16, 122, 1276]
+    assert block_layout(5, "Q") == (18, [15, 15, 16, 16])
+    for v in range(1, 41):
+        for level in LEVELS:
+            ec, lengths = block_layout(v, level)
+            assert sum(lengths) + ec*len(lengths) == total_codewords(v)
+
+def rate(fn, seconds):
+    """calls of fn per second, measured over about seconds."""
+    n = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < seconds:
+        fn()
+        n += 1
+    return n / (time.perf_counter() - start)
+
+def bench(versions, seconds, batch=100):
+    import random
+    rng = random.Random(0)
+    print(f"{'version':>8} {'level':>6} {'blocks':>7} {'codewords':>10} {'codewords/s':>12} {f'batch of {batch} /s':>16}")
+    for v in versions:
+        for level in LEVELS:
+            msgs = [[rng.randrange(256) for _ in range(data_capacity(v, level))] for _ in range(batch)]
+            cw = total_codewords(v)
+            single = rate(lambda: encode(msgs[0], v, level), seconds) * cw
+            many = rate(lambda: encode_batch(msgs, v, level), seconds) * cw * batch
+            print(f"{v:>8} {level:>6} {len(block_layout(v, level)[1]):>7} {cw:>10} {single:>12.0f} {many:>16.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="qr reed-solomon encoder self check and throughput benchmark.")
+    parser.add_argument("--versions", default="1,5,10,20,40", help="comma separated versions to benchmark")
+    parser.add_argument("--seconds", type=float, default=0.5, help="time per version/level")
+    args = parser.parse_args()
+
+    check()
+    print("self check ok")
+    bench([int(v) for v in args.versions.split(",")], args.seconds)
+
+if __name__ == "__main__":
+    main()
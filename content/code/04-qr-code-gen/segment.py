@@ -0,0 +1,344 @@
+"""
+segment.py
+
+splits text into numeric / alphanumeric / byte / kanji segments so the encoded bit stream
+is as short as possible, then picks the smallest version that holds it.
+
+cost of a segment = 4 bit mode indicator + character count (its width depends on the
+version range, 1-9, 10-26 or 27-40) + the characters:
+
+    numeric       10 bits per 3 digits, 7 for a trailing pair, 4 for a trailing digit
+    alphanumeric  11 bits per 2 characters, 6 for a trailing one
+    byte          8 bits per utf-8 byte
+    kanji         13 bits per shift-jis character
+
+the dp runs over the characters once per version range. its states are the mode of the
+segment a character ends up in, and for numeric and alphanumeric how full the current
+group is after it (3 and 2 states), since the next character costs 4 or 3 bits (numeric)
+and 6 or 5 bits (alphanumeric) depending on that. a character either continues the
+segment of the previous one or opens a new segment after the cheapest previous state, so
+every step is a handful of comparisons per state and the result is the exact minimum, not
+an estimate.
+
+    python segment.py "HELLO 1234567890 wörld"   # segments + version, vs byte mode only
+    python segment.py --bench                    # segmentation speed on long inputs
+"""
+
+import argparse
+import random
+import time
+
+from rs_encoder import LEVELS, data_capacity
+from symbol import _append, pad_codewords
+
+ALPHANUMERIC = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ $%*+-./:"
+_ALNUM_VALUE = {c: i for i, c in enumerate(ALPHANUMERIC)}
+
+MODES = ("numeric", "alphanumeric", "byte", "kanji")
+MODE_INDICATOR = {"numeric": 0b0001, "alphanumeric": 0b0010, "byte": 0b0100, "kanji": 0b1000}
+# character count bits for versions 1-9, 10-26, 27-40
+COUNT_BITS = {
+    "numeric": (10, 12, 14),
+    "alphanumeric": (9, 11, 13),
+    "byte": (8, 16, 16),
+    "kanji": (8, 10, 12),
+}
+VERSION_RANGES = ((1, 9), (10, 26), (27, 40))
+
+# dp states: (mode, characters in the current group after this character, 0 = group full)
+GROUP = {"numeric": 3, "alphanumeric": 2, "byte": 1, "kanji": 1}
+STATES = tuple((mode, fill) for mode in MODES for fill in range(GROUP[mode]))
+_STATE = {s: i for i, s in enumerate(STATES)}
+# bits of the next character by how many are already in its group (byte depends on the character)
+_STEP = {"numeric": (4, 3, 3), "alphanumeric": (6, 5), "kanji": (13,)}
+INF = float("inf")
+
+def range_index(version):
+    return 0 if version <= 9 else 1 if version <= 26 else 2
+
+def kanji_value(c):
+    """13-bit kanji mode value of c, or None if c is not a double byte shift-jis kanji."""
+    try:
+        b = c.encode("shift_jis")
+    except UnicodeEncodeError:
+        return None
+    if len(b) != 2:
+        return None
+    code = b[0] << 8 | b[1]
+    if 0x8140 <= code <= 0x9FFC:
+        code -= 0x8140
+    elif 0xE040 <= code <= 0xEBBF:
+        code -= 0xC140
+    else:
+        return None
+    return (code >> 8) * 0xC0 + (code & 0xFF)
+
+def _char_info(text):
+    # per character: utf-8 length, and which of numeric, alphanumeric, kanji it allows
+    info = []
+    for c in text:
+        info.append((len(c.encode("utf-8")), c.isascii() and c.isdigit(), c in _ALNUM_VALUE,
+                     kanji_value(c) is not None))
+    return info
+
+def segment(text, version_range=0, info=None):
+    """
+    the cheapest segmentation of text for versions in VERSION_RANGES[version_range].
+    returns (bits, [(mode, substring), ...]).
+    """
+    if not text:
+        return 4, []  # nothing but the terminator
+    if info is None:
+        info = _char_info(text)
+    header = {mode: 4 + COUNT_BITS[mode][version_range] for mode in MODES}
+    n = len(text)
+    backs = [None] * n  # backs[i][s]: (state of character i-1, whether i opens a segment)
+    cost = [INF] * len(STATES)
+
+    for i, (nbytes, digit, alnum, kanji) in enumerate(info):
+        allowed = {"numeric": digit, "alphanumeric": alnum, "byte": True, "kanji": kanji}
+        new_cost = [INF] * len(STATES)
+        back = [None] * len(STATES)
+        # continue the segment of the previous character
+        for p, (mode, fill) in enumerate(STATES):
+            if cost[p] == INF or not allowed[mode]:
+                continue
+            c = cost[p] + (8 * nbytes if mode == "byte" else _STEP[mode][fill])
+            s = _STATE[(mode, (fill + 1) % GROUP[mode])]
+            if c < new_cost[s]:
+                new_cost[s] = c
+                back[s] = (p, False)
+        # or open a new one after the cheapest previous state
+        best_prev = min(range(len(STATES)), key=cost.__getitem__) if i else None
+        best_cost = cost[best_prev] if i else 0
+        for mode in MODES:
+            if not allowed[mode]:
+                continue
+            c = best_cost + header[mode] + (8 * nbytes if mode == "byte" else _STEP[mode][0])
+            s = _STATE[(mode, 1 % GROUP[mode])]
+            if c < new_cost[s]:
+                new_cost[s] = c
+                back[s] = (best_prev, True)
+        cost = new_cost
+        backs[i] = back
+
+    # walk back from the cheapest end state
+    t = min(range(len(STATES)), key=cost.__getitem__)
+    total = cost[t]
+    modes = [None] * n
+    starts = [False] * n
+    for i in range(n - 1, -1, -1):
+        p, opened = backs[i][t]
+        modes[i] = STATES[t][0]
+        starts[i] = opened
+        t = p
+    segments = []
+    for i, c in enumerate(text):
+        if starts[i]:
+            segments.append([modes[i], c])
+        else:
+            segments[-1][1] += c
+    return total, [tuple(s) for s in segments]
+
+def segment_bits(segments, version):
+    """the bit stream (list of 0/1) of the segments for this version."""
+    r = range_index(version)
+    bits = []
+    for mode, text in segments:
+        if mode == "byte":
+            data = text.encode("utf-8")
+            count = len(data)
+        else:
+            count = len(text)
+        if count >= 1 << COUNT_BITS[mode][r]:
+            raise ValueError(f"{mode} segment of {count} characters is too long for version {version}")
+        _append(bits, MODE_INDICATOR[mode], 4)
+        _append(bits, count, COUNT_BITS[mode][r])
+        if mode == "numeric":
+            for i in range(0, len(text), 3):
+                group = text[i:i + 3]
+                _append(bits, int(group), (4, 7, 10)[len(group) - 1])
+        elif mode == "alphanumeric":
+            for i in range(0, len(text) - 1, 2):
+                _append(bits, _ALNUM_VALUE[text[i]] * 45 + _ALNUM_VALUE[text[i + 1]], 11)
+            if len(text) % 2:
+                _append(bits, _ALNUM_VALUE[text[-1]], 6)
+        elif mode == "byte":
+            for b in data:
+                _append(bits, b, 8)
+        else:
+            for c in text:
+                _append(bits, kanji_value(c), 13)
+    return bits
+
+def _fits(segments, version):
+    r = range_index(version)
+    return all((len(t.encode("utf-8")) if m == "byte" else len(t)) < 1 << COUNT_BITS[m][r] for m, t in segments)
+
+def choose(text, level, min_version=1):
+    """(version, segments, bits) for the smallest version of the given level that holds text."""
+    info = _char_info(text)
+    for r, (lo, hi) in enumerate(VERSION_RANGES):
+        if hi < min_version:
+            continue
+        bits, segments = segment(text, r, info)
+        for v in range(max(lo, min_version), hi + 1):
+            if bits <= data_capacity(v, level) * 8 and _fits(segments, v):
+                return v, segments, bits
+    raise ValueError(f"text too long for any qr version at level {level}")
+
+def encode_text(text, level, version=None):
+    """(version, data codewords) of text with optimal segments, like symbol.encode_bytes."""
+    if version is None:
+        version, segments, _ = choose(text, level)
+    else:
+        bits, segments = segment(text, range_index(version))
+        if bits > data_capacity(version, level) * 8 or not _fits(segments, version):
+            raise ValueError(f"text does not fit version {version}-{level}")
+    return version, pad_codewords(segment_bits(segments, version), version, level)
+
+# -----------------------
+# self check + benchmark
+# -----------------------
+def _decode_bits(bits, version):
+    # reads segments back out of a bit stream, to check segment_bits
+    r = range_index(version)
+    inverse = {v: k for k, v in MODE_INDICATOR.items()}
+    pos = 0
+    def take(k):
+        nonlocal pos
+        v = 0
+        for b in bits[pos:pos + k]:
+            v = v << 1 | b
+        pos += k
+        return v
+    out = []
+    while pos + 4 <= len(bits):
+        mode = inverse.get(take(4))
+        if mode is None:
+            break
+        count = take(COUNT_BITS[mode][r])
+        if mode == "numeric":
+            s = ""
+            while len(s) < count:
+                k = min(3, count - len(s))
+                s += str(take((4, 7, 10)[k - 1])).zfill(k)
+        elif mode == "alphanumeric":
+            s = ""
+            while len(s) < count:
+                if count - len(s) >= 2:
+                    v = take(11)
+                    s += ALPHANUMERIC[v // 45] + ALPHANUMERIC[v % 45]
+                else:
+                    s += ALPHANUMERIC[take(6)]
+        elif mode == "byte":
+            s = bytes(take(8) for _ in range(count)).decode("utf-8")
+        else:
+            s = ""
+            for _ in range(count):
+                v = take(13)
+                code = (v // 0xC0) << 8 | (v % 0xC0)
+                code += 0x8140 if code + 0x8140 <= 0x9FFC else 0xC140
+                s += bytes([code >> 8, code & 0xFF]).decode("shift_jis")
+        out.append((mode, s))
+    return out
+
+def _brute_force(text, r):
+    # every way of cutting text and assigning a mode to each piece
+    best = INF
+    info = _char_info(text)
+    def ok(mode, a, b):
+        if mode == "numeric":
+            return all(x[1] for x in info[a:b])
+        if mode == "alphanumeric":
+            return all(x[2] for x in info[a:b])
+        if mode == "kanji":
+            return all(x[3] for x in info[a:b])
+        return True
+    def seg_cost(mode, piece):
+        return len(segment_bits([(mode, piece)], VERSION_RANGES[r][0]))
+    def go(a, acc):
+        nonlocal best
+        if a == len(text):
+            best = min(best, acc)
+            return
+        for b in range(a + 1, len(text) + 1):
+            for mode in MODES:
+                if ok(mode, a, b):
+                    go(b, acc + seg_cost(mode, text[a:b]))
+    go(0, 0)
+    return best
+
+def check():
+    rng = random.Random(0)
+    alphabet = "0123456789" * 3 + "ABCXYZ $%:" + "abcxyz" + "é∆" + "日本語"
+    for _ in range(60):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randrange(1, 8)))
+        for r in range(3):
+            bits, segments = segment(text, r)
+            v = VERSION_RANGES[r][0]
+            stream = segment_bits(segments, v)
+            assert len(stream) == bits, (text, r, segments)
+            assert "".join(t for _, t in _decode_bits(stream, v)) == text
+            assert bits == _brute_force(text, r), (text, r, segments)
+    for text in ("HELLO WORLD", "0123456789" * 50, "https://example.com/A1B2", "日本語のテキスト", ""):
+        for level in LEVELS:
+            v, data = encode_text(text, level)
+            assert len(data) == data_capacity(v, level)
+    # thonky's HELLO WORLD 1-Q example
+    assert encode_text("HELLO WORLD", "Q") == (1, [32, 91, 11, 120, 209, 114, 220, 77, 67, 64, 236, 17, 236])
+
+def _byte_version(text, level):
+    from symbol import byte_mode_bits, smallest_version
+    n = len(text.encode("utf-8"))
+    return smallest_version(lambda v: byte_mode_bits(v, n), level)
+
+def bench(seconds):
+    rng = random.Random(1)
+    inputs = {
+        "digits": "".join(rng.choice("0123456789") for _ in range(5000)),
+        "alnum + digits": "".join(rng.choice(["ORDER-", "1234567890", "X/", "%2A", "42"]) for _ in range(600)),
+        "urls": " ".join(f"https://example.com/p/{rng.randrange(10**8)}?id=ABC{rng.randrange(10**6)}" for _ in range(40)),
+        "mixed text": "".join(rng.choice(["Invoice ", "2024-01-", "31", " TOTAL EUR ", "1299.00", "日本", "é"]) for _ in range(300)),
+    }
+    print(f"{'input':<16} {'chars':>6} {'chars/s':>10} {'bits':>7} {'byte bits':>10} {'version M':>10} {'byte mode M':>12}")
+    for name, text in inputs.items():
+        runs = 0
+        start = time.perf_counter()
+        while True:
+            bits, segments = segment(text, 2)
+            runs += 1
+            if time.perf_counter() - start >= seconds:
+                break
+        rate = runs * len(text) / (time.perf_counter() - start)
+        byte_bits = 4 + 16 + 8 * len(text.encode("utf-8"))
+        try:
+            v = choose(text, "M")[0]
+        except ValueError:
+            v = "-"
+        try:
+            bv = _byte_version(text, "M")
+        except ValueError:
+            bv = "-"
+        print(f"{name:<16} {len(text):>6} {rate:>10.0f} {bits:>7} {byte_bits:>10} {v:>10} {bv:>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description="optimal mixed mode segmentation of qr text.")
+    parser.add_argument("text", nargs="?", default=None)
+    parser.add_argument("--level", "-l", choices=list(LEVELS), default="M")
+    parser.add_argument("--bench", action="store_true", help="segmentation speed on long inputs")
+    parser.add_argument("--seconds", type=float, default=0.5, help="time per benchmark input")
+    args = parser.parse_args()
+
+    check()
+    print("self check ok")
+    if args.text is not None:
+        v, segments, bits = choose(args.text, args.level)
+        for mode, t in segments:
+            print(f"  {mode:<13} {t!r}")
+        print(f"{bits} bits, version {v}-{args.level} (byte mode only: version {_byte_version(args.text, args.level)})")
+    if args.bench:
+        bench(args.seconds)
+
+if __name__ == "__main__":
+    main()
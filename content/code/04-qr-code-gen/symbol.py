@@ -0,0 +1,221 @@
+"""
+symbol.py
+
+payload -> finished qr symbol as an (n, n) bool numpy array (true = dark module).
+
+    encode_bytes     byte mode bit stream, terminator and pad codewords, smallest version that fits
+                     (text goes through segment.py instead, which mixes modes to use fewer bits)
+    rs_encoder       interleaved data + ec codewords
+    place            the codeword bits along the zigzag, in one assignment through a cached
+                     index array per version
+    function modules finders, timing, alignment patterns and the dark module, drawn once per
+                     version and copied
+    mask             all eight candidates with their format bits at once, the one with the
+                     lowest penalty wins (mask.py)
+    format/version   bch coded, written into both copies
+
+    python symbol.py "HELLO WORLD" --level Q
+"""
+
+import argparse
+from functools import lru_cache
+
+import numpy as np
+
+from mask import alignment_positions, apply_all_masks, function_pattern_mask, penalties, size_of
+from rs_encoder import LEVELS, block_layout, data_capacity, encode, total_codewords
+
+FORMAT_LEVEL_BITS = {"L": 0b01, "M": 0b00, "Q": 0b11, "H": 0b10}
+PAD_CODEWORDS = (0xEC, 0x11)
+
+# -----------------------
+# data codewords
+# -----------------------
+def _count_bits(version):
+    return 8 if version <= 9 else 16
+
+def byte_mode_bits(version, length):
+    # mode indicator, character count, 8 bits per byte
+    return 4 + _count_bits(version) + 8 * length
+
+def smallest_version(bits_for, level, min_version=1):
+    """first version whose data capacity holds bits_for(version) bits."""
+    for v in range(min_version, 41):
+        if bits_for(v) <= data_capacity(v, level) * 8:
+            return v
+    raise ValueError(f"payload too long for any qr version at level {level}")
+
+def pad_codewords(bits, version, level):
+    """
+    bits: list of 0/1 already holding the segments. adds the terminator, zero bits up to a
+    byte boundary and the alternating pad codewords. returns data_capacity codewords.
+    """
+    capacity = data_capacity(version, level)
+    bits = bits + [0] * min(4, capacity * 8 - len(bits))
+    bits += [0] * (-len(bits) % 8)
+    data = np.packbits(np.array(bits, dtype=np.uint8)).tolist()
+    return data + [PAD_CODEWORDS[i % 2] for i in range(capacity - len(data))]
+
+def _append(bits, value, length):
+    bits.extend((value >> i) & 1 for i in range(length - 1, -1, -1))
+
+def encode_bytes(payload, level, version=None):
+    """(version, data codewords) of payload (bytes or str, utf-8) in byte mode."""
+    if isinstance(payload, str):
+        payload = payload.encode("utf-8")
+    if version is None:
+        version = smallest_version(lambda v: byte_mode_bits(v, len(payload)), level)
+    elif byte_mode_bits(version, len(payload)) > data_capacity(version, level) * 8:
+        raise ValueError(f"payload does not fit version {version}-{level}")
+    bits = []
+    _append(bits, 0b0100, 4)
+    _append(bits, len(payload), _count_bits(version))
+    bits.extend(np.unpackbits(np.frombuffer(payload, dtype=np.uint8)).tolist())
+    return version, pad_codewords(bits, version, level)
+
+# -----------------------
+# matrix
+# -----------------------
+@lru_cache(maxsize=None)
+def function_modules(version):
+    """the dark modules of finders, timing, alignment patterns and dark module. read only."""
+    n = size_of(version)
+    m = np.zeros((n, n), dtype=bool)
+    finder = np.ones((7, 7), dtype=bool)
+    finder[1:6, 1:6] = False
+    finder[2:5, 2:5] = True
+    for r, c in ((0, 0), (0, n - 7), (n - 7, 0)):
+        m[r:r + 7, c:c + 7] = finder
+    m[6, 8:n - 8:2] = True
+    m[8:n - 8:2, 6] = True
+    align = np.ones((5, 5), dtype=bool)
+    align[1:4, 1:4] = False
+    align[2, 2] = True
+    pos = alignment_positions(version)
+    corners = {(pos[0], pos[0]), (pos[0], pos[-1]), (pos[-1], pos[0])} if pos else set()
+    for r in pos:
+        for c in pos:
+            if (r, c) not in corners:
+                m[r - 2:r + 3, c - 2:c + 3] = align
+    m[n - 8, 8] = True
+    m.flags.writeable = False
+    return m
+
+@lru_cache(maxsize=None)
+def placement_order(version):
+    """flat indices of the data modules in the order the codeword bits fill them."""
+    n = size_of(version)
+    reserved = function_pattern_mask(version)
+    order = []
+    right = n - 1
+    while right >= 1:
+        if right == 6:
+            right = 5  # the vertical timing pattern takes a whole column
+        upward = ((right + 1) & 2) == 0
+        for vert in range(n):
+            row = n - 1 - vert if upward else vert
+            for col in (right, right - 1):
+                if not reserved[row, col]:
+                    order.append(row * n + col)
+        right -= 2
+    order = np.array(order, dtype=np.intp)
+    order.flags.writeable = False
+    return order
+
+def place(codewords, version):
+    """function modules plus the codeword bits, unmasked, without format/version info."""
+    m = function_modules(version).copy()
+    bits = np.unpackbits(np.asarray(codewords, dtype=np.uint8)).astype(bool)
+    order = placement_order(version)
+    m.flat[order[:len(bits)]] = bits  # the few remainder modules stay light
+    return m
+
+def format_bits(level, k):
+    data = FORMAT_LEVEL_BITS[level] << 3 | k
+    rem = data
+    for _ in range(10):
+        rem = (rem << 1) ^ ((rem >> 9) * 0x537)
+    return (data << 10 | rem) ^ 0x5412
+
+@lru_cache(maxsize=None)
+def format_cells(version):
+    """(rows, cols, bit) of the 30 format modules, both copies."""
+    n = size_of(version)
+    cells = [(i, 8, i) for i in range(6)] + [(7, 8, 6), (8, 8, 7), (8, 7, 8)]
+    cells += [(8, 14 - i, i) for i in range(9, 15)]
+    cells += [(8, n - 1 - i, i) for i in range(8)]
+    cells += [(n - 15 + i, 8, i) for i in range(8, 15)]
+    return tuple(np.array(c, dtype=np.intp) for c in zip(*cells))
+
+def version_bits(version):
+    rem = version
+    for _ in range(12):
+        rem = (rem << 1) ^ ((rem >> 11) * 0x1F25)
+    return version << 12 | rem
+
+def draw_version(m, version):
+    if version < 7:
+        return
+    n = size_of(version)
+    bits = version_bits(version)
+    for i in range(18):
+        a, b = n - 11 + i % 3, i // 3
+        m[b, a] = m[a, b] = (bits >> i) & 1
+
+def finish(m, version, level, k=None):
+    """
+    masks the placed matrix and writes format and version information. k=None tries all
+    eight masks and keeps the one with the lowest penalty. returns (matrix, k).
+    """
+    m = m.copy()
+    draw_version(m, version)
+    stack = apply_all_masks(m)
+    rows, cols, bit = format_cells(version)
+    for j in range(8):
+        stack[j, rows, cols] = (format_bits(level, j) >> bit) & 1
+    if k is None:
+        k = int(np.argmin(penalties(stack).sum(axis=1)))
+    return stack[k], k
+
+def make_symbol(payload, level="M", version=None, mask=None):
+    """payload (str: optimal mixed mode segments, bytes: byte mode) -> (matrix, version, mask)."""
+    if isinstance(payload, str):
+        from segment import encode_text
+        version, data = encode_text(payload, level, version)
+    else:
+        version, data = encode_bytes(payload, level, version)
+    return build(data, version, level, mask)
+
+def build(data, version, level, mask=None):
+    """data codewords (padded to capacity) -> (matrix, version, mask)."""
+    m = place(encode(data, version, level), version)
+    m, mask = finish(m, version, level, mask)
+    return m, version, mask
+
+def check():
+    assert format_bits("M", 5) == 0b100000011001110  # thonky's format string example
+    assert format_bits("L", 4) == 0b110011000101111
+    assert version_bits(7) == 0b000111110010010100
+    for v in (1, 2, 7, 21, 40):
+        assert len(placement_order(v)) == total_codewords(v) * 8 + [0, 0, 7, 7, 7, 7, 7, 0, 0, 0, 0, 0, 0, 0, 3, 3, 3, 3, 3, 3, 3,
+                                                                   4, 4, 4, 4, 4, 4, 4, 3, 3, 3, 3, 3, 3, 3, 0, 0, 0, 0, 0, 0][v]
+    assert block_layout(1, "M")[0] == 10
+
+def _print_matrix(m):
+    print("\n".join("".join("##" if x else "  " for x in row) for row in m))
+
+def main():
+    parser = argparse.ArgumentParser(description="build a qr symbol and print it.")
+    parser.add_argument("payload")
+    parser.add_argument("--level", "-l", choices=list(LEVELS), default="M")
+    parser.add_argument("--version", "-v", type=int, default=None)
+    parser.add_argument("--mask", "-m", type=int, default=None)
+    args = parser.parse_args()
+
+    check()
+    m, version, k = make_symbol(args.payload, args.level, args.version, args.mask)
+    _print_matrix(np.pad(m, 2))
+    print(f"version {version}-{args.level}, mask {k}")
+
+if __name__ == "__main__":
+    main()
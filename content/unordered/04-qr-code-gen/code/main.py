@@ -1,183 +1,165 @@
-from PIL import Image
 import copy
+import numpy as np
+from mask import mask_patterns, version_of
+from sampler import image_to_matrix
 # this is my very important information
 
 
 def qr_image_to_matrix(image_path):
-    matrix = [] 
-    im = Image.open(image_path)
-    pix = im.load()
-    for i in range(29):
-        arr = []
-        for j in range(29):
-            ni = j*(im.size[0] // 29) + (im.size[0] // (29*2))
-            nj = i*(im.size[1] // 29) + (im.size[1] // (29*2))
-            arr.append(1 if pix[ni,nj][0] == 0 and pix[ni,nj][3] == 255 else 0)
-        matrix.append(arr)
-    return matrix
+    bits, _ = image_to_matrix(image_path)
+    return bits.astype(int).tolist()
 
 def qr_image_to_matrix_skeleton(image_path):
-    matrix = [] 
-    im = Image.open(image_path)
-    pix = im.load()
-    for i in range(29):
-        arr = []
-        for j in range(29):
-            ni = j*(im.size[0] // 29) + (im.size[0] // (29*2))
-            nj = i*(im.size[1] // 29) + (im.size[1] // (29*2))
-            arr.append(1 if pix[ni,nj][3] == 255 else 0)
-            # print(pix[ni,nj])
-        matrix.append(arr)
-    return matrix
-    
-matrix = qr_image_to_matrix("image.png")
-original_matrix = copy.deepcopy(matrix)
-
-import pygame
-pygame.init()
+    _, mask = image_to_matrix(image_path)
+    return mask.astype(int).tolist()
 
 SCREEN_WIDTH = 493
 SCREEN_HEIGHT = 493
-SQUARE_SIZE_X = SCREEN_WIDTH // 29
-SQUARE_SIZE_Y = SCREEN_HEIGHT // 29
 
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-
-background_image = pygame.transform.scale(pygame.image.load("background-2.png"), (SCREEN_WIDTH, SCREEN_HEIGHT))
-background_image = background_image.convert_alpha()
-
-transparent_block = pygame.Surface((SQUARE_SIZE_X, SQUARE_SIZE_Y), pygame.SRCALPHA)
-transparent_block.fill((0, 0, 0, 0))
-
-running = True
-mouse_x, mouse_y = 0,0
-current_event = None
-
-
-def get_center_color(i,j, background_image):
-    sx = j * (SQUARE_SIZE_X)
-    sy = i * (SQUARE_SIZE_Y)
-    sample_x = sx + (SQUARE_SIZE_X // 2)
-    sample_y = sy + (SQUARE_SIZE_Y // 2)
-    color = background_image.get_at((sample_x, sample_y))
-    return color
-
-def draw_grid(screen, background_image):
-    for i in range(29):
-        for j in range(29):
-
-            curr_color = get_center_color(i, j, background_image)
-
-            if i > 0: 
-                up = get_center_color(i-1, j, background_image)
-                if up != curr_color:
-                    pygame.draw.line(screen, (189,168,0), (j*SQUARE_SIZE_X, i*SQUARE_SIZE_Y), ((j+1)*SQUARE_SIZE_X, i*SQUARE_SIZE_Y), 1) # target, color, start, end, width
-
-            if j > 0:
-                left = get_center_color(i, j-1, background_image)
-                if left != curr_color:
-                    pygame.draw.line(screen, (189,168,0), (j*SQUARE_SIZE_X, i*SQUARE_SIZE_Y), (j*SQUARE_SIZE_X, (i+1)*SQUARE_SIZE_Y), 1) # target, color, start, end, width
-
-curr_image_id = 0
-skeleton_matrix = qr_image_to_matrix('skeleton.png')
-skeleton_mask_matrix = qr_image_to_matrix_skeleton('skeleton.png')
-
-while running:
-    for event in pygame.event.get():
-
-        if event.type == pygame.KEYDOWN:
-            current_event = event
-            if event.unicode.isdigit():
-                curr_image_id = int(event.unicode)
+BACKGROUND_COLOR = (112,112,112)
+MODULE_COLOR = (71,28,28)
+GRID_COLOR = (189,168,0)
+
+# keys 0-9: 0 the image with the grid, 1-8 the masks, 9 the image without the grid
+#   a / d   clear / set the module under the mouse (hold and move to paint)
+#   s       flip it
+#   f       back to the image as loaded
+#   esc, backspace   quit
+#
+# nothing is drawn per frame: every view is rendered once into a surface (masks when first
+# shown), the grid lines into a transparent overlay, and the loop sleeps in event.wait().
+# an edit repaints one module of the image surface and updates only that rect on screen.
+
+def render_layer(bits, square_x, square_y):
+    import pygame
+    # one rgb array for the whole symbol, each module repeated to a square_x by square_y block
+    pixels = np.where(np.asarray(bits, dtype=bool)[:, :, None], MODULE_COLOR, BACKGROUND_COLOR).astype(np.uint8)
+    pixels = pixels.repeat(square_y, axis=0).repeat(square_x, axis=1)
+    return pygame.surfarray.make_surface(pixels.transpose(1, 0, 2))  # surfarray is indexed [x, y]
+
+def grid_overlay(background_image, n, square_x, square_y):
+    import pygame
+    # a line wherever the background colour under two neighbouring module centres differs
+    rgb = pygame.surfarray.array3d(background_image)
+    alpha = pygame.surfarray.array_alpha(background_image)
+    colors = np.concatenate([rgb, alpha[:, :, None]], axis=2)
+    xs = np.arange(n) * square_x + square_x // 2
+    ys = np.arange(n) * square_y + square_y // 2
+    centers = colors[xs[None, :], ys[:, None]]  # [row i, column j]
+
+    overlay = pygame.Surface((n*square_x, n*square_y), pygame.SRCALPHA)
+    overlay.fill((0, 0, 0, 0))
+    for i, j in np.argwhere((centers[1:] != centers[:-1]).any(axis=2)):
+        i += 1
+        pygame.draw.line(overlay, GRID_COLOR, (j*square_x, i*square_y), ((j+1)*square_x, i*square_y), 1)
+    for i, j in np.argwhere((centers[:, 1:] != centers[:, :-1]).any(axis=2)):
+        j += 1
+        pygame.draw.line(overlay, GRID_COLOR, (j*square_x, i*square_y), (j*square_x, (i+1)*square_y), 1)
+    return overlay
+
+def main():
+    import pygame
+    pygame.init()
+
+    matrix = qr_image_to_matrix("image.png")
+    original_matrix = copy.deepcopy(matrix)
+    skeleton_matrix = np.array(qr_image_to_matrix('skeleton.png'), dtype=bool)
+    skeleton_mask_matrix = np.array(qr_image_to_matrix_skeleton('skeleton.png'), dtype=bool)
+
+    n = len(matrix)
+    square_x = SCREEN_WIDTH // n
+    square_y = SCREEN_HEIGHT // n
+
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.event.set_allowed(None)
+    pygame.event.set_allowed([pygame.QUIT, pygame.KEYDOWN, pygame.KEYUP, pygame.MOUSEMOTION])
+
+    background_image = pygame.transform.scale(pygame.image.load("background-2.png"), (n*square_x, n*square_y))
+    background_image = background_image.convert_alpha()
+    grid = grid_overlay(background_image, n, square_x, square_y)
+
+    masks = mask_patterns(version_of(n))
+    layers = {}  # view id -> pre-rendered surface
+
+    def image_layer():
+        return render_layer(np.array(matrix, dtype=bool) | skeleton_matrix, square_x, square_y)
+
+    def layer(view):
+        if view in (0, 9):
+            view = 0
+        if view not in layers:
+            if view == 0:
+                layers[0] = image_layer()
+            else:
+                layers[view] = render_layer(masks[view - 1] & ~skeleton_mask_matrix, square_x, square_y)
+        return layers[view]
+
+    def redraw(view):
+        screen.fill(BACKGROUND_COLOR)
+        screen.blit(layer(view), (0, 0))
+        if view == 0:
+            screen.blit(grid, (0, 0))
+        pygame.display.flip()
+
+    def edit(view, key, pos):
+        i = pos[1] // square_y
+        j = pos[0] // square_x
+        if not (0 <= i < n and 0 <= j < n):
+            return
+        old = matrix[i][j]
+        if key == pygame.K_a:
+            matrix[i][j] = 0
+        elif key == pygame.K_d:
+            matrix[i][j] = 1
+        elif key == pygame.K_s:
+            matrix[i][j] = 0 if old == 1 else 1
+        if matrix[i][j] == old:
+            return
+        rect = pygame.Rect(j*square_x, i*square_y, square_x, square_y)
+        on = matrix[i][j] == 1 or skeleton_matrix[i][j]
+        layer(0).fill(MODULE_COLOR if on else BACKGROUND_COLOR, rect)
+        if view in (0, 9):
+            screen.blit(layers[0], rect, rect)
+            if view == 0:
+                screen.blit(grid, rect, rect)
+            pygame.display.update(rect)
+
+    view = 0
+    held = None        # edit key being held down
+    last_cell = None   # so a held s flips each module once, not on every mouse move
+    redraw(view)
+
+    running = True
+    while running:
+        event = pygame.event.wait()
+        if event.type == pygame.QUIT:
+            running = False
+        elif event.type == pygame.KEYDOWN:
+            if event.key == pygame.K_BACKSPACE or event.key == pygame.K_ESCAPE:
+                running = False
+            elif event.unicode.isdigit():
+                if int(event.unicode) != view:
+                    view = int(event.unicode)
+                    redraw(view)
+            elif event.key == pygame.K_f:
+                matrix[:] = copy.deepcopy(original_matrix)
+                layers[0] = image_layer()
+                if view in (0, 9):
+                    redraw(view)
+            elif event.key in (pygame.K_a, pygame.K_s, pygame.K_d):
+                held = event.key
+                pos = pygame.mouse.get_pos()
+                last_cell = (pos[0] // square_x, pos[1] // square_y)
+                edit(view, held, pos)
         elif event.type == pygame.KEYUP:
-            current_event = None
-        elif event.type == pygame.MOUSEMOTION:
-            mouse_x, mouse_y = event.pos
+            held = None
+        elif event.type == pygame.MOUSEMOTION and held is not None:
+            cell = (event.pos[0] // square_x, event.pos[1] // square_y)
+            if cell != last_cell:
+                last_cell = cell
+                edit(view, held, event.pos)
 
-        if current_event != None:
-            if current_event.key == pygame.K_BACKSPACE or current_event.key == pygame.K_ESCAPE:
-                running = False
+    pygame.quit()
 
-            ni = mouse_x // (SQUARE_SIZE_X)
-            nj = mouse_y // (SQUARE_SIZE_Y)
-            if current_event.key == pygame.K_a:
-                matrix[ni][nj] = 0
-            if current_event.key == pygame.K_s:
-                matrix[ni][nj] = 0 if matrix[ni][nj] == 1 else 1
-            if current_event.key == pygame.K_d:
-                matrix[ni][nj] = 1
-            if current_event.key == pygame.K_f:
-                matrix = copy.deepcopy(original_matrix)
-                current_event = None
-
-    screen.fill((112,112,112))
-    background_image.set_alpha(128) 
-
-    # image_names = ['image.png', 'mask1.png', 'mask2.png', 'mask3.png', 'mask4.png', 'mask5.png', 'mask6.png', 'mask7.png', 'mask8.png', 'image.png']
-
-    # curr_matrix = qr_image_to_matrix(image_names[curr_image_id])
-
-    curr_matrix = [[0 for _ in range(29)] for _ in range(29)]
-    if curr_image_id == 0 or curr_image_id == 9:
-        curr_matrix = qr_image_to_matrix('image.png')
-    elif curr_image_id == 1:
-        for i in range(29):
-            for j in range(29):
-                if (i+j)%2 == 0:
-                    curr_matrix[i][j] = 1
-    elif curr_image_id == 2:
-        for i in range(29):
-            for j in range(29):
-                if i%2 == 0:
-                    curr_matrix[i][j] = 1
-    elif curr_image_id == 3:
-        for i in range(29):
-            for j in range(29):
-                if j%3 == 0:
-                    curr_matrix[i][j] = 1
-    elif curr_image_id == 4:
-        for i in range(29):
-            for j in range(29):
-                if (i+j)%3 == 0:
-                    curr_matrix[i][j] = 1
-    elif curr_image_id == 5:
-        for i in range(29):
-            for j in range(29):
-                if (i//2+j//3)%2 == 0:
-                    curr_matrix[i][j] = 1
-    elif curr_image_id == 6:
-        for i in range(29):
-            for j in range(29):
-                if (i*j)%2 + (i*j)%3 == 0:
-                    curr_matrix[i][j] = 1
-    elif curr_image_id == 7:
-        for i in range(29):
-            for j in range(29):
-                if ((i*j)%3+i*j)%2 == 0:
-                    curr_matrix[i][j] = 1
-    elif curr_image_id == 8:
-        for i in range(29):
-            for j in range(29):
-                if ((i*j)%3+i+j)%2 == 0:
-                    curr_matrix[i][j] = 1
-
-    for i in range(29):
-        for j in range(29):
-
-            if ((curr_image_id == 0 or curr_image_id == 9) and (curr_matrix[i][j] == 1 or skeleton_matrix[i][j] == 1)) or ((curr_image_id != 0 and curr_image_id != 9) and curr_matrix[i][j] == 1 and not skeleton_mask_matrix[i][j] == 1):
-            
-            # if (skeleton_mask_matrix[i][j] == 1):
-                sx = j * (SQUARE_SIZE_X)
-                sy = i * (SQUARE_SIZE_Y)
-
-                sample_x = sx + (SQUARE_SIZE_X // 2)
-                sample_y = sy + (SQUARE_SIZE_Y // 2)
-
-                pygame.draw.rect(screen, (71,28,28), (sx, sy, SQUARE_SIZE_X, SQUARE_SIZE_Y))
-
-    if curr_image_id == 0:
-        draw_grid(screen, background_image)
-    
-    pygame.display.flip()
-
-pygame.quit()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+mask.py
+
+the qr mask code (cached masks, penalties, best mask) lives in content/code/04-qr-code-gen/mask.py
+next to symbol.py, which uses it to build symbols. this module loads it from there and adds
+picking the best mask for a qr image read by sampler.py.
+
+mask k in main.py (1-8) is iso mask reference k-1 (000-111); the mask code indexes masks 0-7
+like the standard.
+
+    python mask.py                 # self check + benchmark
+    python mask.py ../images/image.png --skeleton ../images/skeleton.png   # + best mask for an image
+"""
+
+import argparse
+import importlib.util
+import os
+import sys
+
+_QR_MASK = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "..", "code", "04-qr-code-gen", "mask.py")
+
+def _load_qr_mask():
+    # loaded by path under its own name: both files are called mask.py
+    module = sys.modules.get("qr_mask")
+    if module is None:
+        spec = importlib.util.spec_from_file_location("qr_mask", _QR_MASK)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules["qr_mask"] = module
+        spec.loader.exec_module(module)
+    return module
+
+_qr = _load_qr_mask()
+
+MASK_FUNCTIONS = _qr.MASK_FUNCTIONS
+N1, N2, N3, N4 = _qr.N1, _qr.N2, _qr.N3, _qr.N4
+size_of = _qr.size_of
+version_of = _qr.version_of
+mask_patterns = _qr.mask_patterns
+alignment_positions = _qr.alignment_positions
+function_pattern_mask = _qr.function_pattern_mask
+apply_mask = _qr.apply_mask
+apply_all_masks = _qr.apply_all_masks
+penalties = _qr.penalties
+best_mask = _qr.best_mask
+
+def main():
+    parser = argparse.ArgumentParser(description="pick the qr mask with the lowest iso penalty.")
+    parser.add_argument("image", nargs="?", default=None, help="qr image, as read by main.py (default: none, just benchmark)")
+    parser.add_argument("--skeleton", default=None, help="skeleton image marking the function patterns")
+    parser.add_argument("--versions", default="1,3,10,25,40", help="comma separated versions to benchmark")
+    parser.add_argument("--seconds", type=float, default=0.3, help="time per version")
+    args = parser.parse_args()
+
+    _qr.check()
+    print("self check ok")
+    if args.image:
+        from sampler import image_to_matrix
+        matrix, _ = image_to_matrix(args.image)
+        reserved = image_to_matrix(args.skeleton)[1] if args.skeleton else None
+        k, _, scores = best_mask(matrix, reserved)
+        print(f"{'mask':>5} {'N1':>5} {'N2':>5} {'N3':>5} {'N4':>5} {'total':>6}")
+        for i, s in enumerate(scores.tolist()):
+            print(f"{i:>5} {s[0]:>5} {s[1]:>5} {s[2]:>5} {s[3]:>5} {sum(s):>6}" + ("  <- best" if i == k else ""))
+        print(f"best mask {k} (main.py key {k + 1})")
+    _qr.bench([int(v) for v in args.versions.split(",")], args.seconds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+sampler.py
+
+qr image -> module matrices, for any version, with numpy.
+
+main.py's qr_image_to_matrix reads one pixel at a time through PIL's access object and
+assumes 29x29 modules. here the image is loaded once into an array and:
+
+    - the symbol is found as the bounding box of the dark pixels (everything around it,
+      the quiet zone or transparency, is light),
+    - the module size comes from the top left finder pattern, whose top edge and left edge
+      are each a run of 7 dark modules; the top right finder has to agree,
+    - the module count is the symbol width over the module size, snapped to the nearest
+      17 + 4*version,
+    - every module is read either at its centre (one fancy-indexing lookup for the whole
+      grid) or by majority vote over all of its pixels (np.add.reduceat over the block edges).
+
+a pixel is dark if it is opaque enough and its luminance is low. sample() returns the bit
+matrix (dark modules) and the mask matrix (opaque modules, what qr_image_to_matrix_skeleton
+reads from skeleton.png).
+
+    python sampler.py ../images/image.png                 # print the matrix + timing
+    python sampler.py ../images --out matrices.npz -j 4   # every image in a folder
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import time
+from dataclasses import dataclass
+
+import numpy as np
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".webp")
+
+@dataclass
+class Grid:
+    top: int
+    left: int
+    module_h: float
+    module_w: float
+    n: int
+
+    @property
+    def version(self):
+        return (self.n - 17) // 4
+
+def load(image_path):
+    """the image as an (h, w, 4) uint8 rgba array."""
+    from PIL import Image
+    with Image.open(image_path) as im:
+        return np.asarray(im if im.mode == "RGBA" else im.convert("RGBA"))
+
+def dark_pixels(pix, threshold=128):
+    # luminance in fixed point, 0.299 r + 0.587 g + 0.114 b ~ (77 r + 150 g + 29 b) / 256
+    rgb = pix[..., :3].astype(np.uint16)
+    lum = rgb[..., 0] * 77 + rgb[..., 1] * 150 + rgb[..., 2] * 29
+    return (pix[..., 3] >= 128) & (lum < threshold * 256)
+
+def opaque_pixels(pix):
+    return pix[..., 3] == 255
+
+def _snap(n):
+    version = min(40, max(1, round((n - 17) / 4)))
+    return 17 + 4 * version
+
+def detect_grid(dark, size=None):
+    """
+    finds the symbol in a 2-d bool array of dark pixels. size forces the module count
+    instead of measuring it. raises ValueError if there is nothing that looks like a qr code.
+    """
+    rows = np.flatnonzero(dark.any(axis=1))
+    cols = np.flatnonzero(dark.any(axis=0))
+    if len(rows) == 0:
+        raise ValueError("no dark pixels")
+    top, bottom = rows[0], rows[-1] + 1
+    left, right = cols[0], cols[-1] + 1
+    height, width = bottom - top, right - left
+
+    if size is None:
+        edge = dark[top, left:right]
+        run_x = np.argmin(edge) if not edge.all() else width
+        run_back = np.argmin(edge[::-1]) if not edge.all() else width
+        col = dark[top:bottom, left]
+        run_y = np.argmin(col) if not col.all() else height
+        if not (edge[0] and col[0]) or run_x == width or abs(run_back - run_x) > max(2, run_x // 4):
+            raise ValueError("no finder patterns in the corners")
+        size = _snap(width / (run_x / 7))
+        if _snap(height / (run_y / 7)) != size:
+            raise ValueError("finder patterns disagree on the module count")
+    return Grid(int(top), int(left), height / size, width / size, size)
+
+def sample_centers(pixels, grid):
+    """pixels[...] at the centre of every module, (n, n) array."""
+    centers = np.arange(grid.n) + 0.5
+    ys = (grid.top + centers * grid.module_h).astype(np.intp)
+    xs = (grid.left + centers * grid.module_w).astype(np.intp)
+    return pixels[ys[:, None], xs[None, :]]
+
+def sample_majority(pixels, grid):
+    """true for every module with more than half of its pixels set, (n, n) array."""
+    edges = np.arange(grid.n + 1)
+    ys = np.round(grid.top + edges * grid.module_h).astype(np.intp)
+    xs = np.round(grid.left + edges * grid.module_w).astype(np.intp)
+    counts = np.add.reduceat(np.add.reduceat(pixels.astype(np.int32), ys[:-1], axis=0), xs[:-1], axis=1)
+    counts = counts[:grid.n, :grid.n]
+    area = np.diff(ys)[:, None] * np.diff(xs)[None, :]
+    return counts * 2 > area
+
+def sample(pix, size=None, method="center"):
+    """
+    pix: rgba array from load(). returns (bits, mask, grid), bits and mask (n, n) bool arrays.
+    """
+    dark = dark_pixels(pix)
+    grid = detect_grid(dark, size)
+    if method == "majority":
+        return sample_majority(dark, grid), sample_majority(opaque_pixels(pix), grid), grid
+    # only the n*n centre pixels need classifying
+    centers = sample_centers(pix, grid)
+    return dark_pixels(centers), opaque_pixels(centers), grid
+
+def image_to_matrix(image_path, size=None, method="center"):
+    bits, mask, _ = sample(load(image_path), size, method)
+    return bits, mask
+
+# -----------------------
+# batch mode
+# -----------------------
+def _worker(task):
+    path, size, method = task
+    start = time.perf_counter()
+    try:
+        bits, mask, grid = sample(load(path), size, method)
+    except (OSError, ValueError) as e:
+        return path, None, None, str(e), time.perf_counter() - start
+    return path, bits, mask, grid.n, time.perf_counter() - start
+
+def image_paths(folder):
+    return sorted(os.path.join(folder, f) for f in os.listdir(folder)
+                  if f.lower().endswith(IMAGE_EXTENSIONS))
+
+def sample_folder(folder, workers=None, size=None, method="center"):
+    """
+    yields (path, bits, mask, n or error message, seconds) for every image in folder,
+    in completion order. bits and mask are None for images that could not be read.
+    """
+    tasks = [(p, size, method) for p in image_paths(folder)]
+    if workers == 1 or len(tasks) <= 1:
+        yield from map(_worker, tasks)
+        return
+    with mp.Pool(workers) as pool:
+        yield from pool.imap_unordered(_worker, tasks, chunksize=max(1, len(tasks) // (4 * (workers or os.cpu_count()))))
+
+def _print_matrix(bits):
+    print("\n".join("".join("#" if x else "." for x in row) for row in bits))
+
+def main():
+    parser = argparse.ArgumentParser(description="read the module matrix of qr code images.")
+    parser.add_argument("path", help="an image, or a folder of images")
+    parser.add_argument("--size", type=int, default=None, help="module count, instead of detecting it")
+    parser.add_argument("--method", choices=("center", "majority"), default="center")
+    parser.add_argument("--out", default=None, help="folder mode: write every matrix into this .npz")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.path):
+        start = time.perf_counter()
+        pix = load(args.path)
+        loaded = time.perf_counter()
+        bits, mask, grid = sample(pix, args.size, args.method)
+        done = time.perf_counter()
+        _print_matrix(bits)
+        print(f"{grid.n}x{grid.n} (version {grid.version}), module {grid.module_w:.2f}x{grid.module_h:.2f}px, "
+              f"{bits.sum()} dark, {mask.sum()} opaque")
+        print(f"load {1000 * (loaded - start):.2f}ms, sample {1000 * (done - loaded):.2f}ms")
+        return
+
+    start = time.perf_counter()
+    arrays = {}
+    ok = 0
+    for path, bits, mask, info, seconds in sample_folder(args.path, args.jobs, args.size, args.method):
+        name = os.path.basename(path)
+        if bits is None:
+            print(f"{name}: {info}")
+            continue
+        ok += 1
+        print(f"{name}: {info}x{info} in {1000 * seconds:.1f}ms")
+        arrays[f"{name}.bits"] = bits
+        arrays[f"{name}.mask"] = mask
+    elapsed = time.perf_counter() - start
+    print(f"{ok} images read in {elapsed:.2f}s")
+    if args.out:
+        np.savez_compressed(args.out, **arrays)
+        print(f"wrote {args.out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+catalog.py
+
+Builds an index of the benchmark formulas so the runner doesn't re-derive the same
+facts on every run. Each formula is read once and recorded with:
+
+    sha256, bytes, mtime           (to tell whether the entry is still valid)
+    declared_vars/declared_clauses (the 'p cnf' header)
+    num_vars, num_clauses          (what the clauses actually use)
+    clause_lengths                 (histogram, length -> count)
+    ratio                          (clauses / vars)
+    expected                       (sat / unsat / unknown, same rules as run_benchmarks.find_expected)
+    size_class                     (small < 100 vars <= medium < 1000 vars <= large)
+    last_time                      (optional, from a previous results CSV via --times; inf for a timeout)
+
+Rebuilding only rescans files whose size or mtime changed, and only looks their expected
+answer up again then, or when the gold CSV's hash changed.
+
+    python catalog.py build -b formulas -g correct_results.csv -o catalog.json [--times results_checked.csv]
+    python catalog.py list -c catalog.json [--order hardest] [--size-class small] [--shard 0/4]
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import json
+import os
+import sys
+from typing import Dict, List, Optional
+
+CATALOG_VERSION = 1
+
+# 3-SAT is hardest around this clause/variable ratio
+PHASE_TRANSITION = 4.26
+
+def size_class(num_vars: int) -> str:
+    if num_vars < 100:
+        return "small"
+    if num_vars < 1000:
+        return "medium"
+    return "large"
+
+def scan_formula(path: str) -> dict:
+    """
+    One read of the file: hash plus every statistic the catalog stores.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    st = os.stat(path)
+
+    declared_vars = declared_clauses = None
+    lengths = {}
+    used = set()
+    num_clauses = 0
+    cur = 0
+    for raw in data.decode().splitlines():
+        line = raw.strip()
+        if not line or line.startswith('c'):
+            continue
+        if line.startswith('p'):
+            parts = line.split()
+            if len(parts) >= 4:
+                declared_vars, declared_clauses = int(parts[2]), int(parts[3])
+            continue
+        for token in line.split():
+            try:
+                lit = int(token)
+            except ValueError:
+                continue
+            if lit == 0:
+                if cur:
+                    lengths[cur] = lengths.get(cur, 0) + 1
+                    num_clauses += 1
+                    cur = 0
+            else:
+                used.add(abs(lit))
+                cur += 1
+    if cur:
+        lengths[cur] = lengths.get(cur, 0) + 1
+        num_clauses += 1
+
+    num_vars = max(used) if used else 0
+    return {
+        "file": os.path.basename(path),
+        "sha256": hashlib.sha256(data).hexdigest(),
+        "bytes": st.st_size,
+        "mtime": st.st_mtime,
+        "declared_vars": declared_vars,
+        "declared_clauses": declared_clauses,
+        "num_vars": num_vars,
+        "num_clauses": num_clauses,
+        "clause_lengths": {str(k): v for k, v in sorted(lengths.items())},
+        "ratio": num_clauses / num_vars if num_vars else 0.0,
+        "size_class": size_class(num_vars),
+    }
+
+def load_times(results_csv: Optional[str]) -> Dict[str, float]:
+    """
+    filename -> time_seconds from a run_benchmarks results CSV. A timeout has no time and is
+    recorded as inf, it is harder than anything that finished; errors are skipped.
+    """
+    times = {}
+    if not results_csv or not os.path.exists(results_csv):
+        return times
+    with open(results_csv, newline='') as f:
+        for row in csv.DictReader(f):
+            try:
+                # results from Windows runs carry backslash paths
+                name = row["filename"].replace("\\", "/").rsplit("/", 1)[-1]
+                if row["result"] == "timeout":
+                    times[name] = float("inf")
+                else:
+                    times[name] = float(row["time_seconds"])
+            except (KeyError, ValueError):
+                continue
+    return times
+
+def gold_fingerprint(gold_csv: Optional[str]) -> Optional[str]:
+    """sha256 of the ground-truth CSV, None if there is none."""
+    if not gold_csv or not os.path.exists(gold_csv):
+        return None
+    with open(gold_csv, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+def build_catalog(folder: str, gold_csv: Optional[str] = None, times_csv: Optional[str] = None,
+                  previous: Optional[dict] = None) -> dict:
+    """
+    Scans folder into a catalog. Entries of previous whose file size and mtime are
+    unchanged are kept as they are, expected answer included; the expected answers are
+    only looked up again (gold CSV, sidecars, filename) for rescanned files, or for all
+    of them when the gold CSV changed.
+    """
+    from run_benchmarks import find_expected, load_gold_map
+
+    gold_map = load_gold_map(gold_csv)
+    gold = gold_fingerprint(gold_csv)
+    times = load_times(times_csv)
+    previous = previous or {}
+    old = {e["file"]: e for e in previous.get("instances", [])}
+    gold_changed = previous.get("gold") != gold
+
+    entries = []
+    for path in sorted(glob.glob(os.path.join(folder, "*.cnf"))):
+        name = os.path.basename(path)
+        st = os.stat(path)
+        e = old.get(name)
+        if e is None or e["bytes"] != st.st_size or e["mtime"] != st.st_mtime:
+            e = scan_formula(path)
+            e["expected"] = find_expected(path, gold_map)
+        elif gold_changed or "expected" not in e:
+            e["expected"] = find_expected(path, gold_map)
+        if name in times:
+            e["last_time"] = times[name]
+        entries.append(e)
+
+    return {"version": CATALOG_VERSION, "folder": os.path.abspath(folder), "gold": gold, "instances": entries}
+
+def save_catalog(catalog: dict, path: str):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump(catalog, f, indent=1)
+    os.replace(tmp, path)
+
+def load_catalog(path: str) -> dict:
+    with open(path, "r") as f:
+        catalog = json.load(f)
+    if catalog.get("version") != CATALOG_VERSION:
+        raise ValueError(f"{path}: catalog version {catalog.get('version')}, expected {CATALOG_VERSION}; rebuild it")
+    return catalog
+
+def hardness(e: dict) -> float:
+    """
+    Measured time in seconds if a previous run recorded one, otherwise a guess in no
+    particular unit: bigger formulas closer to the phase transition are harder.
+    """
+    if "last_time" in e:
+        return e["last_time"]
+    return e["num_vars"] / (1.0 + abs(e["ratio"] - PHASE_TRANSITION))
+
+def hardness_key(e: dict) -> tuple:
+    """
+    Sort key for hardness. Measured times and guesses aren't comparable, so the guessed
+    instances all sort before the measured ones instead of being mixed in with them.
+    """
+    return ("last_time" in e, hardness(e))
+
+ORDERS = {
+    "name": lambda e: e["file"],
+    "size": lambda e: (e["num_vars"], e["num_clauses"]),
+    "easiest": hardness_key,
+    "hardest": lambda e: tuple(-x for x in hardness_key(e)),
+}
+
+def select(catalog: dict, expected: Optional[str] = None, size: Optional[str] = None,
+           min_vars: Optional[int] = None, max_vars: Optional[int] = None,
+           order: str = "name", shard: Optional[str] = None, limit: Optional[int] = None) -> List[dict]:
+    """
+    Filters and orders catalog entries; shard "i/n" keeps every n-th entry starting at i
+    (after ordering, so shards get a similar mix).
+    """
+    entries = catalog["instances"]
+    if expected:
+        entries = [e for e in entries if e["expected"] == expected]
+    if size:
+        entries = [e for e in entries if e["size_class"] == size]
+    if min_vars is not None:
+        entries = [e for e in entries if e["num_vars"] >= min_vars]
+    if max_vars is not None:
+        entries = [e for e in entries if e["num_vars"] <= max_vars]
+    entries = sorted(entries, key=ORDERS[order])
+    if shard:
+        i, n = (int(x) for x in shard.split("/"))
+        if not 0 <= i < n:
+            raise ValueError(f"bad shard {shard!r}, expected i/n with 0 <= i < n")
+        entries = entries[i::n]
+    if limit is not None:
+        entries = entries[:limit]
+    return entries
+
+def entry_path(catalog: dict, e: dict) -> str:
+    return os.path.join(catalog["folder"], e["file"])
+
+def add_select_args(parser):
+    """The filter/order/shard options, shared with run_benchmarks.py."""
+    parser.add_argument("--expected", choices=["sat", "unsat", "unknown"], help="only instances with this expected answer")
+    parser.add_argument("--size-class", choices=["small", "medium", "large"], help="only instances of this size class")
+    parser.add_argument("--min-vars", type=int, default=None)
+    parser.add_argument("--max-vars", type=int, default=None)
+    parser.add_argument("--order", default="name", choices=sorted(ORDERS), help="instance order")
+    parser.add_argument("--shard", default=None, help="i/n: run only the i-th of n interleaved shards")
+    parser.add_argument("--limit", type=int, default=None, help="at most this many instances")
+
+def select_from_args(catalog: dict, args) -> List[dict]:
+    return select(catalog, expected=args.expected, size=args.size_class, min_vars=args.min_vars,
+                  max_vars=args.max_vars, order=args.order, shard=args.shard, limit=args.limit)
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or query the benchmark instance catalog.")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+
+    b = sub.add_parser("build", help="scan a folder of .cnf files into a catalog")
+    b.add_argument("--benchmarks", "-b", default="formulas", help="folder with .cnf files")
+    b.add_argument("--gold", "-g", default="correct_results.csv", help="ground-truth CSV (filename,expected)")
+    b.add_argument("--times", default=None, help="results CSV from a previous run, recorded as last_time")
+    b.add_argument("--out", "-o", default="catalog.json")
+
+    q = sub.add_parser("list", help="print the selected instances")
+    q.add_argument("--catalog", "-c", default="catalog.json")
+    add_select_args(q)
+
+    args = parser.parse_args()
+
+    if args.cmd == "build":
+        previous = None
+        if os.path.exists(args.out):
+            try:
+                previous = load_catalog(args.out)
+            except ValueError:
+                previous = None
+        catalog = build_catalog(args.benchmarks, args.gold, args.times, previous)
+        if not catalog["instances"]:
+            print(f"No .cnf files found in {args.benchmarks}", file=sys.stderr)
+            sys.exit(1)
+        save_catalog(catalog, args.out)
+        n = len(catalog["instances"])
+        counts = {}
+        for e in catalog["instances"]:
+            counts[e["expected"]] = counts.get(e["expected"], 0) + 1
+        print(f"Wrote {n} instances to {args.out} ({', '.join(f'{k}={v}' for k, v in sorted(counts.items()))})")
+    else:
+        catalog = load_catalog(args.catalog)
+        for e in select_from_args(catalog, args):
+            print(f"{e['file']:<20} vars={e['num_vars']:<6} clauses={e['num_clauses']:<7} "
+                  f"ratio={e['ratio']:.2f} expected={e['expected']:<7} hardness={hardness(e):.3f}")
+
+if __name__ == "__main__":
+    main()
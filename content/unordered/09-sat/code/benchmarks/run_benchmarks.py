@@ -6,7 +6,7 @@ Runs a solver on every .cnf in a benchmarks folder with a timeout,
 compares the solver result to ground truth when available, and alerts
 the user about any wrong answers (sat vs unsat).
 
-By default imports solver module 'real_solver' and calls 'solve'.
+By default imports solver module 'dpll' (or the solver a --params profile was tuned for) and calls 'solve'.
 You can point --solver to any importable module that exposes a 'solve' function.
 
 Outputs:
@@ -18,11 +18,22 @@ Ground truth detection order:
   2) sidecar files next to the CNF: .ans, .out, .expected, .result
   3) filename contains 'sat' or 'unsat'
   4) otherwise expected is 'unknown'
+
+With --catalog (see catalog.py) the instance list and expected answers come from the
+catalog instead, which is built on first use (then reused as is; --refresh-catalog rescans
+changed files incrementally), and can be filtered, ordered and sharded:
+  python run_benchmarks.py -b formulas --catalog catalog.json --expected unsat --order hardest --shard 0/4
+
+With --checkpoint-dir (cdcl and xor solvers, see checkpoint.py) a timed-out run leaves a
+checkpoint behind, and --retries reruns timeouts with the timeout multiplied by
+--timeout-factor each time, resuming from it:
+  python run_benchmarks.py -b formulas -s cdcl -t 5 --checkpoint-dir ckpt --retries 3
 """
 
 import argparse
 import glob
 import importlib
+import json
 import multiprocessing as mp
 import os
 import time
@@ -59,12 +70,57 @@ def parse_dimacs(path: str):
         clauses.append(current)
     return clauses
 
+DEFAULT_SOLVER = "dpll"
+
 # -----------------------
 # Worker process that calls the solver
 # -----------------------
-def _worker(cnf, solver_name: str, out_q: mp.Queue):
+class _Terminated(Exception):
+    pass
+
+def _write_profile(profile: dict, path: str, result: str, prof, extras: dict):
+    """Dumps the instrument.Profiler report (plus cProfile/tracemalloc extras) for one instance."""
+    prof.stop()
+    data = {"file": path, "result": result, "profile": prof.report()}
+    data.update(extras)
+    with open(os.path.join(profile["dir"], os.path.basename(path) + ".json"), "w") as f:
+        json.dump(data, f, indent=1)
+
+def solve_function(solver_mod):
+    """
+    The module's solve function as fn(cnf, **kwargs), and the keyword arguments it accepts.
+    Like tune.py, dpll's solve(cnf, fd, ...) gets a NullLog for its step log, and
+    solve_backtracking(cnf, i) starts at variable 1.
+    """
+    import inspect
+    solve_fn = getattr(solver_mod, "solve", None)
+    if solve_fn is None:
+        # also support older style name used earlier
+        solve_fn = getattr(solver_mod, "solve_backtracking", None)
+    if solve_fn is None:
+        return None, set()
+    try:
+        names = list(inspect.signature(solve_fn).parameters)
+    except (TypeError, ValueError):
+        return solve_fn, set()
+    second = names[1] if len(names) > 1 else None
+    if second == "fd":
+        from dpll import NullLog
+        return (lambda cnf, **kw: solve_fn(cnf, NullLog(), **kw)), set(names[2:])
+    if second == "i":
+        return (lambda cnf, **kw: solve_fn(cnf, 1, **kw)), set(names[2:])
+    return solve_fn, set(names[1:])
+
+def _worker(path: str, solver_name: str, out_q: mp.Queue, params: Optional[dict] = None, ckpt: Optional[dict] = None,
+            profile: Optional[dict] = None):
     """
     Worker runs inside a separate process so it can be killed on timeout.
+    It parses the formula itself, so the parent never has to pickle the clause list.
+    params (from a tune.py profile) is passed as solve(cnf, params=params) when given.
+    ckpt ({"path", "timeout", "interval"}) switches to checkpoint.solve, which resumes from
+    and saves to ckpt["path"]; it reports "timeout" itself once the checkpoint is written.
+    profile ({"dir", "cprofile", "tracemalloc"}) hands an instrument.Profiler to solvers that
+    take one and writes <dir>/<file>.json, also when the run is terminated for timing out.
     Puts a tuple (result_str, elapsed_seconds, note) into out_q.
     result_str is one of: "sat", "unsat", "timeout" (shouldn't appear here), "error"
     """
@@ -76,30 +132,76 @@ def _worker(cnf, solver_name: str, out_q: mp.Queue):
         out_q.put(("error", 0.0, f"import-error: {e}"))
         return
 
-    # find solve function
-    solve_fn = getattr(solver_mod, "solve", None)
-    if solve_fn is None:
-        # also support older style name used earlier
-        solve_fn = getattr(solver_mod, "solve_backtracking", None)
-
+    solve_fn, accepted = solve_function(solver_mod)
     if solve_fn is None:
         out_q.put(("error", 0.0, "no 'solve' function in solver module"))
         return
+    if params and "params" not in accepted:
+        out_q.put(("error", 0.0, f"{solver_name}.solve takes no params"))
+        return
 
-    start = _time.perf_counter()
     try:
-        # Try calling solve(cnf)
+        cnf = parse_dimacs(path)
+    except Exception as e:
+        out_q.put(("error", 0.0, f"parse-error: {e}"))
+        return
+
+    prof = None
+    kwargs = {"params": params} if params else {}
+    if profile:
+        import signal
+        from instrument import Profiler, run_captured
+        prof = Profiler()
+        if "profiler" in accepted:
+            kwargs["profiler"] = prof
+
+        def _on_term(signum, frame):
+            raise _Terminated()
+        signal.signal(signal.SIGTERM, _on_term)  # checkpoint.solve installs its own while it runs
+    else:
+        def run_captured(fn, **_):
+            return fn(), {}
+    capture = {"cprofile_path": os.path.join(profile["dir"], os.path.basename(path) + ".prof") if profile and profile["cprofile"] else None,
+               "trace_memory": bool(profile and profile["tracemalloc"])}
+
+    if ckpt:
+        import checkpoint
+        start = _time.perf_counter()
         try:
-            res = solve_fn(cnf)
-        except TypeError:
-            # maybe signature is solve(cnf, start_index)
-            res = solve_fn(cnf, 1)
+            (res, info), extras = run_captured(
+                lambda: checkpoint.solve(cnf, ckpt["path"], solver_name, params, deadline=start + ckpt["timeout"],
+                                         interval=ckpt["interval"], profiler=prof),
+                **capture)
+        except (checkpoint.Timeout, _Terminated):
+            if prof is not None:
+                _write_profile(profile, path, "timeout", prof, {})
+            out_q.put(("timeout", _time.perf_counter() - start, "checkpoint-saved"))
+            return
+        except Exception as e:
+            out_q.put(("error", _time.perf_counter() - start, f"runtime-error: {e}"))
+            return
+        result = "sat" if res is not None else "unsat"
+        if prof is not None:
+            _write_profile(profile, path, result, prof, extras)
+        note = f"resumed-from-checkpoint conflicts={info['conflicts']}" if info["resumed"] else None
+        out_q.put((result, _time.perf_counter() - start, note))
+        return
+
+    start = _time.perf_counter()
+    extras = {}
+    try:
+        res, extras = run_captured(lambda: solve_fn(cnf, **kwargs), **capture)
+    except _Terminated:
+        _write_profile(profile, path, "timeout", prof, {})
+        return
     except Exception as e:
         elapsed = _time.perf_counter() - start
         out_q.put(("error", elapsed, f"runtime-error: {e}"))
         return
 
     elapsed = _time.perf_counter() - start
+    if prof is not None:
+        _write_profile(profile, path, "sat" if res else "unsat", prof, extras)
     # Interpret result: truthy => sat, falsy => unsat
     try:
         sat_bool = bool(res)
@@ -110,15 +212,28 @@ def _worker(cnf, solver_name: str, out_q: mp.Queue):
 # -----------------------
 # Run one CNF with timeout
 # -----------------------
-def run_one(cnf, solver_name: str, timeout_seconds: float = 10.0) -> Tuple[str, Optional[float], Optional[str]]:
+CHECKPOINT_GRACE = 5.0  # seconds a terminated checkpointing worker gets to write its snapshot
+
+def run_one(path: str, solver_name: str, timeout_seconds: float = 10.0, params: Optional[dict] = None,
+            ckpt: Optional[dict] = None, profile: Optional[dict] = None) -> Tuple[str, Optional[float], Optional[str]]:
     q = mp.Queue()
-    p = mp.Process(target=_worker, args=(cnf, solver_name, q))
+    p = mp.Process(target=_worker, args=(path, solver_name, q, params, ckpt, profile))
     p.start()
     p.join(timeout_seconds)
     if p.is_alive():
+        # SIGTERM on POSIX; checkpointing and profiling workers write their files before exiting
         p.terminate()
-        p.join()
-        return ("timeout", None, "killed-after-timeout")
+        p.join(CHECKPOINT_GRACE if ckpt or profile else None)
+        if p.is_alive():
+            p.kill()
+            p.join()
+        note = "killed-after-timeout"
+        try:
+            if q.get(timeout=0.1)[2] == "checkpoint-saved":
+                note += ", checkpoint-saved"
+        except Exception:
+            pass
+        return ("timeout", None, note)
     else:
         # process finished; read queue
         try:
@@ -127,6 +242,50 @@ def run_one(cnf, solver_name: str, timeout_seconds: float = 10.0) -> Tuple[str,
         except Exception:
             return ("error", None, "no-result-in-queue")
 
+# -----------------------
+# Unsat core / MUS for UNSAT instances
+# -----------------------
+def _core_worker(path: str, method: Optional[str], out_q: mp.Queue):
+    """
+    Puts ("core", size, seconds) into out_q as soon as the core is known, then
+    ("mus", size, seconds) if a method is given. size is None if the formula is SAT.
+    """
+    import mus
+    cnf = parse_dimacs(path)
+    cs = mus.CoreSolver(cnf)
+    start = time.perf_counter()
+    core = mus.unsat_core(cnf, cs)
+    out_q.put(("core", None if core is None else len(core), time.perf_counter() - start))
+    if core is None or not method:
+        return
+    start = time.perf_counter()
+    m = mus.METHODS[method](cnf, core, cs)
+    out_q.put(("mus", len(m), time.perf_counter() - start))
+
+def run_core(path: str, method: Optional[str], timeout_seconds: float) -> Dict[str, Tuple[str, str]]:
+    """
+    Returns {"core": (size, time), "mus": (size, time)} as CSV strings; a stage that
+    didn't finish in time reads ("timeout", "N/A"), the mus stage is ("", "") without a method.
+    """
+    q = mp.Queue()
+    p = mp.Process(target=_core_worker, args=(path, method, q))
+    p.start()
+    p.join(timeout_seconds)
+    timed_out = p.is_alive()
+    if timed_out:
+        p.terminate()
+        p.join()
+
+    out = {"core": ("timeout", "N/A") if timed_out else ("error", "N/A"),
+           "mus": (("timeout", "N/A") if timed_out else ("error", "N/A")) if method else ("", "")}
+    while True:
+        try:
+            stage, size, elapsed = q.get(timeout=0.1)
+        except Exception:
+            break
+        out[stage] = ("" if size is None else str(size), f"{elapsed:.6f}")
+    return out
+
 # -----------------------
 # Ground-truth discovery
 # -----------------------
@@ -180,7 +339,6 @@ def read_sidecar_expected(cnf_path: str) -> Optional[str]:
 
 def expected_from_filename(path: str) -> Optional[str]:
     n = os.path.basename(path).lower()
-    print(f'path={path}')
     if "unsat" in n or "unsatisf" in n:
         return "unsat"
     if "sat" in n or "satisf" in n:
@@ -198,29 +356,97 @@ def find_expected(path: str, gold_map: Dict[str,str]) -> str:
         return s
     # 3) filename heuristic
     s2 = expected_from_filename(path)
-    print(f'expected={s2}')
     if s2:
         return s2
     return "unknown"
 
+def _print_profile(profile: dict, path: str):
+    from instrument import format_report
+    dump = os.path.join(profile["dir"], os.path.basename(path) + ".json")
+    if not os.path.exists(dump):
+        return
+    with open(dump, "r") as f:
+        data = json.load(f)
+    print("  " + format_report(data["profile"]).replace("\n", "\n  "))
+    if "tracemalloc" in data:
+        print(f"    peak memory {data['tracemalloc']['peak_bytes']} bytes")
+
 # -----------------------
 # Main
 # -----------------------
 def main():
     parser = argparse.ArgumentParser(description="Run SAT solver on benchmarks and compare to ground truth.")
     parser.add_argument("--benchmarks", "-b", default="benchmarks", help="folder with .cnf files")
-    parser.add_argument("--solver", "-s", default="dpll", help="solver module name to import (must expose solve(cnf) or solve_backtracking)")
+    parser.add_argument("--solver", "-s", default=None, help=f"solver module name to import (must expose solve(cnf) or solve_backtracking; default: the --params profile's solver, else {DEFAULT_SOLVER})")
     parser.add_argument("--timeout", "-t", type=float, default=10.0, help="timeout seconds per instance")
     parser.add_argument("--gold", "-g", default="correct_results.csv", help="optional ground-truth CSV (filename,expected) where expected is sat/unsat")
     parser.add_argument("--out", "-o", default="results_checked.csv", help="output CSV file")
     parser.add_argument("--mismatches", default="mismatches.csv", help="mismatches CSV file")
+    parser.add_argument("--params", "-p", default=None, help="solver parameter profile (JSON written by tune.py)")
+    parser.add_argument("--core", action="store_true", help="extract an unsat core for every UNSAT instance and report its size and time")
+    parser.add_argument("--mus", default=None, choices=["deletion", "quickxplain"], help="also minimize the core to a MUS with this method (implies --core)")
+    parser.add_argument("--core-timeout", type=float, default=60.0, help="timeout seconds for core + MUS extraction per instance")
+    parser.add_argument("--checkpoint-dir", default=None, help="keep cdcl/xor checkpoints here so reruns resume timed-out instances")
+    parser.add_argument("--checkpoint-interval", type=float, default=None, help="also write checkpoints every this many seconds")
+    parser.add_argument("--retries", type=int, default=0, help="rerun a timed-out instance up to this many times")
+    parser.add_argument("--timeout-factor", type=float, default=2.0, help="multiply the timeout by this on every retry")
+    parser.add_argument("--profile", action="store_true", help="per-phase timers and counters per instance (solvers taking a profiler= argument)")
+    parser.add_argument("--profile-dir", default="phase_profiles", help="where --profile writes <file>.json (and .prof)")
+    parser.add_argument("--cprofile", action="store_true", help="with --profile: also dump cProfile stats per instance")
+    parser.add_argument("--tracemalloc", action="store_true", help="with --profile: also record peak memory and top allocation sites")
+    parser.add_argument("--catalog", "-c", default=None, help="instance catalog JSON (built or refreshed from --benchmarks/--gold)")
+    parser.add_argument("--refresh-catalog", action="store_true", help="with --catalog: rescan --benchmarks for new or changed files and a changed --gold (otherwise an existing catalog is used as is)")
+    parser.add_argument("--times", default=None, help="with --catalog: results CSV of an earlier run, used by --order hardest/easiest (refreshes the catalog)")
+    catalog_mod = None
+    try:
+        import catalog as catalog_mod
+        catalog_mod.add_select_args(parser)
+    except ImportError:
+        pass
     args = parser.parse_args()
 
-    bench_glob = os.path.join(args.benchmarks, "*.cnf")
-    files = sorted(glob.glob(bench_glob))
-    if not files:
-        print(f"No .cnf files found in {args.benchmarks}", file=sys.stderr)
-        sys.exit(1)
+    params = None
+    if args.params:
+        with open(args.params, "r") as f:
+            stored = json.load(f)
+        params = stored["params"]
+        # a profile only makes sense for the solver it was tuned for
+        tuned_for = stored.get("solver")
+        if args.solver is None:
+            args.solver = tuned_for or DEFAULT_SOLVER
+        elif tuned_for and tuned_for != args.solver:
+            print(f"--params {args.params} was tuned for {tuned_for}, not {args.solver}", file=sys.stderr)
+            sys.exit(1)
+    if args.solver is None:
+        args.solver = DEFAULT_SOLVER
+
+    expected_of = {}
+    if args.catalog:
+        if catalog_mod is None:
+            print("--catalog needs catalog.py next to run_benchmarks.py", file=sys.stderr)
+            sys.exit(1)
+        cat = None
+        if os.path.exists(args.catalog):
+            try:
+                cat = catalog_mod.load_catalog(args.catalog)
+            except ValueError as e:
+                print(f"[WARN] {e}", file=sys.stderr)
+        if cat is None or args.refresh_catalog or args.times:
+            # only files whose size or mtime changed since the last build are rescanned
+            cat = catalog_mod.build_catalog(args.benchmarks, args.gold, args.times, cat)
+            catalog_mod.save_catalog(cat, args.catalog)
+        entries = catalog_mod.select_from_args(cat, args)
+        files = [catalog_mod.entry_path(cat, e) for e in entries]
+        expected_of = {fp: e["expected"] for fp, e in zip(files, entries)}
+        if not files:
+            print(f"No instances in {args.catalog} match the filters", file=sys.stderr)
+            sys.exit(1)
+    else:
+        bench_glob = os.path.join(args.benchmarks, "*.cnf")
+        files = sorted(glob.glob(bench_glob))
+        if not files:
+            print(f"No .cnf files found in {args.benchmarks}", file=sys.stderr)
+            sys.exit(1)
 
     # Try to set 'spawn' for safety across platforms
     try:
@@ -230,25 +456,50 @@ def main():
 
     gold_map = load_gold_map(args.gold)
 
+    profile = None
+    if args.profile or args.cprofile or args.tracemalloc:
+        os.makedirs(args.profile_dir, exist_ok=True)
+        profile = {"dir": args.profile_dir, "cprofile": args.cprofile, "tracemalloc": args.tracemalloc}
+
+    if args.checkpoint_dir:
+        import checkpoint
+        if args.solver not in checkpoint.SOLVERS:
+            print(f"--checkpoint-dir only works with {', '.join(checkpoint.SOLVERS)}, not {args.solver}", file=sys.stderr)
+            sys.exit(1)
+        os.makedirs(args.checkpoint_dir, exist_ok=True)
+
     with open(args.out, "w", newline="") as out_f, open(args.mismatches, "w", newline="") as mm_f:
         writer = csv.writer(out_f)
         mm_writer = csv.writer(mm_f)
-        writer.writerow(["filename", "result", "time_seconds", "note", "expected", "mismatch"])
+        want_core = args.core or args.mus
+        core_cols = ["core_size", "core_time", "mus_size", "mus_time"] if want_core else []
+        writer.writerow(["filename", "result", "time_seconds", "note", "expected", "mismatch"] + core_cols)
         mm_writer.writerow(["filename", "result", "time_seconds", "note", "expected", "mismatch"])
 
         for fp in files:
             print(f"Solving {fp} ...")
-            try:
-                cnf = parse_dimacs(fp)
-            except Exception as e:
-                print(f"  [ERROR] parse error for {fp}: {e}", file=sys.stderr)
-                writer.writerow([fp, "error", "N/A", f"parse-error: {e}", "unknown", "unknown"])
-                continue
-
-            result, elapsed, note = run_one(cnf, args.solver, timeout_seconds=args.timeout)
+            if profile:
+                stale = os.path.join(profile["dir"], os.path.basename(fp) + ".json")
+                if os.path.exists(stale):
+                    os.remove(stale)
+            for attempt in range(args.retries + 1):
+                timeout = args.timeout * args.timeout_factor ** attempt
+                ckpt = None
+                if args.checkpoint_dir:
+                    ckpt = {"path": os.path.join(args.checkpoint_dir, os.path.basename(fp) + ".ckpt"),
+                            "timeout": timeout, "interval": args.checkpoint_interval}
+                result, elapsed, note = run_one(fp, args.solver, timeout_seconds=timeout, params=params, ckpt=ckpt, profile=profile)
+                if result != "timeout":
+                    break
+                if attempt < args.retries:
+                    print(f"  timeout after {timeout:g}s, retrying with {timeout * args.timeout_factor:g}s")
+            if attempt:
+                note = f"attempt {attempt + 1}" + (f", {note}" if note else "")
+            if profile:
+                _print_profile(profile, fp)
             time_str = f"{elapsed:.6f}" if elapsed is not None else "N/A"
 
-            expected = find_expected(fp, gold_map)  # sat/unsat/unknown
+            expected = expected_of.get(fp) or find_expected(fp, gold_map)  # sat/unsat/unknown
 
             # Determine mismatch:
             # - If expected unknown -> mismatch = unknown
@@ -261,7 +512,15 @@ def main():
                 else:
                     mismatch = "unknown"
 
-            writer.writerow([fp, result, time_str, note or "", expected, mismatch])
+            core_vals = []
+            if want_core:
+                core_vals = ["", "", "", ""]
+                if result == "unsat":
+                    cr = run_core(fp, args.mus, args.core_timeout)
+                    core_vals = [*cr["core"], *cr["mus"]]
+                    print(f"  core={cr['core'][0]} time={cr['core'][1]}" + (f" mus={cr['mus'][0]} time={cr['mus'][1]}" if args.mus else ""))
+
+            writer.writerow([fp, result, time_str, note or "", expected, mismatch] + core_vals)
 
             if mismatch == "yes":
                 # Alert user: print obvious banner and write to mismatches file
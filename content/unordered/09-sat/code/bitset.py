@@ -0,0 +1,305 @@
+"""
+bitset.py
+
+Clause evaluation with Python ints as bitsets (see the parallel-registers post).
+
+Literal view (one clause at a time):
+    clause      -> (pos, neg)   bit v set in pos if v appears positive, in neg if negative
+    assignment  -> (t, f)       bit v set in t if v is True, in f if v is False
+    satisfied   <=> (pos & t) | (neg & f) != 0
+    free lits    =  (pos | neg) & ~(t | f)    unit if exactly one bit, falsified if zero
+
+Bulk view (the whole formula at once), a transposed index:
+    occ_pos[v], occ_neg[v] -> bit i set if clause i contains v / -v
+    satisfied clauses = OR of occ_pos[v] over true v | OR of occ_neg[v] over false v
+
+solve(cnf) is a DPLL on top of the literal view, returning an assignment dict like the other solvers.
+
+    python bitset.py [--benchmarks benchmarks/formulas] [--sizes 50,200,1000,4000] [--solve]
+"""
+
+import argparse
+import glob
+import math
+import os
+import random
+import sys
+import time
+
+def encode_clause(clause):
+    pos = 0
+    neg = 0
+    for lit in clause:
+        if lit > 0:
+            pos |= 1 << lit
+        else:
+            neg |= 1 << -lit
+    return pos, neg
+
+def encode_cnf(cnf):
+    return [encode_clause(c) for c in cnf]
+
+def encode_assignment(assignment):
+    t = 0
+    f = 0
+    for v, val in assignment.items():
+        if val:
+            t |= 1 << v
+        else:
+            f |= 1 << v
+    return t, f
+
+def decode_assignment(t, f):
+    assignment = {}
+    v = 0
+    while t or f:
+        if t & 1:
+            assignment[v] = True
+        elif f & 1:
+            assignment[v] = False
+        t >>= 1
+        f >>= 1
+        v += 1
+    return assignment
+
+def eval_clause_bits(pos, neg, t, f):
+    # same contract as dpll.eval_clause: True / False / None (undetermined)
+    if (pos & t) | (neg & f):
+        return True
+    if (pos | neg) & ~(t | f):
+        return None
+    return False
+
+def eval_cnf_bits(clauses, t, f):
+    # same contract as dpll.eval_cnf
+    assigned = t | f
+    for pos, neg in clauses:
+        if (pos & t) | (neg & f):
+            continue
+        if (pos | neg) & ~assigned:
+            return None
+        return False
+    return True
+
+class Index:
+    """
+    Transposed occurrence index: one clause-bitmask per literal, for evaluating every clause at once.
+    """
+    def __init__(self, cnf):
+        self.num_clauses = len(cnf)
+        self.all = (1 << len(cnf)) - 1
+        self.occ_pos = {}
+        self.occ_neg = {}
+        self.empty = 0  # empty clauses are never satisfied nor undetermined
+        for i, clause in enumerate(cnf):
+            bit = 1 << i
+            if not clause:
+                self.empty |= bit
+            for lit in clause:
+                occ = self.occ_pos if lit > 0 else self.occ_neg
+                occ[abs(lit)] = occ.get(abs(lit), 0) | bit
+
+    def satisfied(self, assignment):
+        """Bitmask of clauses satisfied by assignment (dict var -> bool)."""
+        sat = 0
+        occ_pos = self.occ_pos
+        occ_neg = self.occ_neg
+        for v, val in assignment.items():
+            sat |= occ_pos.get(v, 0) if val else occ_neg.get(v, 0)
+        return sat
+
+    def undetermined(self, assignment):
+        """Bitmask of clauses that still have an unassigned literal."""
+        alive = 0
+        for occ in (self.occ_pos, self.occ_neg):
+            for v, mask in occ.items():
+                if v not in assignment:
+                    alive |= mask
+        return alive
+
+    def status(self, assignment):
+        """Returns (satisfied, falsified, undetermined) clause bitmasks."""
+        sat = self.satisfied(assignment)
+        und = self.undetermined(assignment) & ~sat
+        return sat, self.all & ~sat & ~und, und
+
+    def eval(self, assignment):
+        # same contract as dpll.eval_cnf, which reports the first clause (in order) that isn't satisfied
+        sat, falsified, und = self.status(assignment)
+        unsat = self.all & ~sat
+        if not unsat:
+            return True
+        first = unsat & -unsat
+        return False if first & falsified else None
+
+def propagate(clauses, t, f):
+    """
+    Unit propagation to fixpoint. Returns (t, f), or None on conflict.
+    """
+    changed = True
+    while changed:
+        changed = False
+        for pos, neg in clauses:
+            if (pos & t) | (neg & f):
+                continue
+            assigned = t | f
+            free_pos = pos & ~assigned
+            free_neg = neg & ~assigned
+            free = free_pos | free_neg
+            if not free:
+                return None
+            if free & (free - 1) == 0:  # exactly one free literal
+                if free_pos:
+                    t |= free
+                else:
+                    f |= free
+                changed = True
+    return t, f
+
+def solve(cnf):
+    if any(len(c) == 0 for c in cnf):
+        return None
+    # tautologies (x and -x in one clause) have a single free bit but must never propagate
+    clauses = [(p, n) for p, n in encode_cnf(cnf) if not p & n]
+    all_vars = 0
+    for pos, neg in clauses:
+        all_vars |= pos | neg
+
+    def recurse(t, f):
+        res = propagate(clauses, t, f)
+        if res is None:
+            return None
+        t, f = res
+        st = eval_cnf_bits(clauses, t, f)
+        if st is True:
+            return t, f
+        if st is False:
+            return None
+        free = all_vars & ~(t | f)
+        bit = free & -free  # lowest unassigned variable
+        return recurse(t | bit, f) or recurse(t, f | bit)
+
+    res = recurse(0, 0)
+    if res is None:
+        return None
+    return decode_assignment(*res)
+
+# -----------------------
+# Benchmark against the dict-based evaluator
+# -----------------------
+def random_cnf(num_vars, num_clauses, k, rng):
+    cnf = []
+    for _ in range(num_clauses):
+        vs = rng.sample(range(1, num_vars + 1), k)
+        cnf.append([v if rng.random() < 0.5 else -v for v in vs])
+    return cnf
+
+def random_assignment(num_vars, rng, density=1.0):
+    return {v: rng.random() < 0.5 for v in range(1, num_vars + 1) if rng.random() < density}
+
+def _time(fn, reps):
+    start = time.perf_counter()
+    for _ in range(reps):
+        fn()
+    return (time.perf_counter() - start) / reps
+
+def bench_instance(name, cnf, num_vars, rng, reps, verbose=True):
+    from dpll import eval_clause, eval_cnf
+
+    # a full assignment, with the clauses it falsifies moved to the end: both evaluators stop
+    # at the first clause that isn't satisfied, this way they scan the whole list first
+    a = random_assignment(num_vars, rng)
+    cnf = sorted(cnf, key=lambda c: eval_clause(c, a) is not True)
+    clauses = encode_cnf(cnf)
+    index = Index(cnf)
+    t, f = encode_assignment(a)
+
+    # sanity: all three evaluators agree
+    expected = eval_cnf(cnf, a)
+    assert eval_cnf_bits(clauses, t, f) == expected
+    assert index.eval(a) == expected
+    n_sat = sum(1 for c in cnf if eval_clause(c, a) is True)
+    assert index.satisfied(a).bit_count() == n_sat
+
+    rows = [
+        ("eval_cnf (dict)", _time(lambda: eval_cnf(cnf, a), reps)),
+        ("eval_cnf_bits", _time(lambda: eval_cnf_bits(clauses, t, f), reps)),
+        ("sat count (dict)", _time(lambda: sum(1 for c in cnf if eval_clause(c, a) is True), reps)),
+        ("sat count (bits)", _time(lambda: sum(1 for p, n in clauses if (p & t) | (n & f)), reps)),
+        ("sat count (index)", _time(lambda: index.satisfied(a).bit_count(), reps)),
+    ]
+    if verbose:
+        base = rows[2][1]
+        print(f"{name}: vars={num_vars} clauses={len(cnf)}")
+        for label, secs in rows:
+            print(f"  {label:<18} {secs * 1e6:10.1f} us   x{base / secs if secs else 0:6.2f} vs dict sweep")
+    return rows
+
+def bench_suite(files, rng, reps):
+    """bench_instance on every suite file: a line per file, then totals and mean speedups."""
+    from main import parse_dimacs
+
+    totals = None
+    log_speedups = [0.0, 0.0]  # eval_cnf_bits vs eval_cnf, index vs dict sat count
+    print(f"{'file':<20} {'vars':>5} {'clauses':>7} {'eval_cnf':>10} {'bits':>10} {'x':>6} "
+          f"{'count':>10} {'index':>10} {'x':>6}   (us)")
+    for fp in files:
+        cnf = parse_dimacs(fp)
+        num_vars = max(abs(l) for c in cnf for l in c)
+        rows = bench_instance(os.path.basename(fp), cnf, num_vars, rng, reps, verbose=False)
+        secs = [r[1] for r in rows]
+        totals = secs if totals is None else [a + b for a, b in zip(totals, secs)]
+        log_speedups[0] += math.log(secs[0] / secs[1])
+        log_speedups[1] += math.log(secs[2] / secs[4])
+        print(f"{os.path.basename(fp):<20} {num_vars:>5} {len(cnf):>7} {secs[0] * 1e6:10.1f} {secs[1] * 1e6:10.1f} "
+              f"{secs[0] / secs[1]:6.2f} {secs[2] * 1e6:10.1f} {secs[4] * 1e6:10.1f} {secs[2] / secs[4]:6.2f}")
+    n = len(files)
+    print(f"suite ({n} files), time per full pass over all of them:")
+    for (label, _), secs in zip(rows, totals):
+        print(f"  {label:<18} {secs * 1e3:10.3f} ms")
+    print(f"  eval_cnf_bits vs eval_cnf: x{totals[0] / totals[1]:.2f} total, x{math.exp(log_speedups[0] / n):.2f} geometric mean")
+    print(f"  index vs dict sat count:   x{totals[2] / totals[4]:.2f} total, x{math.exp(log_speedups[1] / n):.2f} geometric mean")
+
+def main():
+    from main import parse_dimacs
+
+    parser = argparse.ArgumentParser(description="Benchmark bitset clause evaluation against dpll.eval_cnf.")
+    parser.add_argument("--benchmarks", "-b", default=os.path.join("benchmarks", "formulas"), help="folder with .cnf files")
+    parser.add_argument("--sizes", default="50,200,1000,4000", help="comma-separated variable counts for generated 3-SAT")
+    parser.add_argument("--ratio", type=float, default=4.26, help="clause/variable ratio of generated formulas")
+    parser.add_argument("--reps", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--solve", action="store_true", help="also time dpll.solve vs bitset.solve over the whole suite (slow)")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    files = sorted(glob.glob(os.path.join(args.benchmarks, "*.cnf")))
+    if files:
+        bench_suite(files, rng, args.reps)
+    else:
+        print(f"No .cnf files found in {args.benchmarks}, skipping suite", file=sys.stderr)
+
+    if files and args.solve:
+        from dpll import NullLog, solve as dpll_solve
+
+        t_dict = t_bits = 0.0
+        for fp in files:
+            cnf = parse_dimacs(fp)
+            start = time.perf_counter()
+            r1 = dpll_solve(cnf, NullLog())
+            t_dict += time.perf_counter() - start
+            start = time.perf_counter()
+            r2 = solve(cnf)
+            t_bits += time.perf_counter() - start
+            if bool(r1) != bool(r2):
+                print(f"[MISMATCH] {fp}: dpll={bool(r1)} bitset={bool(r2)}", file=sys.stderr)
+        print(f"suite solve ({len(files)} files): dpll={t_dict:.3f}s bitset={t_bits:.3f}s x{t_dict / t_bits:.2f}")
+
+    for n in (int(s) for s in args.sizes.split(",") if s):
+        cnf = random_cnf(n, int(n * args.ratio), 3, rng)
+        reps = max(3, args.reps * 50 // n)
+        bench_instance(f"random 3-SAT n={n}", cnf, n, rng, reps)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+cardinality.py
+
+CNF encodings for "at most / at least / exactly k of these literals" and weighted
+(pseudo-Boolean) sums, plus a builder that streams the resulting clauses straight
+into a DIMACS file.
+
+Every encoding takes the literals and a VarPool (to allocate auxiliary variables)
+and returns a list of clauses:
+
+    at-most-one   amo_pairwise, amo_sequential, amo_commander, amo_product
+    at-most-k     atmost_seqcounter, atmost_totalizer (totalizer() gives the full counter)
+    pseudo-Bool   pb_atmost, pb_atleast (sequential weight counter)
+
+Clause counts for n literals:
+    pairwise      n(n-1)/2            no aux vars
+    sequential    3n-4                n-1 aux
+    commander     ~3n                 ~n/2 aux
+    product       2n + 4 sqrt(n)      ~2 sqrt(n) aux
+
+    python cardinality.py [--max-holes 6] [--timeout 20] [--out folder]
+"""
+
+import argparse
+import math
+import os
+import time
+
+class VarPool:
+    """
+    Hands out variable ids. Named variables (any hashable, e.g. ('cell', r, c, d)) get a
+    stable id on first use; new() gives anonymous auxiliary variables.
+    """
+    def __init__(self, start=0):
+        self.top = start
+        self.ids = {}
+
+    def new(self):
+        self.top += 1
+        return self.top
+
+    def id(self, name):
+        v = self.ids.get(name)
+        if v is None:
+            v = self.new()
+            self.ids[name] = v
+        return v
+
+# -----------------------
+# At-most-one
+# -----------------------
+def amo_pairwise(lits, pool=None):
+    return [[-lits[i], -lits[j]] for i in range(len(lits)) for j in range(i + 1, len(lits))]
+
+def amo_sequential(lits, pool):
+    return atmost_seqcounter(lits, 1, pool)
+
+def amo_commander(lits, pool, group_size=3):
+    """
+    Klieber-Kwon commander encoding: split into groups, pairwise AMO inside a group,
+    one commander per group that is true iff the group has a true literal, recurse on commanders.
+    """
+    if len(lits) <= group_size + 1:
+        return amo_pairwise(lits)
+    clauses = []
+    commanders = []
+    for start in range(0, len(lits), group_size):
+        group = lits[start:start + group_size]
+        c = pool.new()
+        commanders.append(c)
+        clauses += amo_pairwise(group)
+        clauses += [[-x, c] for x in group]
+        clauses.append([-c] + list(group))
+    return clauses + amo_commander(commanders, pool, group_size)
+
+def amo_product(lits, pool):
+    """
+    Chen's product encoding: place the literals on a p x q grid, a true literal forces its
+    row and column variables, and at most one row / one column may be true (recursively).
+    """
+    n = len(lits)
+    if n <= 4:
+        return amo_pairwise(lits)
+    p = math.ceil(math.sqrt(n))
+    q = math.ceil(n / p)
+    rows = [pool.new() for _ in range(p)]
+    cols = [pool.new() for _ in range(q)]
+    clauses = []
+    for i, x in enumerate(lits):
+        clauses.append([-x, rows[i // q]])
+        clauses.append([-x, cols[i % q]])
+    return clauses + amo_product(rows, pool) + amo_product(cols, pool)
+
+AMO_ENCODINGS = {
+    "pairwise": amo_pairwise,
+    "sequential": amo_sequential,
+    "commander": amo_commander,
+    "product": amo_product,
+}
+
+# -----------------------
+# At-most-k
+# -----------------------
+def atmost_seqcounter(lits, k, pool):
+    """
+    Sinz's sequential counter: s[i][j] is true if at least j+1 of lits[0..i] are true.
+    """
+    n = len(lits)
+    if k >= n:
+        return []
+    if k == 0:
+        return [[-x] for x in lits]
+    s = [[pool.new() for _ in range(k)] for _ in range(n - 1)]
+    clauses = [[-lits[0], s[0][0]]]
+    clauses += [[-s[0][j]] for j in range(1, k)]
+    for i in range(1, n - 1):
+        x = lits[i]
+        clauses.append([-x, s[i][0]])
+        clauses.append([-s[i - 1][0], s[i][0]])
+        for j in range(1, k):
+            clauses.append([-x, -s[i - 1][j - 1], s[i][j]])
+            clauses.append([-s[i - 1][j], s[i][j]])
+        clauses.append([-x, -s[i - 1][k - 1]])
+    clauses.append([-lits[n - 1], -s[n - 2][k - 1]])
+    return clauses
+
+def totalizer(lits, pool, upto=None):
+    """
+    Bailleux-Boufkhad totalizer. Returns (clauses, outputs) where outputs[j] is true iff at
+    least j+1 of lits are true. With upto set, counting stops at upto (enough for at-most-(upto-1)).
+    """
+    if upto is None:
+        upto = len(lits)
+    clauses = []
+
+    def build(part):
+        if len(part) == 1:
+            return list(part)
+        mid = len(part) // 2
+        a = build(part[:mid])
+        b = build(part[mid:])
+        size = min(len(a) + len(b), upto)
+        r = [pool.new() for _ in range(size)]
+        # a_i /\ b_j -> r_{i+j}  (index 0 = "none", always true)
+        for i in range(len(a) + 1):
+            for j in range(len(b) + 1):
+                if i + j == 0 or i + j > size:
+                    continue
+                cl = [r[i + j - 1]]
+                if i:
+                    cl.append(-a[i - 1])
+                if j:
+                    cl.append(-b[j - 1])
+                clauses.append(cl)
+        # r_{i+j+1} -> a_{i+1} \/ b_{j+1}
+        for i in range(len(a) + 1):
+            for j in range(len(b) + 1):
+                if i + j + 1 > size:
+                    continue
+                cl = [-r[i + j]]
+                if i < len(a):
+                    cl.append(a[i])
+                if j < len(b):
+                    cl.append(b[j])
+                clauses.append(cl)
+        return r
+
+    if not lits:
+        return [], []
+    return clauses, build(list(lits))
+
+def atmost_totalizer(lits, k, pool):
+    if k >= len(lits):
+        return []
+    if k == 0:
+        return [[-x] for x in lits]
+    clauses, out = totalizer(lits, pool, upto=k + 1)
+    return clauses + [[-out[k]]]
+
+def atleast_totalizer(lits, k, pool):
+    if k <= 0:
+        return []
+    if k > len(lits):
+        return [[]]
+    clauses, out = totalizer(lits, pool, upto=k)
+    return clauses + [[out[k - 1]]]
+
+ATMOST_ENCODINGS = {
+    "seqcounter": atmost_seqcounter,
+    "totalizer": atmost_totalizer,
+}
+
+# -----------------------
+# Pseudo-Boolean
+# -----------------------
+def pb_atmost(lits, weights, k, pool):
+    """
+    sum(w_i * lit_i) <= k for positive integer weights, Holldobler's sequential weight counter:
+    s[i][j] is true if the weights of the true literals among lits[0..i] sum to at least j+1.
+    """
+    if any(w <= 0 for w in weights):
+        raise ValueError("pb_atmost needs positive weights")
+    if k < 0:
+        return [[]]
+    clauses = [[-x] for x, w in zip(lits, weights) if w > k]
+    items = [(x, w) for x, w in zip(lits, weights) if w <= k]
+    if sum(w for _, w in items) <= k:
+        return clauses
+    n = len(items)
+    s = [[pool.new() for _ in range(k)] for _ in range(n)]
+    for i, (x, w) in enumerate(items):
+        for j in range(w):
+            clauses.append([-x, s[i][j]])
+        if i == 0:
+            continue
+        for j in range(k):
+            clauses.append([-s[i - 1][j], s[i][j]])
+        for j in range(k - w):
+            clauses.append([-x, -s[i - 1][j], s[i][j + w]])
+        clauses.append([-x, -s[i - 1][k - w]])
+    return clauses
+
+def pb_atleast(lits, weights, k, pool):
+    # sum(w_i * lit_i) >= k  <=>  sum(w_i * -lit_i) <= sum(w) - k
+    return pb_atmost([-x for x in lits], weights, sum(weights) - k, pool)
+
+# -----------------------
+# Streaming DIMACS output
+# -----------------------
+class DimacsWriter:
+    """
+    Writes clauses to a DIMACS file as they arrive. The header is written as a fixed-width
+    placeholder and patched on close, so nothing has to be kept in memory.
+    """
+    HEADER = "p cnf {:<12} {:<16}\n"
+
+    def __init__(self, path):
+        self.f = open(path, "w")
+        self.num_vars = 0
+        self.num_clauses = 0
+        self.f.write(self.HEADER.format(0, 0))
+
+    def write(self, clause):
+        self.f.write(" ".join(map(str, clause)) + " 0\n")
+        self.num_clauses += 1
+        for lit in clause:
+            if abs(lit) > self.num_vars:
+                self.num_vars = abs(lit)
+
+    def close(self, num_vars=None):
+        if num_vars is not None:
+            self.num_vars = max(self.num_vars, num_vars)
+        self.f.seek(0)
+        self.f.write(self.HEADER.format(self.num_vars, self.num_clauses))
+        self.f.close()
+
+class CNFBuilder:
+    """
+    Collects clauses from the encodings above. With a path, clauses go straight to a
+    DimacsWriter; without one they are kept in self.clauses.
+
+        b = CNFBuilder("out.cnf", amo="product")
+        cells = [b.pool.id(("x", i)) for i in range(9)]
+        b.exactly_one(cells)
+        b.close()
+    """
+    def __init__(self, path=None, amo="sequential", atmost="totalizer", pool=None):
+        self.pool = pool or VarPool()
+        self.amo_method = AMO_ENCODINGS[amo]
+        self.atmost_method = ATMOST_ENCODINGS[atmost]
+        self.writer = DimacsWriter(path) if path else None
+        self.clauses = []
+        self.num_clauses = 0
+
+    def add(self, clause):
+        self.num_clauses += 1
+        if self.writer:
+            self.writer.write(clause)
+        else:
+            self.clauses.append(list(clause))
+
+    def extend(self, clauses):
+        for c in clauses:
+            self.add(c)
+
+    def at_least_one(self, lits):
+        self.add(list(lits))
+
+    def at_most_one(self, lits):
+        self.extend(self.amo_method(list(lits), self.pool))
+
+    def exactly_one(self, lits):
+        self.at_least_one(lits)
+        self.at_most_one(lits)
+
+    def at_most(self, lits, k):
+        self.extend(self.atmost_method(list(lits), k, self.pool))
+
+    def at_least(self, lits, k):
+        self.extend(atleast_totalizer(list(lits), k, self.pool))
+
+    def exactly(self, lits, k):
+        self.at_most(lits, k)
+        self.at_least(lits, k)
+
+    def pb_at_most(self, lits, weights, k):
+        self.extend(pb_atmost(list(lits), list(weights), k, self.pool))
+
+    def pb_at_least(self, lits, weights, k):
+        self.extend(pb_atleast(list(lits), list(weights), k, self.pool))
+
+    def close(self):
+        if self.writer:
+            self.writer.close(self.pool.top)
+
+# -----------------------
+# Puzzles and benchmark
+# -----------------------
+def pigeonhole(pigeons, holes, builder):
+    """Every pigeon in a hole, at most one pigeon per hole. UNSAT when pigeons > holes."""
+    x = lambda p, h: builder.pool.id(("php", p, h))
+    for p in range(pigeons):
+        builder.at_least_one([x(p, h) for h in range(holes)])
+    for h in range(holes):
+        builder.at_most_one([x(p, h) for p in range(pigeons)])
+    return builder
+
+def sudoku(grid, builder):
+    """
+    grid is 81 ints in row order, 0 for empty. x(r, c, d) means cell (r, c) holds digit d.
+    """
+    x = lambda r, c, d: builder.pool.id(("cell", r, c, d))
+    digits = range(1, 10)
+    for r in range(9):
+        for c in range(9):
+            builder.exactly_one([x(r, c, d) for d in digits])
+    for d in digits:
+        for i in range(9):
+            builder.exactly_one([x(i, c, d) for c in range(9)])
+            builder.exactly_one([x(r, i, d) for r in range(9)])
+            br, bc = 3 * (i // 3), 3 * (i % 3)
+            builder.exactly_one([x(br + a, bc + b, d) for a in range(3) for b in range(3)])
+    for i, d in enumerate(grid):
+        if d:
+            builder.add([x(i // 9, i % 9, d)])
+    return builder
+
+SUDOKU_EXAMPLE = [int(ch) for ch in (
+    "530070000600195000098000060800060003400803001700020006060000280000419005000080079"
+)]
+
+def main():
+    import bitset
+    import cdcl
+
+    parser = argparse.ArgumentParser(description="Compare clause counts and solve times across encodings.")
+    parser.add_argument("--max-holes", type=int, default=6)
+    parser.add_argument("--timeout", type=float, default=20.0)
+    parser.add_argument("--out", default=None, help="also write the sudoku CNF per encoding into this folder")
+    args = parser.parse_args()
+
+    print("pigeonhole (holes+1 pigeons, holes holes), cdcl:")
+    print(f"  {'encoding':<11} {'holes':>5} {'vars':>6} {'clauses':>8} {'time s':>9}")
+    for name in AMO_ENCODINGS:
+        for holes in range(2, args.max_holes + 1):
+            b = pigeonhole(holes + 1, holes, CNFBuilder(amo=name))
+            res, secs = _run(cdcl.solve, b.clauses, args.timeout)
+            t = res if secs is None else f"{secs:.4f}"
+            print(f"  {name:<11} {holes:>5} {b.pool.top:>6} {len(b.clauses):>8} {t:>9}")
+            if secs is None:
+                break
+
+    print("sudoku (bitset solver):")
+    print(f"  {'encoding':<11} {'vars':>6} {'clauses':>8} {'time s':>9}")
+    for name in AMO_ENCODINGS:
+        if args.out:
+            os.makedirs(args.out, exist_ok=True)
+            path = os.path.join(args.out, f"sudoku_{name}.cnf")
+            sudoku(SUDOKU_EXAMPLE, CNFBuilder(path, amo=name)).close()
+        b = sudoku(SUDOKU_EXAMPLE, CNFBuilder(amo=name))
+        res, secs = _run(bitset.solve, b.clauses, args.timeout)
+        t = res if secs is None else f"{secs:.4f}"
+        print(f"  {name:<11} {b.pool.top:>6} {len(b.clauses):>8} {t:>9}")
+
+def _run_worker(solve_fn, cnf, q):
+    start = time.perf_counter()
+    res = solve_fn(cnf)
+    q.put((res is not None, time.perf_counter() - start))
+
+def _run(solve_fn, cnf, timeout):
+    """
+    Runs solve_fn(cnf) in a child process; returns (sat, seconds), or ("timeout", None), or
+    ("error", None) if the child died without a result (crashed, killed, out of memory).
+    """
+    import multiprocessing as mp
+    import queue
+    q = mp.Queue()
+    p = mp.Process(target=_run_worker, args=(solve_fn, cnf, q))
+    p.start()
+    p.join(timeout)
+    if p.is_alive():
+        p.terminate()
+        p.join()
+        return "timeout", None
+    try:
+        # the result is in the queue before the child exits, the timeout only covers its
+        # feeder thread still flushing it
+        return q.get(timeout=1.0)
+    except queue.Empty:
+        return "error", None
+
+if __name__ == "__main__":
+    main()
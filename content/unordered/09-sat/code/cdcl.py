@@ -1,3 +1,32 @@
+import random
+import time
+
+from dpll import Timeout
+from instrument import NULL_PROFILER
+
+# Tunable knobs, see tune.py. The defaults reproduce the plain solver:
+# first unassigned variable, always True first, no restarts, keep every learned clause.
+DEFAULT_PARAMS = {
+    "branching": "order",   # order | vsids | random
+    "phase": "true",        # true | false | saved
+    "decay": 0.95,          # vsids activity decay per conflict
+    "restart_base": 0,      # conflicts per luby unit, 0 = never restart
+    "max_learned": 0,       # learned clauses kept before halving the db, 0 = unbounded
+    "seed": 0,
+}
+
+def luby(i):
+    """i-th element (1-based) of the Luby sequence 1 1 2 1 1 2 4 1 1 2 ..."""
+    k = 1
+    while (1 << k) - 1 < i:
+        k += 1
+    while i != (1 << k) - 1:
+        i -= (1 << (k - 1)) - 1
+        k = 1
+        while (1 << k) - 1 < i:
+            k += 1
+    return 1 << (k - 1)
+
 def literal_true(lit, assignment):
     v = abs(lit)
     if v not in assignment:
@@ -19,32 +48,119 @@ def clause_status(clause, assignment):
             last_undef = lit
     return False, num_undef, last_undef
 
-def solve(cnf):
-    clauses = [list(c) for c in cnf]  # we will append learned clauses
-    max_var = max(abs(l) for c in clauses for l in c)
+class Solver:
+    """
+    CDCL solver whose state (assignment, trail, learned clauses) lives on the
+    object, so clauses can be added between calls to solve() and everything
+    learned so far is kept.
+    """
+    def __init__(self, cnf, params=None, profiler=None):
+        self.params = dict(DEFAULT_PARAMS)
+        if params:
+            unknown = set(params) - set(DEFAULT_PARAMS)
+            if unknown:
+                raise ValueError(f"unknown solver params: {sorted(unknown)}")
+            self.params.update(params)
 
-    assignment = {}
-    level_of = {}        # var -> decision level
-    antecedent = {}  # var -> clause that implied it (None if decision)
-    trail = []                # ordered assigned signed literals
-    decision_level = 0
+        self.clauses = [list(c) for c in cnf]  # we will append learned clauses
+        self.learned = []  # the learned clauses among them
+        self.max_var = max((abs(l) for c in self.clauses for l in c), default=0)
 
-    def pick_branch_var():
-        for v in range(1, max_var+1):
-            if v not in assignment:
-                return v
-        return None
+        self.assignment = {}
+        self.level_of = {}        # var -> decision level
+        self.antecedent = {}  # var -> clause that implied it (None if decision)
+        self.trail = []                # ordered assigned signed literals
+        self.decision_level = 0
+
+        self.rng = random.Random(self.params["seed"])
+        self.activity = {}  # var -> vsids score
+        self.var_inc = 1.0
+        self.saved_phase = {}  # var -> last value it had before being unassigned
+
+        self.assumptions = []
+        self.core = None  # after an UNSAT answer: the assumptions that caused it
+
+        self.conflicts = 0
+        self.decisions = 0
+        self.restarts = 0
+        self.profiler = profiler or NULL_PROFILER  # see instrument.py
+
+        # checkpointing (see checkpoint.py): solve() hands snapshot() to on_checkpoint every
+        # checkpoint_interval seconds and whenever checkpoint_requested is set (e.g. by a
+        # signal handler); stop_requested makes it raise Timeout right after that
+        self.on_checkpoint = None
+        self.checkpoint_interval = None
+        self.checkpoint_requested = False
+        self.stop_requested = False
+
+    def add_clause(self, clause):
+        """
+        Adds a clause permanently. Backtracks to level 0 first so the clause is
+        seen by the next bcp() even if it is falsified by the current assignment.
+        """
+        clause = list(clause)
+        self.backtrack_to(0)
+        self.clauses.append(clause)
+        for lit in clause:
+            self.max_var = max(self.max_var, abs(lit))
+
+    def pick_branch_var(self):
+        branching = self.params["branching"]
+        if branching == "order":
+            for v in range(1, self.max_var+1):
+                if v not in self.assignment:
+                    return v
+            return None
+        free = [v for v in range(1, self.max_var+1) if v not in self.assignment]
+        if not free:
+            return None
+        if branching == "random":
+            return self.rng.choice(free)
+        if branching == "vsids":
+            act = self.activity
+            return max(free, key=lambda v: act.get(v, 0.0))
+        raise ValueError(f"unknown branching heuristic {branching!r}")
 
-    def bcp():
+    def pick_phase(self, v):
+        phase = self.params["phase"]
+        if phase == "saved":
+            return self.saved_phase.get(v, False)
+        return phase == "true"
+
+    def bump(self, clause):
+        act = self.activity
+        for lit in clause:
+            v = abs(lit)
+            act[v] = act.get(v, 0.0) + self.var_inc
+            if act[v] > 1e100:
+                # rescale everything before floats overflow
+                for u in act:
+                    act[u] *= 1e-100
+                self.var_inc *= 1e-100
+        self.var_inc /= self.params["decay"]
+
+    def reduce_db(self):
+        """
+        Drops the longer half of the learned clauses, except ones that are the reason
+        for a current assignment.
+        """
+        locked = {id(c) for c in self.antecedent.values() if c is not None}
+        by_len = sorted(self.learned, key=len)
+        drop = {id(c) for c in by_len[len(by_len)//2:] if id(c) not in locked}
+        self.learned = [c for c in self.learned if id(c) not in drop]
+        self.clauses = [c for c in self.clauses if id(c) not in drop]
+
+    def bcp(self):
         """
         Boolean constraint propagation.
         Returns None if no conflict, else returns conflicting clause (the clause that's falsified).
         New propagated variables get antecedent set to the clause they came from and level = decision_level.
         """
+        assignment = self.assignment
         changed = True
         while changed:
             changed = False
-            for clause in clauses:
+            for clause in self.clauses:
                 sat, num_undef, last_undef = clause_status(clause, assignment)
                 if sat:
                     continue
@@ -64,18 +180,20 @@ def solve(cnf):
                         continue
                     # propagate
                     assignment[v] = val
-                    level_of[v] = decision_level
-                    antecedent[v] = clause
-                    trail.append(lit if val else -v)
+                    self.level_of[v] = self.decision_level
+                    self.antecedent[v] = clause
+                    self.trail.append(lit if val else -v)
                     changed = True
         return None
 
-    def analyze(conflict_clause):
+    def analyze(self, conflict_clause):
         """
         Conflict analysis (First-UIP style). Return (learned_clause, backtrack_level).
         We'll implement the standard loop resolving with antecedents until learned clause has one literal
         from current decision level. The learned clause is returned as a list of ints.
         """
+        level_of = self.level_of
+        decision_level = self.decision_level
         learned = set(conflict_clause)
         # count literals in learned at current level
         def count_current(learned_set):
@@ -102,14 +220,14 @@ def solve(cnf):
                 break
             # find latest assigned variable on trail that appears in learned
             pivot_var = None
-            for lit in reversed(trail):
+            for lit in reversed(self.trail):
                 v = abs(lit)
                 if any(abs(l2) == v for l2 in learned):
                     pivot_var = v
                     break
             if pivot_var is None:
                 break  # shouldn't happen
-            ant = antecedent.get(pivot_var)
+            ant = self.antecedent.get(pivot_var)
             if ant is None:
                 # pivot was a decision literal; remove it from learned (no antecedent)
                 # this reduces the count of current-level literals
@@ -119,13 +237,6 @@ def solve(cnf):
 
         # Now compute backtrack level: maximum level among literals in learned except the one at current level
         learned_list = list(learned)
-        # find the literal that belongs to current level (asserting literal)
-        asserting = None
-        for lit in learned_list:
-            v = abs(lit)
-            if level_of.get(v, -1) == decision_level:
-                asserting = lit
-                break
         # compute backtrack level
         backtrack_level = 0
         for lit in learned_list:
@@ -137,53 +248,263 @@ def solve(cnf):
         # return learned clause (list) and backtrack level
         return list(learned), backtrack_level
 
-    def backtrack_to(level: int):
-        nonlocal decision_level
+    def backtrack_to(self, level: int):
         # unassign variables with level > level
+        trail = self.trail
         while trail:
             lit = trail[-1]
             v = abs(lit)
-            if level_of.get(v, 0) > level:
+            if self.level_of.get(v, 0) > level:
                 trail.pop()
-                if v in assignment:
-                    del assignment[v]
-                if v in level_of:
-                    del level_of[v]
-                if v in antecedent:
-                    del antecedent[v]
+                if v in self.assignment:
+                    self.saved_phase[v] = self.assignment[v]
+                    del self.assignment[v]
+                if v in self.level_of:
+                    del self.level_of[v]
+                if v in self.antecedent:
+                    del self.antecedent[v]
             else:
                 break
-        decision_level = level
-
-    # main CDCL loop
-    while True:
-        confl = bcp()
-        if confl is not None:
-            if decision_level == 0:
-                return None  # unsatisfiable
-            learned, bt_level = analyze(confl)
-            # add learned clause
-            clauses.append(learned)
-            # backjump
-            backtrack_to(bt_level)
-            # After backtracking, the learned clause should become unit and be propagated by bcp
-            # To ensure that, we don't explicitly force it; next loop iteration bcp() will do it.
-            continue
-
-        # check satisfied
-        if all(clause_status(c, assignment)[0] for c in clauses):
-            return assignment.copy()
-        # pick branching variable
-        v = pick_branch_var()
-        if v is None:
-            return assignment.copy()
+        self.decision_level = level
+
+    def decide(self, lit):
         # new decision level
-        decision_level += 1
-        # assign v = True (branch heuristic could be improved)
-        assignment[v] = True
-        level_of[v] = decision_level
-        antecedent[v] = None
-        trail.append(v)
+        self.decision_level += 1
+        v = abs(lit)
+        self.assignment[v] = lit > 0
+        self.level_of[v] = self.decision_level
+        self.antecedent[v] = None
+        self.trail.append(lit)
+
+    def analyze_final(self, lit):
+        """
+        lit is an assumption that is already false. Walks the implication graph back from
+        its negation and returns the assumptions it depends on (lit included).
+        """
+        core = [lit]
+        seen = {abs(lit)}
+        for t in reversed(self.trail):
+            v = abs(t)
+            if v not in seen or self.level_of[v] == 0:
+                continue
+            ant = self.antecedent[v]
+            if ant is None:
+                # every decision made so far is an assumption
+                core.append(t)
+            else:
+                for l in ant:
+                    seen.add(abs(l))
+        return core
+
+    def snapshot(self):
+        """
+        The search state worth keeping across runs on the same formula: learned clauses,
+        vsids activities, saved phases and level-0 units. None of it depends on the current
+        decisions, so it can be taken at any point of the search.
+        """
+        units = [lit for lit in self.trail if self.level_of.get(abs(lit), 0) == 0]
+        return {
+            "learned": [list(c) for c in self.learned],
+            "units": units,
+            "activity": {str(v): a for v, a in self.activity.items()},
+            "var_inc": self.var_inc,
+            "saved_phase": {str(v): p for v, p in self.saved_phase.items()},
+            "conflicts": self.conflicts,
+            "decisions": self.decisions,
+            "restarts": self.restarts,
+        }
+
+    def restore(self, snap):
+        """
+        Loads a snapshot() taken from a solver on the same formula. Units go in as
+        permanent clauses, learned clauses stay subject to reduce_db.
+        """
+        self.backtrack_to(0)
+        for lit in snap["units"]:
+            self.add_clause([lit])
+        for c in snap["learned"]:
+            c = list(c)
+            self.clauses.append(c)
+            self.learned.append(c)
+        self.activity = {int(v): a for v, a in snap["activity"].items()}
+        self.var_inc = snap["var_inc"]
+        self.saved_phase = {int(v): p for v, p in snap["saved_phase"].items()}
+        self.conflicts = snap["conflicts"]
+        self.decisions = snap["decisions"]
+        self.restarts = snap["restarts"]
+
+    def checkpoint(self):
+        self.checkpoint_requested = False
+        if self.on_checkpoint is not None:
+            self.on_checkpoint(self.snapshot())
+
+    def solve(self, deadline=None, assumptions=None):
+        """
+        Runs the CDCL loop from the current state.
+        Returns a copy of the (possibly partial) satisfying assignment, or None if unsatisfiable.
+        Raises Timeout once time.perf_counter() passes deadline; the state stays usable.
+        Also raises Timeout after a checkpoint if stop_requested is set.
+
+        assumptions: literals that must hold for this call only; they are decided first, one
+        per level. If the answer is None, self.core holds the subset of them that was needed
+        for the contradiction ([] if the clauses alone are UNSAT).
+        """
+        restart_base = self.params["restart_base"]
+        max_learned = self.params["max_learned"]
+        vsids = self.params["branching"] == "vsids"
+        prof = self.profiler
+        conflicts_since_restart = 0
+        interval = self.checkpoint_interval
+        next_checkpoint = time.perf_counter() + interval if interval else None
+
+        self.backtrack_to(0)
+        self.assumptions = list(assumptions or [])
+        self.core = None
+
+        # main CDCL loop
+        while True:
+            if deadline is not None and time.perf_counter() > deadline:
+                raise Timeout()
+            if next_checkpoint is not None and time.perf_counter() > next_checkpoint:
+                self.checkpoint_requested = True
+                next_checkpoint = time.perf_counter() + interval
+            if self.checkpoint_requested:
+                self.checkpoint()
+                if self.stop_requested:
+                    raise Timeout()
+            trail_before = len(self.trail)
+            with prof.phase("bcp"):
+                confl = self.bcp()
+            prof.count("propagations", len(self.trail) - trail_before)
+            if confl is not None:
+                self.conflicts += 1
+                prof.count("conflicts")
+                if self.decision_level == 0:
+                    self.core = []
+                    return None  # unsatisfiable
+                prof.sample("trail_depth", len(self.trail))
+                with prof.phase("analyze"):
+                    learned, bt_level = self.analyze(confl)
+                prof.sample("learned_len", len(learned))
+                # add learned clause
+                self.clauses.append(learned)
+                self.learned.append(learned)
+                if vsids:
+                    self.bump(learned)
+                # backjump
+                self.backtrack_to(bt_level)
+                # After backtracking, the learned clause should become unit and be propagated by bcp
+                # To ensure that, we don't explicitly force it; next loop iteration bcp() will do it.
+                conflicts_since_restart += 1
+                if restart_base and conflicts_since_restart >= restart_base * luby(self.restarts + 1):
+                    self.restarts += 1
+                    prof.count("restarts")
+                    conflicts_since_restart = 0
+                    self.backtrack_to(0)
+                if max_learned and len(self.learned) > max_learned:
+                    with prof.phase("reduce_db"):
+                        self.reduce_db()
+                continue
+
+            # assumptions go first, level i+1 belongs to assumptions[i]. All pending ones are
+            # decided before propagating (one bcp sweep instead of one per assumption); what
+            # they imply then just gets the last level, which only makes backjumps shorter.
+            decided = False
+            while self.decision_level < len(self.assumptions):
+                lit = self.assumptions[self.decision_level]
+                val = literal_true(lit, self.assignment)
+                if val is None:
+                    self.decide(lit)
+                    decided = True
+                    continue
+                if val is False:
+                    self.core = self.analyze_final(lit)
+                    return None
+                self.decision_level += 1  # already true, empty level keeps the numbering
+            if decided:
+                continue
+
+            # check satisfied
+            with prof.phase("sat_check"):
+                done = all(clause_status(c, self.assignment)[0] for c in self.clauses)
+            if done:
+                return self.assignment.copy()
+            # pick branching variable
+            with prof.phase("pick_branch_var"):
+                v = self.pick_branch_var()
+            if v is None:
+                return self.assignment.copy()
+            self.decisions += 1
+            prof.count("decisions")
+            self.decide(v if self.pick_phase(v) else -v)
+
+def solve(cnf, params=None, deadline=None, profiler=None):
+    return Solver(cnf, params, profiler).solve(deadline)
+
+def shrink_model(cnf, model, projection):
+    """
+    Greedily picks a subset of the projected literals of model that, together with the
+    model's values for the non-projected variables, still satisfies every clause.
+    Any projected variable left out can take either value, so the result is a cube.
+    """
+    cube = {}
+    for clause in cnf:
+        kept = None
+        for lit in clause:
+            v = abs(lit)
+            if model.get(v) != (lit > 0):
+                continue
+            if v not in projection or v in cube:
+                kept = lit
+                break
+            if kept is None:
+                kept = lit
+        if kept is None:
+            continue  # can't happen for a real model
+        v = abs(kept)
+        if v in projection and v not in cube:
+            cube[v] = kept > 0
+    return cube
+
+def iter_models(cnf, projection=None, limit=None, shrink=False):
+    """
+    Lazily yields the models of cnf, one dict var -> bool per model.
+
+    projection: variables to enumerate over (default: every variable of cnf). Two models
+                that agree on the projection are reported once.
+    limit:      stop after this many models.
+    shrink:     yield cubes instead of full models: a dict over a subset of the projection
+                whose missing variables may take any value. Fewer, larger blocks to enumerate.
+
+    One Solver is kept for the whole enumeration; after each model a blocking clause over
+    the projected literals is added, so learned clauses carry over to the next search.
+    """
+    if projection is None:
+        projection = sorted({abs(l) for c in cnf for l in c})
+    projection = list(projection)
+    proj_set = set(projection)
+
+    solver = Solver(cnf)
+    # original clauses plus blocking clauses; a cube has to keep satisfying the blocking
+    # clauses too, otherwise it could overlap an earlier cube and models would repeat
+    shrink_against = [list(c) for c in cnf] if shrink else None
+    found = 0
+    while limit is None or found < limit:
+        res = solver.solve()
+        if res is None:
+            return
+        # the solver stops once every clause is satisfied, unassigned variables are don't-cares
+        model = {v: res.get(v, False) for v in projection}
+        if shrink:
+            full = dict(res)
+            full.update(model)
+            model = shrink_model(shrink_against, full, proj_set)
+        found += 1
+        yield model
+        blocking = [-v if val else v for v, val in model.items()]
+        solver.add_clause(blocking)
+        if shrink:
+            shrink_against.append(blocking)
 
 # Example:
 # print(solve_cdcl([[1,2,-3],[-1,4],[-1,-2,-3,4,5]]))
@@ -0,0 +1,143 @@
+"""
+checkpoint.py
+
+Checkpoint and resume for the CDCL solvers.
+
+A checkpoint is a gzipped JSON file holding a cdcl.Solver.snapshot() (learned clauses,
+activities, saved phases, level-0 units) together with a hash of the formula it belongs
+to. solve() below restores a matching checkpoint before searching and writes a new one
+every `interval` seconds, when the deadline passes, and on SIGTERM, so a run that gets
+killed for taking too long can be picked up by the next, longer run instead of starting
+over. Once the formula is decided the checkpoint is deleted.
+
+    python checkpoint.py formula.cnf --checkpoint f.ckpt [--timeout 10] [--interval 5]
+    # again with a larger --timeout to continue where it stopped
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import signal
+import threading
+import time
+
+from dpll import Timeout
+
+CHECKPOINT_VERSION = 1
+
+def _solver_class(name):
+    if name == "cdcl":
+        from cdcl import Solver
+        return Solver
+    if name == "xor":
+        from xor import XorSolver
+        return XorSolver
+    raise ValueError(f"no checkpointing for solver {name!r}")
+
+SOLVERS = ("cdcl", "xor")
+
+def formula_hash(cnf):
+    h = hashlib.sha256()
+    for clause in cnf:
+        h.update(" ".join(map(str, clause)).encode())
+        h.update(b" 0\n")
+    return h.hexdigest()
+
+def save_checkpoint(path, snap, fhash, solver_name="cdcl", params=None):
+    data = {
+        "version": CHECKPOINT_VERSION,
+        "formula": fhash,
+        "solver": solver_name,
+        "params": params,
+        "saved_at": time.time(),
+        "state": snap,
+    }
+    tmp = path + ".tmp"
+    # written aside and renamed, so a kill in the middle leaves the previous checkpoint intact
+    with gzip.open(tmp, "wt") as f:
+        json.dump(data, f, separators=(",", ":"))
+    os.replace(tmp, path)
+
+def load_checkpoint(path, fhash):
+    """
+    Returns the stored snapshot, or None if there is no usable checkpoint for this formula.
+    """
+    if not os.path.exists(path):
+        return None
+    try:
+        with gzip.open(path, "rt") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != CHECKPOINT_VERSION or data.get("formula") != fhash:
+        return None
+    return data["state"]
+
+def solve(cnf, path, solver_name="cdcl", params=None, deadline=None, interval=None, on_signal=True, profiler=None):
+    """
+    Like cdcl.solve, resuming from and saving to the checkpoint at path.
+    Returns (result, info) with info = {"resumed": bool, "learned": n, "conflicts": n}.
+    Raises Timeout after saving a checkpoint when deadline passes or SIGTERM arrives.
+    """
+    fhash = formula_hash(cnf)
+    solver = _solver_class(solver_name)(cnf, params, profiler=profiler)
+    snap = load_checkpoint(path, fhash)
+    if snap is not None:
+        solver.restore(snap)
+    info = {"resumed": snap is not None}
+
+    solver.on_checkpoint = lambda s: save_checkpoint(path, s, fhash, solver_name, params)
+    solver.checkpoint_interval = interval
+
+    old_handler = None
+    if on_signal and threading.current_thread() is threading.main_thread():
+        def _handler(signum, frame):
+            solver.checkpoint_requested = True
+            solver.stop_requested = True
+        old_handler = signal.signal(signal.SIGTERM, _handler)
+
+    try:
+        try:
+            res = solver.solve(deadline)
+        except Timeout:
+            if not solver.stop_requested:
+                solver.checkpoint()  # deadline passed, save what we have
+            raise
+    finally:
+        if old_handler is not None:
+            signal.signal(signal.SIGTERM, old_handler)
+        info["learned"] = len(solver.learned)
+        info["conflicts"] = solver.conflicts
+
+    if os.path.exists(path):
+        os.remove(path)
+    return res, info
+
+def main():
+    from main import parse_dimacs
+
+    parser = argparse.ArgumentParser(description="Solve a DIMACS CNF with CDCL, resuming from a checkpoint.")
+    parser.add_argument("cnf", help="path to a .cnf file")
+    parser.add_argument("--checkpoint", "-c", default=None, help="checkpoint file (default: <cnf>.ckpt)")
+    parser.add_argument("--solver", "-s", default="cdcl", choices=SOLVERS)
+    parser.add_argument("--timeout", "-t", type=float, default=None, help="stop and save after this many seconds")
+    parser.add_argument("--interval", type=float, default=None, help="also save every this many seconds")
+    args = parser.parse_args()
+
+    cnf = parse_dimacs(args.cnf)
+    path = args.checkpoint or args.cnf + ".ckpt"
+    deadline = time.perf_counter() + args.timeout if args.timeout else None
+    start = time.perf_counter()
+    try:
+        res, info = solve(cnf, path, args.solver, deadline=deadline, interval=args.interval)
+    except Timeout:
+        print(f"TIMEOUT after {time.perf_counter() - start:.3f}s, checkpoint saved to {path}")
+        return
+    print("SATISFIABLE" if res is not None else "UNSATISFIABLE")
+    print(f"{time.perf_counter() - start:.3f}s, {info['conflicts']} conflicts in total"
+          + (", resumed from checkpoint" if info["resumed"] else ""))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+components.py
+
+Splits a CNF into independent parts: two clauses end up in the same part
+iff they are linked through a chain of shared variables. Parts share no
+variables, so each one can be solved (or counted) on its own and the results
+combined.
+
+    split_components(cnf) -> list of CNFs
+    solve_components(cnf, solve_fn) -> merged assignment or None
+"""
+
+def find(parent, v):
+    # path halving, keeps the trees flat without recursion
+    while parent[v] != v:
+        parent[v] = parent[parent[v]]
+        v = parent[v]
+    return v
+
+def union(parent, rank, a, b):
+    ra = find(parent, a)
+    rb = find(parent, b)
+    if ra == rb:
+        return ra
+    if rank[ra] < rank[rb]:
+        ra, rb = rb, ra
+    parent[rb] = ra
+    if rank[ra] == rank[rb]:
+        rank[ra] += 1
+    return ra
+
+def split_components(cnf):
+    """
+    Returns a list of CNFs, one per connected component, in order of first appearance.
+    Clause order inside a component is preserved. An empty clause becomes its own component.
+    """
+    parent = {}
+    rank = {}
+    for clause in cnf:
+        first = None
+        for lit in clause:
+            v = abs(lit)
+            if v not in parent:
+                parent[v] = v
+                rank[v] = 0
+            if first is None:
+                first = v
+            else:
+                union(parent, rank, first, v)
+
+    groups = {}  # root var -> clauses
+    order = []
+    empties = []
+    for clause in cnf:
+        if not clause:
+            empties.append(clause)
+            continue
+        root = find(parent, abs(clause[0]))
+        if root not in groups:
+            groups[root] = []
+            order.append(root)
+        groups[root].append(clause)
+    return [groups[r] for r in order] + [[c] for c in empties]
+
+def component_vars(cnf):
+    return {abs(l) for c in cnf for l in c}
+
+def solve_components(cnf, solve_fn=None):
+    """
+    Solves every component separately with solve_fn (default: cdcl.solve) and merges the models.
+    Returns the merged assignment dict, or None as soon as one component is UNSAT.
+    """
+    if solve_fn is None:
+        from cdcl import solve as solve_fn
+
+    assignment = {}
+    for comp in split_components(cnf):
+        if any(len(c) == 0 for c in comp):
+            return None
+        res = solve_fn(comp)
+        if not res:
+            return None
+        assignment.update(res)
+    return assignment
@@ -0,0 +1,188 @@
+"""
+count.py
+
+Exact model counter (#SAT) on top of the DPLL core.
+
+Each call unit-propagates with dpll.unit_propagate, splits what is left into
+independent components (components.split_components), counts every component
+separately and multiplies the results. Component counts are memoized in a
+bounded LRU cache keyed by the component's clause set, so a sub-formula that
+shows up again under a different partial assignment is not recounted.
+
+Counts are plain Python ints, so they never overflow.
+
+    python count.py formula.cnf [--cache-size N]
+"""
+
+import argparse
+import sys
+from collections import OrderedDict
+
+from components import split_components, component_vars
+from dpll import NullLog, unit_propagate
+
+_NULL_LOG = NullLog()
+
+class ComponentCache:
+    """
+    LRU map from a component (frozenset of sorted clause tuples) to its model count.
+    Holds at most max_entries components; the least recently used one is evicted first.
+    """
+    def __init__(self, max_entries=100000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        val = self.entries.get(key)
+        if val is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return val
+
+    def put(self, key, val):
+        if self.max_entries <= 0:
+            return
+        self.entries[key] = val
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+            self.evictions += 1
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {
+            "entries": len(self.entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hit_rate(),
+        }
+
+def normalize(cnf):
+    """
+    Dedupes literals, drops tautologies and sorts each clause so equal clauses compare equal.
+    """
+    out = []
+    for clause in cnf:
+        lits = set(clause)
+        if any(-l in lits for l in lits):
+            continue
+        out.append(tuple(sorted(lits, key=abs)))
+    return out
+
+def simplify(cnf, assignment):
+    """
+    Removes satisfied clauses and false literals.
+    Returns the reduced clause list, or None if some clause became empty.
+    """
+    out = []
+    for clause in cnf:
+        reduced = []
+        sat = False
+        for lit in clause:
+            v = abs(lit)
+            if v in assignment:
+                if assignment[v] == (lit > 0):
+                    sat = True
+                    break
+            else:
+                reduced.append(lit)
+        if sat:
+            continue
+        if not reduced:
+            return None
+        out.append(tuple(reduced))
+    return out
+
+def pick_branch_var(cnf):
+    # most occurrences first, that tends to split the component fastest
+    occ = {}
+    for clause in cnf:
+        for lit in clause:
+            v = abs(lit)
+            occ[v] = occ.get(v, 0) + 1
+    return max(occ, key=lambda v: (occ[v], -v))
+
+def _count(cnf, num_vars, cache):
+    """
+    Counts models of cnf over num_vars variables (all of cnf's variables plus free ones).
+    """
+    assignment = unit_propagate(cnf, {}, _NULL_LOG)
+    cnf = simplify(cnf, assignment)
+    if cnf is None:
+        return 0
+
+    free = num_vars - len(assignment) - len(component_vars(cnf))
+    result = 1 << free
+    for comp in split_components(cnf):
+        key = frozenset(comp)
+        cnt = cache.get(key)
+        if cnt is None:
+            comp_num_vars = len(component_vars(comp))
+            v = pick_branch_var(comp)
+            cnt = _count(comp + [(v,)], comp_num_vars, cache) + _count(comp + [(-v,)], comp_num_vars, cache)
+            cache.put(key, cnt)
+        result *= cnt
+        if result == 0:
+            return 0
+    return result
+
+def count(cnf, num_vars=None, cache=None):
+    """
+    Returns the exact number of satisfying assignments of cnf.
+
+    num_vars: number of variables to count over (e.g. from the 'p cnf' header);
+              defaults to the highest variable in cnf. Variables that appear in
+              no clause are free and double the count each.
+    cache:    a ComponentCache to reuse or inspect afterwards; a fresh one is used if None.
+    """
+    if cache is None:
+        cache = ComponentCache()
+    if any(len(c) == 0 for c in cnf):
+        return 0
+    max_var = max((abs(l) for c in cnf for l in c), default=0)
+    if num_vars is None:
+        num_vars = max_var
+    if num_vars < max_var:
+        raise ValueError(f"num_vars={num_vars} but cnf uses variable {max_var}")
+
+    clauses = normalize(cnf)
+    used = component_vars(clauses)
+    # variables that only appeared in tautologies, or nowhere at all, are free
+    return _count(clauses, len(used), cache) << (num_vars - len(used))
+
+def read_num_vars(path):
+    with open(path, "r") as f:
+        for raw in f:
+            line = raw.strip()
+            if line.startswith('p'):
+                return int(line.split()[2])
+    return None
+
+def main():
+    from main import parse_dimacs
+
+    parser = argparse.ArgumentParser(description="Count the models of a DIMACS CNF.")
+    parser.add_argument("cnf", help="path to a .cnf file")
+    parser.add_argument("--cache-size", type=int, default=100000, help="max number of cached components")
+    args = parser.parse_args()
+
+    cnf = parse_dimacs(args.cnf)
+    cache = ComponentCache(args.cache_size)
+    n = count(cnf, read_num_vars(args.cnf), cache)
+
+    print(n)
+    s = cache.stats()
+    print(f"cache: entries={s['entries']} hits={s['hits']} misses={s['misses']} "
+          f"evictions={s['evictions']} hit_rate={s['hit_rate']:.3f}", file=sys.stderr)
+
+if __name__ == "__main__":
+    main()
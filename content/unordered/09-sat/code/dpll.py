@@ -1,3 +1,23 @@
+import random
+import time
+
+from instrument import NULL_PROFILER
+
+# Tunable knobs, see tune.py. The defaults are the original behaviour.
+DEFAULT_PARAMS = {
+    "branching": "order",   # order | occurrence | random
+    "pure_literals": True,
+    "seed": 0,
+}
+
+class Timeout(Exception):
+    pass
+
+class NullLog:
+    # stands in for fd when the step log isn't wanted
+    def write(self, s):
+        pass
+
 def eval_clause(clause, assignment):
     any_undef = False
     for lit in clause:
@@ -72,22 +92,54 @@ def pure_literal_assign(cnf, assignment, fd):
             fd.write(f"Pure literal assign: {-v}\n")
     return assignment
 
-def solve(cnf, fd):
+def solve(cnf, fd, params=None, deadline=None, profiler=None):
+    prof = profiler or NULL_PROFILER  # see instrument.py
+
+    p = dict(DEFAULT_PARAMS)
+    if params:
+        unknown = set(params) - set(DEFAULT_PARAMS)
+        if unknown:
+            raise ValueError(f"unknown solver params: {sorted(unknown)}")
+        p.update(params)
+
     vars = sorted({abs(l) for c in cnf for l in c})
+    if p["branching"] == "occurrence":
+        occ = {}
+        for c in cnf:
+            for l in c:
+                occ[abs(l)] = occ.get(abs(l), 0) + 1
+        vars.sort(key=lambda v: -occ[v])
+    elif p["branching"] == "random":
+        random.Random(p["seed"]).shuffle(vars)
+    elif p["branching"] != "order":
+        raise ValueError(f"unknown branching heuristic {p['branching']!r}")
 
     def recurse(assignment):
-        assignment = unit_propagate(cnf, assignment.copy(), fd)
+        if deadline is not None and time.perf_counter() > deadline:
+            raise Timeout()
+
+        assigned_before = len(assignment)
+        with prof.phase("unit_propagate"):
+            assignment = unit_propagate(cnf, assignment.copy(), fd)
+        prof.count("propagations", len(assignment) - assigned_before)
 
-        assignment = pure_literal_assign(cnf, assignment.copy(), fd)
+        if p["pure_literals"]:
+            with prof.phase("pure_literals"):
+                assignment = pure_literal_assign(cnf, assignment.copy(), fd)
         
-        st = eval_cnf(cnf, assignment)
+        with prof.phase("sat_check"):
+            st = eval_cnf(cnf, assignment)
         if st is True:
             return assignment.copy()
         if st is False:
+            prof.count("conflicts")
+            prof.sample("trail_depth", len(assignment))
             return None
         
-        unassigned = next(v for v in vars if v not in assignment)
+        with prof.phase("pick_branch_var"):
+            unassigned = next(v for v in vars if v not in assignment)
         for val in (True, False):
+            prof.count("decisions")
 
             # record guess
             fd.write(f"Guess: {unassigned if val else -unassigned}\n")
@@ -0,0 +1,201 @@
+"""
+generate.py
+
+Seeded CNF instance generator, for benchmarks that vary size and structure.
+
+Families (n is the target number of variables):
+
+    random    uniform random k-SAT at a given clause/variable ratio   expected unknown
+    planted   random k-SAT restricted to clauses a hidden model satisfies   sat
+    php       pigeonhole, h+1 pigeons into h holes with h(h+1) ~ n        unsat
+    tseitin   Tseitin formula on a random connected graph with ~n edges,
+              degree <= 4, random charges                      sat iff total charge even
+    parity    n random 3-xors over n variables                decided by Gaussian elimination
+
+Every instance gets its own seed derived from (seed, family, n, index), so a single
+instance can be regenerated without the rest. Files are written in parallel as
+<family>_n<n>_<index>.cnf next to a correct_results.csv with the known answers, which
+run_benchmarks.py / catalog.py pick up via --gold.
+
+    python generate.py --families random,planted,php,tseitin,parity --sizes 20,50,100,200,500,1000 --count 5 --out benchmarks/generated
+"""
+
+import argparse
+import csv
+import math
+import multiprocessing as mp
+import os
+import random
+import sys
+
+from cardinality import CNFBuilder, DimacsWriter, pigeonhole
+from xor import xor_to_clauses, xor_to_row
+
+# -----------------------
+# Families; each returns (clauses, num_vars, expected)
+# -----------------------
+def random_ksat(n, rng, k=3, ratio=4.26):
+    m = round(n * ratio)
+    cnf = []
+    for _ in range(m):
+        vs = rng.sample(range(1, n + 1), k)
+        cnf.append([v if rng.random() < 0.5 else -v for v in vs])
+    return cnf, n, "unknown"
+
+def planted_ksat(n, rng, k=3, ratio=4.26):
+    model = [None] + [rng.random() < 0.5 for _ in range(n)]
+    m = round(n * ratio)
+    cnf = []
+    while len(cnf) < m:
+        vs = rng.sample(range(1, n + 1), k)
+        clause = [v if rng.random() < 0.5 else -v for v in vs]
+        # rejection: only 1 in 2^k clauses is falsified by the hidden model
+        if any(model[abs(l)] == (l > 0) for l in clause):
+            cnf.append(clause)
+    return cnf, n, "sat"
+
+def php(n, rng):
+    holes = max(2, int((math.sqrt(4 * n + 1) - 1) / 2))
+    b = CNFBuilder(amo="pairwise")
+    pigeonhole(holes + 1, holes, b)
+    return b.clauses, b.pool.top, "unsat"
+
+def random_graph(num_nodes, num_edges, rng, max_degree=4):
+    """
+    Connected simple graph: a random spanning tree plus random extra edges between
+    nodes below max_degree, until num_edges or no pair is left to try.
+    """
+    nodes = list(range(num_nodes))
+    rng.shuffle(nodes)
+    degree = [0] * num_nodes
+    edges = set()
+    for i in range(1, num_nodes):
+        # attach to a random earlier node that still has room (a path node always has)
+        cands = [u for u in nodes[:i] if degree[u] < max_degree] or [nodes[i - 1]]
+        a, b = nodes[i], rng.choice(cands)
+        edges.add((min(a, b), max(a, b)))
+        degree[a] += 1
+        degree[b] += 1
+    tries = 0
+    while len(edges) < num_edges and tries < 20 * num_edges:
+        tries += 1
+        a, b = rng.randrange(num_nodes), rng.randrange(num_nodes)
+        e = (min(a, b), max(a, b))
+        if a == b or e in edges or degree[a] >= max_degree or degree[b] >= max_degree:
+            continue
+        edges.add(e)
+        degree[a] += 1
+        degree[b] += 1
+    return sorted(edges)
+
+def tseitin(n, rng):
+    num_nodes = max(4, round(2 * n / 3))  # average degree 3
+    edges = random_graph(num_nodes, n, rng)
+    incident = {i: [] for i in range(num_nodes)}
+    for e, (a, b) in enumerate(edges, start=1):
+        incident[a].append(e)
+        incident[b].append(e)
+    charges = [rng.randrange(2) for _ in range(num_nodes)]
+    cnf = []
+    for node in range(num_nodes):
+        cnf += xor_to_clauses(incident[node], charges[node])
+    # on a connected graph the edges can absorb any even total charge
+    return cnf, len(edges), "unsat" if sum(charges) & 1 else "sat"
+
+def gf2_consistent(rows):
+    """rows are xor.xor_to_row ints (bit 0 = rhs); True iff the system has a solution."""
+    pivots = {}  # pivot bit -> row
+    for row in rows:
+        while row & ~1:
+            top = 1 << (row.bit_length() - 1)
+            if top not in pivots:
+                pivots[top] = row
+                break
+            row ^= pivots[top]
+        else:
+            if row & 1:
+                return False  # 0 = 1
+    return True
+
+def parity(n, rng, width=3):
+    xors = []
+    for _ in range(n):
+        xors.append((sorted(rng.sample(range(1, n + 1), width)), rng.randrange(2)))
+    cnf = []
+    for vs, rhs in xors:
+        cnf += xor_to_clauses(vs, rhs)
+    expected = "sat" if gf2_consistent([xor_to_row(vs, rhs) for vs, rhs in xors]) else "unsat"
+    return cnf, n, expected
+
+FAMILIES = {
+    "random": random_ksat,
+    "planted": planted_ksat,
+    "php": php,
+    "tseitin": tseitin,
+    "parity": parity,
+}
+
+def instance_seed(seed, family, n, index):
+    # str seeds go through sha512, stable across runs and processes (unlike hash())
+    return f"{seed}:{family}:{n}:{index}"
+
+def instance_name(family, n, index):
+    return f"{family}_n{n}_{index}.cnf"
+
+def generate(family, n, index, seed=0, k=3, ratio=4.26):
+    rng = random.Random(instance_seed(seed, family, n, index))
+    if family in ("random", "planted"):
+        return FAMILIES[family](n, rng, k, ratio)
+    return FAMILIES[family](n, rng)
+
+def _generate_one(task):
+    family, n, index, seed, k, ratio, out = task
+    cnf, num_vars, expected = generate(family, n, index, seed, k, ratio)
+    name = instance_name(family, n, index)
+    w = DimacsWriter(os.path.join(out, name))
+    for clause in cnf:
+        w.write(clause)
+    w.close(num_vars)
+    return name, expected, num_vars, len(cnf)
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate seeded random and structured CNF benchmark families.")
+    parser.add_argument("--families", default=",".join(FAMILIES), help="comma separated, from: " + ", ".join(FAMILIES))
+    parser.add_argument("--sizes", default="20,50,100,200,500,1000", help="comma separated target variable counts")
+    parser.add_argument("--count", type=int, default=5, help="instances per family and size")
+    parser.add_argument("--k", type=int, default=3, help="clause length for random/planted")
+    parser.add_argument("--ratio", type=float, default=4.26, help="clause/variable ratio for random/planted")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", "-o", default=os.path.join("benchmarks", "generated"))
+    parser.add_argument("--workers", "-j", type=int, default=None, help="worker processes (default: cpu count)")
+    args = parser.parse_args()
+
+    families = [f.strip() for f in args.families.split(",") if f.strip()]
+    unknown = [f for f in families if f not in FAMILIES]
+    if unknown:
+        print(f"unknown families: {', '.join(unknown)}", file=sys.stderr)
+        sys.exit(1)
+    sizes = [int(s) for s in args.sizes.split(",")]
+    os.makedirs(args.out, exist_ok=True)
+
+    tasks = [(f, n, i, args.seed, args.k, args.ratio, args.out)
+             for f in families for n in sizes for i in range(args.count)]
+    with mp.Pool(args.workers) as pool:
+        results = sorted(pool.imap_unordered(_generate_one, tasks))
+
+    # only the known answers go in, like the hand-made correct_results.csv
+    gold = os.path.join(args.out, "correct_results.csv")
+    with open(gold, "w", newline="") as f:
+        w = csv.writer(f)
+        for name, expected, _, _ in results:
+            if expected != "unknown":
+                w.writerow([name, expected])
+
+    counts = {}
+    for _, expected, _, _ in results:
+        counts[expected] = counts.get(expected, 0) + 1
+    print(f"wrote {len(results)} instances to {args.out} ({', '.join(f'{k}={v}' for k, v in sorted(counts.items()))})")
+    print(f"ground truth in {gold}")
+
+if __name__ == "__main__":
+    main()
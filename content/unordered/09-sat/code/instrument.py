@@ -0,0 +1,176 @@
+"""
+instrument.py
+
+Phase timers and counters for the solvers.
+
+Solvers take a profiler and wrap their phases in it:
+
+    with prof.phase("bcp"):
+        confl = self.bcp()
+    prof.count("propagations", n)
+    prof.sample("learned_len", len(learned))
+
+NULL_PROFILER (the default) does nothing, so an uninstrumented run pays for a method
+call per phase and nothing else. Profiler times only every sample_every-th call of a
+phase and scales up, and keeps every sample_every-th value of a sample; counters are
+exact. report() turns all of it into per-phase estimated seconds and share of the
+wall time, counters with per-second rates, and sample means/maxima.
+
+run_captured() additionally runs a function under cProfile and/or tracemalloc.
+"""
+
+import time
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NULL_TIMER = _NullTimer()
+
+class NullProfiler:
+    enabled = False
+
+    def phase(self, name):
+        return _NULL_TIMER
+
+    def count(self, name, n=1):
+        pass
+
+    def sample(self, name, value):
+        pass
+
+    def report(self):
+        return {}
+
+NULL_PROFILER = NullProfiler()
+
+class _Timer:
+    __slots__ = ("prof", "name", "start")
+
+    def __init__(self, prof, name):
+        self.prof = prof
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        prof = self.prof
+        prof.sampled_time[self.name] = prof.sampled_time.get(self.name, 0.0) + time.perf_counter() - self.start
+        prof.sampled_calls[self.name] = prof.sampled_calls.get(self.name, 0) + 1
+        return False
+
+class Profiler:
+    enabled = True
+
+    def __init__(self, sample_every=16):
+        self.sample_every = max(1, sample_every)
+        self.calls = {}          # phase -> calls
+        self.sampled_calls = {}  # phase -> timed calls
+        self.sampled_time = {}   # phase -> seconds in the timed calls
+        self.counters = {}
+        self.samples = {}        # name -> [seen, kept, total, max]
+        self.start = time.perf_counter()
+        self.stop_time = None
+
+    def phase(self, name):
+        c = self.calls.get(name, 0)
+        self.calls[name] = c + 1
+        if c % self.sample_every:
+            return _NULL_TIMER
+        return _Timer(self, name)
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def sample(self, name, value):
+        s = self.samples.get(name)
+        if s is None:
+            s = self.samples[name] = [0, 0, 0, value]
+        if s[0] % self.sample_every == 0:
+            s[1] += 1
+            s[2] += value
+            if value > s[3]:
+                s[3] = value
+        s[0] += 1
+
+    def stop(self):
+        self.stop_time = time.perf_counter()
+
+    def report(self):
+        wall = (self.stop_time or time.perf_counter()) - self.start
+        phases = {}
+        for name, calls in self.calls.items():
+            timed = self.sampled_calls.get(name, 0)
+            est = self.sampled_time.get(name, 0.0) * calls / timed if timed else 0.0
+            phases[name] = {
+                "calls": calls,
+                "timed_calls": timed,
+                "est_seconds": est,
+                "share": est / wall if wall > 0 else 0.0,
+            }
+        return {
+            "wall_seconds": wall,
+            "sample_every": self.sample_every,
+            "phases": phases,
+            "counters": dict(self.counters),
+            "rates": {f"{k}_per_sec": v / wall for k, v in self.counters.items()} if wall > 0 else {},
+            "samples": {k: {"mean": s[2] / s[1], "max": s[3], "seen": s[0]}
+                        for k, s in self.samples.items() if s[1]},
+        }
+
+def format_report(report):
+    """A few readable lines from Profiler.report()."""
+    if not report:
+        return "profiling disabled"
+    lines = [f"wall {report['wall_seconds']:.4f}s (1 in {report['sample_every']} phase calls timed)"]
+    for name, p in sorted(report["phases"].items(), key=lambda kv: -kv[1]["est_seconds"]):
+        lines.append(f"  {name:<16} {p['est_seconds']:>10.4f}s {100 * p['share']:>6.1f}%  {p['calls']} calls")
+    for name, v in sorted(report["counters"].items()):
+        rate = report["rates"].get(f"{name}_per_sec", 0.0)
+        lines.append(f"  {name:<16} {v:>10} ({rate:.1f}/s)")
+    for name, s in sorted(report["samples"].items()):
+        lines.append(f"  {name:<16} mean {s['mean']:.2f} max {s['max']}")
+    return "\n".join(lines)
+
+def run_captured(fn, cprofile_path=None, trace_memory=False, top=10):
+    """
+    Calls fn() under cProfile (stats dumped to cprofile_path) and/or tracemalloc.
+    Returns (result, extras); extras["tracemalloc"] has the peak and the top allocation sites.
+    """
+    extras = {}
+    pr = None
+    if trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+    if cprofile_path:
+        import cProfile
+        pr = cProfile.Profile()
+        pr.enable()
+    try:
+        result = fn()
+    finally:
+        if pr is not None:
+            pr.disable()
+        if trace_memory:
+            snap = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+                tracemalloc.Filter(False, "*/cProfile.py"),
+                tracemalloc.Filter(False, "*/profile.py"),
+            ])
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            extras["tracemalloc"] = {
+                "peak_bytes": peak,
+                "top": [str(stat) for stat in snap.statistics("lineno")[:top]],
+            }
+        if pr is not None:
+            pr.dump_stats(cprofile_path)
+            extras["cprofile"] = cprofile_path
+    return result, extras
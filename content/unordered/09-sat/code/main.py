@@ -29,15 +29,34 @@ def parse_dimacs(path: str):
 
 
 def main():
-    input_path = sys.argv[1]
-    output_path = sys.argv[2]
+    import argparse
+    from instrument import Profiler, format_report, run_captured
 
-    cnf = parse_dimacs(input_path)
+    parser = argparse.ArgumentParser(description="Solve a DIMACS CNF with DPLL, logging every step to output.")
+    parser.add_argument("input", help="path to a .cnf file")
+    parser.add_argument("output", help="file for the step log")
+    parser.add_argument("--profile", action="store_true", help="print per-phase times and counters to stderr")
+    parser.add_argument("--cprofile", default=None, help="also dump cProfile stats to this file")
+    parser.add_argument("--tracemalloc", action="store_true", help="also report peak memory and the top allocation sites")
+    args = parser.parse_args()
 
-    with open(output_path, "w") as fd:
-        result = solve(cnf, fd)
+    cnf = parse_dimacs(args.input)
+
+    prof = Profiler() if args.profile else None
+    with open(args.output, "w") as fd:
+        result, extras = run_captured(lambda: solve(cnf, fd, profiler=prof),
+                                      cprofile_path=args.cprofile, trace_memory=args.tracemalloc)
 
     print("SATISFIABLE" if result else "UNSATISFIABLE")
+    if prof is not None:
+        prof.stop()
+        print(format_report(prof.report()), file=sys.stderr)
+    if "tracemalloc" in extras:
+        print(f"peak memory {extras['tracemalloc']['peak_bytes']} bytes", file=sys.stderr)
+        for line in extras["tracemalloc"]["top"]:
+            print(f"  {line}", file=sys.stderr)
+    if "cprofile" in extras:
+        print(f"cProfile stats in {extras['cprofile']}", file=sys.stderr)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
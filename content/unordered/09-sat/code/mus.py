@@ -0,0 +1,165 @@
+"""
+mus.py
+
+Unsatisfiable cores and minimal unsatisfiable subsets (MUS).
+
+Every clause i gets a selector variable s_i and is given to the solver as
+(clause_i v -s_i). Solving under the assumptions s_i for a subset of clauses checks
+that subset; when it is UNSAT, cdcl.Solver.analyze_final reports which selectors the
+contradiction actually used, which is an unsatisfiable core.
+
+A single Solver serves every check, so learned clauses (which mention the selectors
+they depend on) stay valid and are reused across the many calls a minimization makes.
+
+    unsat_core(cnf)             -> clause indices of a core, or None if SAT
+    mus_deletion(cnf)           -> a MUS, one check per core clause
+    mus_quickxplain(cnf)        -> a MUS, divide and conquer (fewer checks on small MUSes)
+
+    python mus.py formula.cnf [--method deletion|quickxplain]
+"""
+
+import argparse
+import time
+
+from cdcl import Solver
+
+class CoreSolver:
+    def __init__(self, cnf, params=None):
+        self.cnf = [list(c) for c in cnf]
+        max_var = max((abs(l) for c in self.cnf for l in c), default=0)
+        self.selector = [max_var + 1 + i for i in range(len(self.cnf))]
+        self.solver = Solver([c + [-s] for c, s in zip(self.cnf, self.selector)], params)
+        self.index_of = {s: i for i, s in enumerate(self.selector)}
+        self.calls = 0
+
+    def check(self, idxs, deadline=None):
+        """
+        Is the subset idxs of the clauses satisfiable?
+        Returns (True, model) or (False, core) with core a sorted list of clause indices.
+        """
+        self.calls += 1
+        res = self.solver.solve(deadline, [self.selector[i] for i in idxs])
+        if res is not None:
+            return True, res
+        return False, sorted(self.index_of[l] for l in self.solver.core)
+
+    def drop(self, i):
+        # clause i is out for good, every later check is on a subset without it
+        self.solver.add_clause([-self.selector[i]])
+
+    def keep(self, i):
+        # clause i is in every MUS of the remaining subsets
+        self.solver.add_clause([self.selector[i]])
+
+def unsat_core(cnf, cs=None, deadline=None):
+    cs = cs or CoreSolver(cnf)
+    sat, core = cs.check(range(len(cs.cnf)), deadline)
+    return None if sat else core
+
+def mus_deletion(cnf, core=None, cs=None, deadline=None):
+    """
+    Deletion-based: try to drop each clause of the core in turn. If the rest is still UNSAT,
+    continue from the (possibly much smaller) core of that check; otherwise the clause is needed.
+    """
+    cs = cs or CoreSolver(cnf)
+    if core is None:
+        core = unsat_core(cnf, cs, deadline)
+        if core is None:
+            return None
+    current = set(core)
+    needed = set()
+    for i in sorted(core):
+        if i not in current or i in needed:
+            continue
+        sat, sub = cs.check(sorted(current - {i}), deadline)
+        if sat:
+            needed.add(i)
+            cs.keep(i)
+        else:
+            # kept clauses are fixed at level 0, so the core may leave them out
+            sub = set(sub) | needed
+            for j in current - sub:
+                cs.drop(j)
+            current = sub
+    return sorted(current)
+
+def mus_quickxplain(cnf, core=None, cs=None, deadline=None):
+    """
+    Junker's QuickXplain: split the candidates in halves and recurse, skipping any half whose
+    absence leaves the background already UNSAT.
+    """
+    cs = cs or CoreSolver(cnf)
+    if core is None:
+        core = unsat_core(cnf, cs, deadline)
+        if core is None:
+            return None
+
+    def unsat(idxs):
+        return not cs.check(idxs, deadline)[0]
+
+    def qx(background, has_delta, candidates):
+        if has_delta and unsat(background):
+            return []
+        if len(candidates) == 1:
+            return candidates
+        half = len(candidates) // 2
+        c1, c2 = candidates[:half], candidates[half:]
+        d2 = qx(background + c1, bool(c1), c2)
+        d1 = qx(background + d2, bool(d2), c1)
+        return d1 + d2
+
+    if not core:
+        return []
+    return sorted(qx([], False, sorted(core)))
+
+METHODS = {
+    "deletion": mus_deletion,
+    "quickxplain": mus_quickxplain,
+}
+
+def explain(cnf, method="deletion", deadline=None):
+    """
+    Returns None if cnf is SAT, else a dict with the core, the MUS, their sizes,
+    the number of solver calls and the time spent on each stage.
+    """
+    cs = CoreSolver(cnf)
+    start = time.perf_counter()
+    core = unsat_core(cnf, cs, deadline)
+    core_time = time.perf_counter() - start
+    if core is None:
+        return None
+    calls = cs.calls
+    start = time.perf_counter()
+    m = METHODS[method](cnf, core, cs, deadline)
+    return {
+        "core": core,
+        "core_size": len(core),
+        "core_time": core_time,
+        "mus": m,
+        "mus_size": len(m),
+        "mus_time": time.perf_counter() - start,
+        "mus_calls": cs.calls - calls,
+    }
+
+def main():
+    from main import parse_dimacs
+
+    parser = argparse.ArgumentParser(description="Extract an unsat core and a MUS from a DIMACS CNF.")
+    parser.add_argument("cnf", help="path to a .cnf file")
+    parser.add_argument("--method", "-m", default="deletion", choices=sorted(METHODS))
+    parser.add_argument("--print", action="store_true", help="print the MUS clauses")
+    args = parser.parse_args()
+
+    cnf = parse_dimacs(args.cnf)
+    info = explain(cnf, args.method)
+    if info is None:
+        print("SATISFIABLE")
+        return
+    print(f"UNSATISFIABLE: {len(cnf)} clauses, core {info['core_size']} ({info['core_time']:.3f}s), "
+          f"MUS {info['mus_size']} ({info['mus_time']:.3f}s, {info['mus_calls']} calls)")
+    if args.print:
+        for i in info["mus"]:
+            print(" ".join(map(str, cnf[i])) + " 0")
+
+if __name__ == "__main__":
+    main()
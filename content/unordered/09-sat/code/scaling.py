@@ -0,0 +1,130 @@
+"""
+scaling.py
+
+Scaling curves: runs each solver on instances written by generate.py and reports,
+per family and size n, how many instances were solved and the median time, one
+column per solver. Sizes run in increasing order and a solver stops on a family
+once it solves none of the instances of one size, since larger ones will only take
+longer. Wrong answers (against correct_results.csv) are counted separately.
+
+    python generate.py --out benchmarks/generated
+    python scaling.py -b benchmarks/generated --solvers cdcl,dpll,xor --timeout 10 --csv scaling.csv
+"""
+
+import argparse
+import csv
+import glob
+import multiprocessing as mp
+import os
+import re
+import statistics
+import sys
+from collections import namedtuple
+
+from tune import default_params, run_one
+
+NAME_RE = re.compile(r"^(?P<family>[a-z]+)_n(?P<n>\d+)_(?P<index>\d+)\.cnf$")
+
+Run = namedtuple("Run", "family solver params path timeout")
+
+def _run(run):
+    return run_one(run.solver, run.params, run.path, run.timeout)
+
+def group_instances(folder):
+    """{family: {n: [path, ...]}} for the generate.py files in folder."""
+    groups = {}
+    for path in sorted(glob.glob(os.path.join(folder, "*.cnf"))):
+        m = NAME_RE.match(os.path.basename(path))
+        if m:
+            groups.setdefault(m["family"], {}).setdefault(int(m["n"]), []).append(path)
+    return groups
+
+def run_scaling(groups, solvers, gold, timeout, workers=None, log=print):
+    """
+    Returns rows {family, n, solver, instances, solved, wrong, median, par2}; median is None
+    if nothing was solved.
+    """
+    rows = []
+    alive = {(f, s) for f in groups for s in solvers}
+    sizes = sorted({n for by_n in groups.values() for n in by_n})
+    with mp.Pool(workers) as pool:
+        for n in sizes:
+            tasks = [Run(f, s, default_params(s), path, timeout)
+                     for f, by_n in sorted(groups.items()) if n in by_n
+                     for s in solvers if (f, s) in alive
+                     for path in by_n[n]]
+            if not tasks:
+                continue
+            results = {}  # (family, solver) -> [(status, elapsed, expected)]
+            for run, (status, elapsed) in zip(tasks, pool.imap(_run, tasks)):
+                expected = gold.get(os.path.basename(run.path), "unknown")
+                results.setdefault((run.family, run.solver), []).append((status, elapsed, expected))
+            for (f, s), runs in sorted(results.items()):
+                ok = [e for st, e, exp in runs if st in ("sat", "unsat") and exp in (st, "unknown")]
+                wrong = sum(1 for st, _, exp in runs if st in ("sat", "unsat") and exp not in (st, "unknown"))
+                par2 = sum(e if st in ("sat", "unsat") else 2 * timeout for st, e, _ in runs) / len(runs)
+                rows.append({
+                    "family": f, "n": n, "solver": s, "instances": len(runs), "solved": len(ok),
+                    "wrong": wrong, "median": statistics.median(ok) if ok else None, "par2": par2,
+                })
+                if not ok:
+                    alive.discard((f, s))
+                    log(f"{s} solved no {f} instance at n={n}, skipping larger sizes")
+    return rows
+
+def format_report(rows, solvers):
+    lines = []
+    for family in sorted({r["family"] for r in rows}):
+        lines.append(f"{family}")
+        lines.append(f"{'n':>7} " + " ".join(f"{s:>20}" for s in solvers))
+        by_n = {}
+        for r in rows:
+            if r["family"] == family:
+                by_n.setdefault(r["n"], {})[r["solver"]] = r
+        for n in sorted(by_n):
+            cells = []
+            for s in solvers:
+                r = by_n[n].get(s)
+                if r is None:
+                    cells.append(f"{'-':>20}")
+                    continue
+                t = f"{r['median']:.4f}s" if r["median"] is not None else "timeout"
+                cell = f"{r['solved']}/{r['instances']} {t}" + (f" !{r['wrong']}" if r["wrong"] else "")
+                cells.append(f"{cell:>20}")
+            lines.append(f"{n:>7} " + " ".join(cells))
+        lines.append("")
+    return "\n".join(lines)
+
+def main():
+    from benchmarks.run_benchmarks import load_gold_map
+
+    parser = argparse.ArgumentParser(description="Time the solvers against instance size for each generated family.")
+    parser.add_argument("--benchmarks", "-b", default=os.path.join("benchmarks", "generated"), help="folder written by generate.py")
+    parser.add_argument("--gold", "-g", default=None, help="ground-truth CSV (default: <benchmarks>/correct_results.csv)")
+    parser.add_argument("--solvers", default="cdcl,dpll,xor", help="comma separated, from: cdcl, dpll, xor")
+    parser.add_argument("--timeout", "-t", type=float, default=10.0, help="timeout seconds per run")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="worker processes (default: cpu count)")
+    parser.add_argument("--csv", default=None, help="also write the rows to this CSV")
+    args = parser.parse_args()
+
+    groups = group_instances(args.benchmarks)
+    if not groups:
+        print(f"No generated .cnf files found in {args.benchmarks}", file=sys.stderr)
+        sys.exit(1)
+    solvers = [s.strip() for s in args.solvers.split(",") if s.strip()]
+    gold = load_gold_map(args.gold or os.path.join(args.benchmarks, "correct_results.csv"))
+
+    rows = run_scaling(groups, solvers, gold, args.timeout, args.workers)
+    print()
+    print("solved/instances median time per solver ('!k': k wrong answers)")
+    print(format_report(rows, solvers))
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            w = csv.DictWriter(f, fieldnames=["family", "n", "solver", "instances", "solved", "wrong", "median", "par2"])
+            w.writeheader()
+            w.writerows(rows)
+        print(f"wrote {args.csv}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+"""
+tune.py
+
+Parameter tuning for the solvers over the benchmark formulas.
+
+Each solver declares its knobs in SEARCH_SPACE. Configurations are sampled from it
+(the defaults always take part) and raced with successive halving: every round all
+surviving configurations run on the first `budget` instances in parallel worker
+processes, are scored by PAR-2 (runtime if solved correctly, 2 x timeout if not
+solved, 10 x timeout for a wrong answer), and only the best 1/eta go on to a round
+with eta times as many instances. Results are cached per (config, instance), so a
+survivor only runs the instances it hasn't seen yet.
+
+The winner is written as a profile (JSON); run_benchmarks.py takes it via --params,
+code can read it with load_profile() and pass it as solve(cnf, params).
+
+    python tune.py --solver cdcl --configs 27 --eta 3 --timeout 5 --workers 8
+"""
+
+import argparse
+import glob
+import json
+import math
+import multiprocessing as mp
+import os
+import random
+import sys
+import time
+
+SEARCH_SPACE = {
+    "cdcl": {
+        "branching": ["order", "vsids", "random"],
+        "phase": ["true", "false", "saved"],
+        "decay": [0.8, 0.9, 0.95, 0.99],
+        "restart_base": [0, 16, 64, 256],
+        "max_learned": [0, 100, 500, 2000],
+        "seed": [0, 1, 2, 3],
+    },
+    "dpll": {
+        "branching": ["order", "occurrence", "random"],
+        "pure_literals": [True, False],
+        "seed": [0, 1, 2, 3],
+    },
+}
+SEARCH_SPACE["xor"] = SEARCH_SPACE["cdcl"]
+
+WRONG_PENALTY = 10
+
+def _solve_fn(solver):
+    if solver == "dpll":
+        from dpll import NullLog, solve
+        return lambda cnf, params, deadline: solve(cnf, NullLog(), params, deadline)
+    if solver == "cdcl":
+        from cdcl import solve
+        return solve
+    if solver == "xor":
+        from xor import solve
+        return solve
+    raise ValueError(f"no search space for solver {solver!r}")
+
+def default_params(solver):
+    if solver == "dpll":
+        from dpll import DEFAULT_PARAMS
+    else:
+        from cdcl import DEFAULT_PARAMS
+    return dict(DEFAULT_PARAMS)
+
+def sample_configs(solver, n, seed):
+    """The default config plus n-1 distinct random points of the search space."""
+    space = SEARCH_SPACE[solver]
+    rng = random.Random(seed)
+    configs = [default_params(solver)]
+    seen = {json.dumps(configs[0], sort_keys=True)}
+    total = math.prod(len(vals) for vals in space.values())
+    while len(configs) < min(n, total):
+        cfg = {k: rng.choice(vals) for k, vals in space.items()}
+        key = json.dumps(cfg, sort_keys=True)
+        if key not in seen:
+            seen.add(key)
+            configs.append(cfg)
+    return configs
+
+# -----------------------
+# Worker side
+# -----------------------
+_parsed = {}  # per worker process: path -> cnf
+
+def run_one(solver, params, path, timeout):
+    """
+    Solves the formula at path once with params, in this process. Returns (status, seconds),
+    status one of "sat", "unsat", "timeout", "error: ...". Parsed formulas are cached per
+    process, so pool workers parse each file once.
+    """
+    from dpll import Timeout
+    from main import parse_dimacs
+
+    cnf = _parsed.get(path)
+    if cnf is None:
+        cnf = _parsed[path] = parse_dimacs(path)
+    solve = _solve_fn(solver)
+    start = time.perf_counter()
+    try:
+        res = solve(cnf, params, start + timeout)
+        status = "sat" if res is not None else "unsat"
+    except Timeout:
+        status = "timeout"
+    except Exception as e:
+        status = f"error: {e}"
+    return status, time.perf_counter() - start
+
+def _run_task(task):
+    solver, cfg_id, params, path, timeout = task
+    return (cfg_id, path) + run_one(solver, params, path, timeout)
+
+def par2(status, elapsed, expected, timeout):
+    if status in ("sat", "unsat"):
+        if expected in ("sat", "unsat") and status != expected:
+            return WRONG_PENALTY * timeout
+        return elapsed
+    return 2 * timeout
+
+# -----------------------
+# Successive halving
+# -----------------------
+def successive_halving(solver, configs, files, gold, timeout, eta=3, min_instances=4, workers=None, log=print):
+    """
+    Returns [(score, cfg_id)] for the final round, best first, and the per-config result cache.
+    """
+    results = {i: {} for i in range(len(configs))}  # cfg_id -> path -> (status, elapsed)
+    alive = list(range(len(configs)))
+    budget = min(min_instances, len(files))
+
+    with mp.Pool(workers) as pool:
+        while True:
+            subset = files[:budget]
+            tasks = [(solver, i, configs[i], fp, timeout)
+                     for i in alive for fp in subset if fp not in results[i]]
+            for cfg_id, fp, status, elapsed in pool.imap_unordered(_run_task, tasks):
+                results[cfg_id][fp] = (status, elapsed)
+
+            scored = []
+            for i in alive:
+                total = sum(par2(*results[i][fp], gold.get(os.path.basename(fp), "unknown"), timeout) for fp in subset)
+                scored.append((total / len(subset), i))
+            scored.sort()
+            log(f"round: {len(alive)} configs x {len(subset)} instances, "
+                f"best PAR-2 {scored[0][0]:.4f}s, worst {scored[-1][0]:.4f}s")
+
+            if len(alive) == 1 or budget >= len(files):
+                return scored, results
+            keep = max(1, len(alive) // eta)
+            alive = [i for _, i in scored[:keep]]
+            budget = min(len(files), budget * eta)
+
+def load_profile(path):
+    """Returns the params dict stored in a profile written by tune.py."""
+    with open(path, "r") as f:
+        return json.load(f)["params"]
+
+def main():
+    from benchmarks.run_benchmarks import load_gold_map
+
+    parser = argparse.ArgumentParser(description="Tune solver parameters with successive halving over the benchmarks.")
+    parser.add_argument("--solver", "-s", default="cdcl", choices=sorted(SEARCH_SPACE))
+    parser.add_argument("--benchmarks", "-b", default=os.path.join("benchmarks", "formulas"), help="folder with .cnf files")
+    parser.add_argument("--gold", "-g", default=os.path.join("benchmarks", "correct_results.csv"), help="ground-truth CSV (filename,expected)")
+    parser.add_argument("--configs", "-n", type=int, default=27, help="number of configurations to race")
+    parser.add_argument("--eta", type=int, default=3, help="keep 1/eta of the configs each round")
+    parser.add_argument("--min-instances", type=int, default=4, help="instances in the first round")
+    parser.add_argument("--timeout", "-t", type=float, default=5.0, help="timeout seconds per run")
+    parser.add_argument("--workers", "-j", type=int, default=None, help="worker processes (default: cpu count)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for sampling configs and shuffling instances")
+    parser.add_argument("--out", "-o", default=None, help="profile to write (default: profiles/<solver>.json)")
+    args = parser.parse_args()
+
+    files = sorted(glob.glob(os.path.join(args.benchmarks, "*.cnf")))
+    if not files:
+        print(f"No .cnf files found in {args.benchmarks}", file=sys.stderr)
+        sys.exit(1)
+    # shuffled so the early rounds see a mix rather than the first few files alphabetically
+    random.Random(args.seed).shuffle(files)
+
+    gold = load_gold_map(args.gold)
+    configs = sample_configs(args.solver, args.configs, args.seed)
+    print(f"racing {len(configs)} {args.solver} configs over {len(files)} instances")
+
+    start = time.perf_counter()
+    scored, results = successive_halving(args.solver, configs, files, gold, args.timeout,
+                                         eta=args.eta, min_instances=args.min_instances, workers=args.workers)
+    best_score, best = scored[0]
+    runs = sum(len(r) for r in results.values())
+    print(f"done in {time.perf_counter() - start:.1f}s, {runs} runs")
+    print(f"best PAR-2 {best_score:.4f}s: {configs[best]}")
+    if best != 0 and 0 in results and len(results[0]) == len(results[best]):
+        base = sum(par2(*results[0][fp], gold.get(os.path.basename(fp), "unknown"), args.timeout) for fp in results[0]) / len(results[0])
+        print(f"default PAR-2 {base:.4f}s on the same instances")
+
+    out = args.out or os.path.join("profiles", f"{args.solver}.json")
+    if os.path.dirname(out):
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+    profile = {
+        "solver": args.solver,
+        "params": configs[best],
+        "par2": best_score,
+        "instances": len(results[best]),
+        "timeout": args.timeout,
+    }
+    with open(out, "w") as f:
+        json.dump(profile, f, indent=2)
+    print(f"wrote {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+xor.py
+
+Parity reasoning for the CDCL solver.
+
+find_xors(cnf) recognizes clause groups that together encode a parity constraint
+x1 ^ x2 ^ ... ^ xk = rhs. Such a constraint takes 2^(k-1) clauses over the same k
+variables, each ruling out one assignment of the wrong parity; e.g.
+(x1 v x5), (-x1 v -x5) is x1 ^ x5 = 1.
+
+XorSolver is a cdcl.Solver whose bcp also runs Gauss-Jordan elimination over the
+extracted constraints. Rows are bit-packed ints: bit v set if variable v is in the
+constraint, bit 0 holds the right hand side. After clause propagation reaches a
+fixpoint the rows are reduced by the current assignment and eliminated; a row with a
+single free variable implies it, an empty row with rhs 1 is a conflict. Both come with
+an ordinary clause as reason, so conflict analysis and backjumping are unchanged.
+
+Plain resolution needs exponentially many steps on Tseitin formulas (odd total charge
+on a graph), elimination refutes them immediately.
+
+    python xor.py [--max-nodes 40] [--budget 20]
+"""
+
+import argparse
+import time
+
+from cdcl import Solver
+
+def find_xors(cnf, max_len=6):
+    """
+    Returns a list of (vars, rhs) with vars a sorted tuple, one per parity constraint fully
+    encoded in cnf. Clauses longer than max_len are not considered (2^(k-1) clauses needed).
+    """
+    groups = {}  # (vars, forbidden parity) -> set of clauses
+    for clause in cnf:
+        vs = tuple(sorted({abs(l) for l in clause}))
+        if len(vs) != len(clause) or not (1 <= len(vs) <= max_len):
+            continue  # duplicate literals / tautology / too long
+        # the clause rules out the assignment that makes every literal false: v=True for
+        # negative literals, so that assignment's parity is the number of negative literals
+        parity = sum(1 for l in clause if l < 0) & 1
+        groups.setdefault((vs, parity), set()).add(tuple(sorted(clause, key=abs)))
+
+    xors = []
+    for (vs, parity), clauses in groups.items():
+        if len(clauses) == 1 << (len(vs) - 1):
+            xors.append((vs, parity ^ 1))
+    return xors
+
+def xor_to_row(vs, rhs):
+    row = rhs
+    for v in vs:
+        row ^= 1 << v
+    return row
+
+def xor_to_clauses(vs, rhs):
+    """The 2^(k-1) clause CNF encoding of x1 ^ ... ^ xk = rhs."""
+    clauses = []
+    k = len(vs)
+    for bits in range(1 << k):
+        # bits is the forbidden assignment; forbid the ones with the wrong parity
+        if bin(bits).count("1") & 1 == rhs:
+            continue
+        clauses.append([-v if (bits >> i) & 1 else v for i, v in enumerate(vs)])
+    return clauses
+
+def _parity(x):
+    return x.bit_count() & 1
+
+class XorSolver(Solver):
+    def __init__(self, cnf, params=None, max_xor_len=6, profiler=None):
+        super().__init__(cnf, params, profiler)
+        self.xors = find_xors(self.clauses, max_xor_len)
+        self.xor_rows = [xor_to_row(vs, rhs) for vs, rhs in self.xors]
+        self.xor_vars = 0
+        for row in self.xor_rows:
+            self.xor_vars |= row & ~1
+        self.gauss_calls = 0
+        self.gauss_props = 0
+        self.gauss_conflicts = 0
+
+    def add_xor(self, vs, rhs):
+        self.backtrack_to(0)
+        row = xor_to_row(vs, rhs)
+        self.xor_rows.append(row)
+        self.xor_vars |= row & ~1
+        for v in vs:
+            self.max_var = max(self.max_var, v)
+
+    def _row_clause(self, row, skip=0):
+        # the literals of row's variables that are false under the current assignment
+        clause = []
+        v = 0
+        row >>= 1
+        while row:
+            v += 1
+            if row & 1 and v != skip:
+                clause.append(-v if self.assignment[v] else v)
+            row >>= 1
+        return clause
+
+    def gauss(self):
+        """
+        Gauss-Jordan over the xor rows under the current assignment.
+        Returns a conflict clause, or None after assigning every implied variable.
+        """
+        self.gauss_calls += 1
+        assigned = 0
+        true = 0
+        for v, val in self.assignment.items():
+            bit = 1 << v
+            assigned |= bit
+            if val:
+                true |= bit
+        free = self.xor_vars & ~assigned
+
+        pivots = []  # [row, pivot bit]; rows keep all their variables, elimination only looks at free ones
+        for row in self.xor_rows:
+            for prow, pbit in pivots:
+                if row & pbit:
+                    row ^= prow
+            r = row & free
+            if r == 0:
+                if (row & 1) ^ _parity(row & true):
+                    self.gauss_conflicts += 1
+                    return self._row_clause(row)
+                continue
+            bit = r & -r
+            for p in pivots:
+                if p[0] & bit:
+                    p[0] ^= row
+            pivots.append([row, bit])
+
+        for prow, pbit in pivots:
+            if prow & free != pbit:
+                continue
+            v = pbit.bit_length() - 1
+            val = bool((prow & 1) ^ _parity(prow & true))
+            lit = v if val else -v
+            reason = [lit] + self._row_clause(prow, skip=v)
+            self.assignment[v] = val
+            self.level_of[v] = self.decision_level
+            self.antecedent[v] = reason
+            self.trail.append(lit)
+            self.gauss_props += 1
+        return None
+
+    def bcp(self):
+        while True:
+            confl = super().bcp()
+            if confl is not None or not self.xor_rows:
+                return confl
+            before = len(self.trail)
+            with self.profiler.phase("gauss"):  # nested in the "bcp" phase
+                confl = self.gauss()
+            if confl is not None:
+                return confl
+            if len(self.trail) == before:
+                return None
+
+def solve(cnf, params=None, deadline=None, profiler=None):
+    return XorSolver(cnf, params, profiler=profiler).solve(deadline)
+
+# -----------------------
+# Tseitin scaling benchmark
+# -----------------------
+def tseitin(num_nodes, charge=1):
+    """
+    Tseitin formula on a Mobius ladder (3-regular: ring plus diameters). One variable per edge,
+    each node says the xor of its edges equals its charge. UNSAT iff the total charge is odd.
+    """
+    n = num_nodes
+    edges = []
+    for i in range(n):
+        edges.append((i, (i + 1) % n))
+    for i in range(n // 2):
+        edges.append((i, i + n // 2))
+    incident = {i: [] for i in range(n)}
+    for e, (a, b) in enumerate(edges, start=1):
+        incident[a].append(e)
+        incident[b].append(e)
+    cnf = []
+    for node in range(n):
+        rhs = charge if node == 0 else 0
+        cnf += xor_to_clauses(incident[node], rhs)
+    return cnf
+
+def _timed(fn, cnf):
+    start = time.perf_counter()
+    res = fn(cnf)
+    return res, time.perf_counter() - start
+
+def main():
+    import cdcl
+
+    parser = argparse.ArgumentParser(description="Tseitin scaling: CDCL with and without Gauss-Jordan.")
+    parser.add_argument("--max-nodes", type=int, default=40)
+    parser.add_argument("--budget", type=float, default=20.0, help="stop running plain CDCL once one instance takes longer than this")
+    args = parser.parse_args()
+
+    print(f"{'nodes':>6} {'vars':>5} {'clauses':>8} {'xors':>5} {'cdcl s':>10} {'cdcl+xor s':>11}")
+    plain_ok = True
+    for n in range(4, args.max_nodes + 1, 2):
+        cnf = tseitin(n)
+        num_vars = max(abs(l) for c in cnf for l in c)
+        res_x, t_x = _timed(solve, cnf)
+        assert res_x is None  # odd charge, always UNSAT
+        t_plain = "skipped"
+        if plain_ok:
+            res_p, secs = _timed(cdcl.solve, cnf)
+            assert res_p is None
+            t_plain = f"{secs:.4f}"
+            plain_ok = secs < args.budget
+        print(f"{n:>6} {num_vars:>5} {len(cnf):>8} {len(find_xors(cnf)):>5} {t_plain:>10} {t_x:>11.4f}")
+
+if __name__ == "__main__":
+    main()
@@ -1,53 +1,151 @@
-import sys
-import re 
+"""
+Draws the ++==++ box around a text file, for the <pre> blocks in index.html.
+
+The first line is the header, written into the top border. Every other line is padded to
+the widest one by its display width: HTML tags don't show up in the page so they count
+for nothing, an entity like &lt; counts as one character, wide (CJK, emoji) characters
+count as two and combining marks as zero.
+
+The input is read once. Lines are kept in memory with their widths, and past
+`spill_bytes` of text they go to a temporary file instead, so huge inputs don't have to
+fit in RAM. A directory is boxed file by file in parallel.
+
+    python generate_box.py text.txt out.txt
+    python generate_box.py traces/ boxed/ -j 4     # every .txt file in traces/
+"""
+
+import argparse
+import multiprocessing as mp
+import os
+import re
+import tempfile
+import unicodedata
+from array import array
+from functools import lru_cache
+
+TAG = re.compile(r"<[^>]*>")
+ENTITY = re.compile(r"&(?:#\d+|#x[0-9a-fA-F]+|\w+);")
+
+PADDING_HORIZONTAL = 3
+PADDING_VERTICAL = 1
+SPILL_BYTES = 64 * 2**20
 
 def strip_html(text):
     """Removes HTML tags from a string."""
-    clean = re.compile('<.*?>')
-    return re.sub(clean, '', text)
-
-def main(args): # assummes header is first line
-
-    infile = args[0]
-    outfile = args[1]
-
-    col_count = 0
-    row_count = 0 
-    header = ""
-
-    with open(infile, 'r') as f: # open file to box
+    return TAG.sub("", text)
+
+@lru_cache(maxsize=4096)
+def char_width(ch):
+    if unicodedata.combining(ch) or unicodedata.category(ch) in ("Mn", "Me", "Cf"):
+        return 0
+    return 2 if unicodedata.east_asian_width(ch) in ("W", "F") else 1
+
+def display_width(line):
+    """Columns the line takes up once rendered."""
+    if "<" in line:
+        line = TAG.sub("", line)
+    if "&" in line:
+        line = ENTITY.sub("&", line)
+    if line.isascii():
+        return len(line)
+    return sum(map(char_width, line))
+
+class _Lines:
+    """The body lines with their widths, spilled to a temporary file past spill_bytes."""
+
+    def __init__(self, spill_bytes):
+        self.spill_bytes = spill_bytes
+        self.lines = []
+        self.size = 0
+        self.widths = array("I")
+        self.spill = None
+
+    def append(self, line, width):
+        self.widths.append(width)
+        if self.spill is not None:
+            self.spill.write(line + "\n")
+            return
+        self.lines.append(line)
+        self.size += len(line)
+        if self.size > self.spill_bytes:
+            self.spill = tempfile.TemporaryFile("w+", encoding="utf-8")
+            self.spill.writelines(l + "\n" for l in self.lines)
+            self.lines = None
+
+    def __iter__(self):
+        if self.spill is None:
+            return zip(self.lines, self.widths)
+        self.spill.seek(0)
+        return zip((l.rstrip("\n") for l in self.spill), self.widths)
+
+    def close(self):
+        if self.spill is not None:
+            self.spill.close()
+
+def box(f, g, padding_horizontal=PADDING_HORIZONTAL, padding_vertical=PADDING_VERTICAL, spill_bytes=SPILL_BYTES):
+    """Reads the lines of f (header first) and writes the box to g."""
+    header = f.readline().strip()
+    col_count = display_width(header)
+    header += " "
+    body = _Lines(spill_bytes)
+    try:
         for line in f:
-            if row_count == 0:
-                header = line.strip() + ' '
-            col_count = max(col_count, len(line.strip()))
-            row_count += 1
-
-    padding_horizontal = 3 
-    padding_vertical = 1
-
-    top_line = '++' + '=' * (col_count + padding_horizontal * 2) + '++\n' 
-    top_line = header + top_line[len(header):]
-
-    bottom_line = '++' + '=' * (col_count + padding_horizontal * 2) + '++\n' 
-
-    with open(infile, 'r') as f, open(outfile, 'w') as g:
-
-        f.readline()
+            line = line.strip()
+            width = display_width(line)
+            col_count = max(col_count, width)
+            body.append(line, width)
+
+        inner = col_count + padding_horizontal * 2
+        top_line = "++" + "=" * inner + "++\n"
+        g.write(header + top_line[display_width(header):])
+        empty = "||" + " " * inner + "||\n"
+        g.write(empty * padding_vertical)
+        side = " " * padding_horizontal
+        for line, width in body:
+            g.write("||" + side + line + " " * (col_count - width) + side + "||\n")
+        g.write(empty * padding_vertical)
         g.write(top_line)
-
-        for _ in range(padding_vertical):
-            g.write('||' + ' ' * (2*padding_horizontal + col_count) + '||\n')
-
-        for _ in range (row_count-1):
-            line = f.readline().strip()
-            line_nohtml = strip_html(line)
-
-            g.write('||' + ' ' * padding_horizontal + line.ljust(col_count+len(line)-len(line_nohtml)) + ' ' * padding_horizontal + '||\n')
-
-        for _ in range(padding_vertical):
-            g.write('||' + ' ' * (2*padding_horizontal + col_count) + '||\n')
-
-        g.write(bottom_line)
+    finally:
+        body.close()
+
+def box_file(infile, outfile, **options):
+    with open(infile, encoding="utf-8") as f, open(outfile, "w", encoding="utf-8") as g:
+        box(f, g, **options)
+
+def _box_task(task):
+    infile, outfile = task
+    try:
+        box_file(infile, outfile)
+    except (OSError, UnicodeDecodeError) as e:
+        return infile, str(e)
+    return infile, None
+
+def box_directory(indir, outdir, ext=".txt", workers=None):
+    """Boxes every ext file in indir into outdir under the same name, yields (infile, error or None)."""
+    if os.path.abspath(indir) == os.path.abspath(outdir):
+        raise ValueError("output directory would overwrite the inputs")
+    os.makedirs(outdir, exist_ok=True)
+    tasks = [(os.path.join(indir, name), os.path.join(outdir, name))
+             for name in sorted(os.listdir(indir)) if name.endswith(ext) and os.path.isfile(os.path.join(indir, name))]
+    if workers == 1 or len(tasks) <= 1:
+        yield from map(_box_task, tasks)
+        return
+    with mp.Pool(workers) as pool:
+        yield from pool.imap_unordered(_box_task, tasks)
+
+def main():
+    parser = argparse.ArgumentParser(description="Box a text file (the first line is the header).")
+    parser.add_argument("infile", help="text file, or a directory of them")
+    parser.add_argument("outfile", help="output file, or output directory")
+    parser.add_argument("--ext", default=".txt", help="directory mode: extension of the files to box")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="directory mode: worker processes (default: all cores)")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.infile):
+        box_file(args.infile, args.outfile)
+        return
+    for infile, error in box_directory(args.infile, args.outfile, args.ext, args.jobs):
+        print(f"{infile}: {error}" if error else infile)
 
 if __name__ == "__main__":
-    main(sys.argv[1:])
+    main()
@@ -0,0 +1,322 @@
+"""
+Outage analytics over the connectivity logs written by samplelog.py.
+
+The logs (the current file plus its rotated copies, oldest first) are read in one
+streaming pass, a few MB at a time, so memory stays flat for months of per-second samples:
+
+    - plain files are memory-mapped. A sparse index holds the timestamp of the first line
+      after every `INDEX_STEP` bytes, which takes one page read per step to build. A
+      --since query bisects it and starts reading near the right place instead of at the
+      top of the file.
+    - rotated .gz files can't be mapped, so they are streamed. A file that ends before
+      --since (the next file starts earlier) is skipped without decompressing it.
+
+Per target it counts samples and tracks outages: a run of failed samples, lasting from the
+first failure to the next success. RTTs go into a histogram with 0.01 ms buckets, so the
+percentiles cost bounded memory however many samples there are. The target "*" is the
+link as a whole, which is down while every target's latest probe failed. Samples are
+stamped when a probe starts but written when it ends, so the log is only in time order to
+within the probe timeout; they are put back in order (within --slack) before any of this.
+
+    uptime  1 - downtime / observed time (gaps longer than --max-gap, e.g. the monitor not
+            running, are not observed time)
+    MTBF    up time / outages
+    MTTR    downtime / outages
+
+    python outages.py connectivity_log.csv
+    python outages.py connectivity_log.csv --since 7d --outages 20
+    python outages.py connectivity_log.csv --since "2026-10-01" --until "2026-10-08 12:00"
+"""
+
+import argparse
+import bisect
+import datetime
+import gzip
+import heapq
+import mmap
+import os
+import time
+from collections import Counter
+
+from samplelog import log_files
+
+INDEX_STEP = 1 << 16
+CHUNK_SIZE = 1 << 22
+LINK = b"*"
+
+# --- Reading ---
+
+def _line_time(buf, pos):
+    end = buf.find(b",", pos, pos + 32)
+    try:
+        return float(buf[pos:end]) if end > pos else None
+    except ValueError:
+        return None  # the header
+
+def build_index(buf, step=INDEX_STEP):
+    """([time], [offset]) of the first full line after every step bytes of a log buffer."""
+    times, offsets = [], []
+    for start in range(0, len(buf), step):
+        pos = buf.find(b"\n", start - 1) + 1 if start else 0
+        if start and pos == 0:
+            break
+        t = _line_time(buf, pos)
+        if t is not None:
+            times.append(t)
+            offsets.append(pos)
+    return times, offsets
+
+def seek(index, t, slack):
+    """Offset to start reading at for samples from time t on. Probes finish out of order by
+    up to their timeout, so the file is only sorted to within slack seconds."""
+    times, offsets = index
+    i = bisect.bisect_right(times, t - slack) - 1
+    return offsets[i] if i >= 0 else 0
+
+def _chunks_mapped(path, since, slack):
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            pos = seek(build_index(buf), since, slack) if since is not None else 0
+            while pos < len(buf):
+                end = buf.rfind(b"\n", pos, pos + CHUNK_SIZE) + 1 if pos + CHUNK_SIZE < len(buf) else len(buf)
+                if end <= pos:
+                    end = len(buf)  # a single line longer than a chunk
+                yield buf[pos:end]
+                pos = end
+
+def _chunks_gzip(path):
+    with gzip.open(path, "rb") as f:
+        rest = b""
+        while True:
+            data = f.read(CHUNK_SIZE)
+            if not data:
+                break
+            data = rest + data
+            cut = data.rfind(b"\n") + 1
+            rest = data[cut:]
+            yield data[:cut]
+        if rest:
+            yield rest
+
+def first_time(path):
+    """Timestamp of the first sample in a log file, None if it has none."""
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        for line in f:
+            t = _line_time(line, 0)
+            if t is not None:
+                return t
+    return None
+
+def read_samples(path, since=None, until=None, slack=60.0):
+    """Yields (time, target bytes, ok, rtt_ms or None) from the log at path and its rotated
+    copies, oldest first, restricted to since <= time < until."""
+    files = log_files(path)
+    starts = [first_time(p) for p in files]
+    for i, p in enumerate(files):
+        later = [s for s in starts[i + 1:] if s is not None]
+        if since is not None and later and later[0] < since - slack:
+            continue  # the whole file is older than since
+        if until is not None and starts[i] is not None and starts[i] >= until + slack:
+            break
+        chunks = _chunks_gzip(p) if p.endswith(".gz") else _chunks_mapped(p, since, slack)
+        for chunk in chunks:
+            past_end = False
+            for line in chunk.split(b"\n"):
+                fields = line.split(b",")
+                if len(fields) != 4 or fields[0] == b"time":
+                    continue
+                t = float(fields[0])
+                if since is not None and t < since:
+                    continue
+                if until is not None and t >= until:
+                    past_end = t >= until + slack
+                    continue
+                yield t, fields[1], fields[2] == b"1", float(fields[3]) if fields[3] else None
+            if past_end:
+                return
+
+# --- Statistics ---
+
+class TargetStats:
+    __slots__ = ("samples", "ok", "first", "last", "observed", "down_since", "downtime",
+                 "outages", "rtt", "windows", "max_windows")
+
+    def __init__(self, max_windows):
+        self.samples = self.ok = 0
+        self.first = self.last = None
+        self.observed = self.downtime = 0.0
+        self.down_since = None
+        self.outages = 0
+        self.rtt = Counter()
+        self.windows = []  # (duration, start, end) of the longest outages
+        self.max_windows = max_windows
+
+    def add(self, t, ok, max_gap):
+        if self.last is not None:
+            gap = t - self.last
+            if gap > max_gap:
+                # nothing was probed in between, close any open outage at the last sample
+                if self.down_since is not None:
+                    self._close(self.last)
+            elif gap > 0:
+                self.observed += gap
+        else:
+            self.first = t
+        self.last = max(t, self.last) if self.last is not None else t
+        self.samples += 1
+        if ok:
+            self.ok += 1
+            # an ok from before the outage started, out of order by more than the slack
+            if self.down_since is not None and t >= self.down_since:
+                self._close(t)
+        elif self.down_since is None:
+            self.down_since = t
+
+    def _close(self, t):
+        duration = t - self.down_since
+        self.outages += 1
+        self.downtime += duration
+        window = (duration, self.down_since, t)
+        if len(self.windows) < self.max_windows:
+            self.windows.append(window)
+        else:
+            i = min(range(len(self.windows)), key=self.windows.__getitem__)
+            if window > self.windows[i]:
+                self.windows[i] = window
+        self.down_since = None
+
+    def finish(self):
+        if self.down_since is not None and self.last > self.down_since:
+            self._close(self.last)  # still down at the end of the log
+
+    def percentile(self, q):
+        total = sum(self.rtt.values())
+        if not total:
+            return None
+        rank = q * (total - 1)
+        seen = 0
+        for bucket in sorted(self.rtt):
+            seen += self.rtt[bucket]
+            if seen > rank:
+                return bucket / 100
+        return None
+
+    def summary(self):
+        up = max(self.observed - self.downtime, 0.0)
+        return {
+            "samples": self.samples,
+            "loss": 1 - self.ok / self.samples if self.samples else None,
+            "uptime": up / self.observed if self.observed else None,
+            "outages": self.outages,
+            "downtime": self.downtime,
+            "mtbf": up / self.outages if self.outages else None,
+            "mttr": self.downtime / self.outages if self.outages else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+        }
+
+def in_order(samples, slack):
+    """samples sorted by time, given that none is more than slack seconds late."""
+    heap = []
+    for seq, sample in enumerate(samples):
+        heapq.heappush(heap, (sample[0], seq, sample))
+        while heap[0][0] < sample[0] - slack:
+            yield heapq.heappop(heap)[2]
+    while heap:
+        yield heapq.heappop(heap)[2]
+
+def analyze(samples, max_gap=60.0, max_windows=20, slack=60.0):
+    """
+    One pass over (time, target, ok, rtt_ms) samples, which may be out of time order by up
+    to slack seconds. Returns {target: TargetStats}, with LINK for the link as a whole.
+    """
+    stats = {}
+    link = stats[LINK] = TargetStats(max_windows)
+    latest = {}  # target -> ok of its latest probe
+    up_count = 0
+    for t, target, ok, rtt in in_order(samples, slack):
+        s = stats.get(target)
+        if s is None:
+            s = stats[target] = TargetStats(max_windows)
+        s.add(t, ok, max_gap)
+        if rtt is not None:
+            s.rtt[int(rtt * 100)] += 1
+        previous = latest.get(target)
+        latest[target] = ok
+        up_count += ok - (previous or 0)
+        link.add(t, up_count > 0, max_gap)
+    for s in stats.values():
+        s.finish()
+    return stats
+
+# --- Output ---
+
+def parse_time(text, now=None):
+    """'7d', '12h', '30m', '2026-10-01' or '2026-10-01 12:00[:00]' -> unix seconds."""
+    now = time.time() if now is None else now
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+    if text[-1:] in units and text[:-1].replace(".", "", 1).isdigit():
+        return now - float(text[:-1]) * units[text[-1]]
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M", "%Y-%m-%d"):
+        try:
+            return datetime.datetime.strptime(text, fmt).timestamp()
+        except ValueError:
+            pass
+    raise ValueError(f"can't read time {text!r}")
+
+def _duration(seconds):
+    if seconds is None:
+        return "-"
+    seconds = int(round(seconds))
+    d, seconds = divmod(seconds, 86400)
+    h, seconds = divmod(seconds, 3600)
+    m, s = divmod(seconds, 60)
+    return (f"{d}d" if d else "") + (f"{h}h" if d or h else "") + (f"{m}m" if d or h or m else "") + f"{s}s"
+
+def _stamp(t):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(t))
+
+def format_report(stats, outages=10):
+    f = lambda v, fmt: format(v, fmt) if v is not None else "-"
+    lines = [f"{'target':<28} {'samples':>9} {'uptime':>9} {'outages':>8} {'down':>10} {'MTBF':>10} "
+             f"{'MTTR':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"]
+    for target in sorted(stats, key=lambda k: (k != LINK, k)):
+        s = stats[target].summary()
+        if not s["samples"]:
+            continue
+        uptime = f"{100 * s['uptime']:.3f}%" if s["uptime"] is not None else "-"
+        lines.append(f"{target.decode(errors='replace'):<28} {s['samples']:>9} {uptime:>9} {s['outages']:>8} "
+                     f"{_duration(s['downtime']):>10} {_duration(s['mtbf']):>10} {_duration(s['mttr']):>8} "
+                     f"{f(s['p50'], '.2f'):>8} {f(s['p95'], '.2f'):>8} {f(s['p99'], '.2f'):>8}")
+    windows = sorted(stats[LINK].windows, reverse=True)[:outages]
+    if outages and windows:
+        lines.append("")
+        lines.append("longest link outages (every target failing):")
+        for duration, start, end in sorted(windows, key=lambda w: w[1]):
+            lines.append(f"  {_stamp(start)} -> {_stamp(end)}  {_duration(duration)}")
+    return "\n".join(lines)
+
+def main():
+    parser = argparse.ArgumentParser(description="Uptime, outages and latency from connectivity logs.")
+    parser.add_argument("path", help="the current log file, rotated copies next to it are read too")
+    parser.add_argument("--since", default=None, help="start time, e.g. 7d, 12h or '2026-10-01 08:00'")
+    parser.add_argument("--until", default=None, help="end time, same formats")
+    parser.add_argument("--max-gap", type=float, default=60.0, help="seconds without samples that count as not monitored")
+    parser.add_argument("--slack", type=float, default=60.0, help="how far out of time order samples can be (the probe timeout)")
+    parser.add_argument("--outages", type=int, default=10, help="longest link outages to list")
+    args = parser.parse_args()
+
+    since = parse_time(args.since) if args.since else None
+    until = parse_time(args.until) if args.until else None
+    start = time.perf_counter()
+    stats = analyze(read_samples(args.path, since, until, args.slack), args.max_gap, max(args.outages, 1), args.slack)
+    elapsed = time.perf_counter() - start
+    print(format_report(stats, args.outages))
+    print(f"\n{stats[LINK].samples} samples in {elapsed:.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+"""
+Concurrent connectivity prober.
+
+Every target gets its own asyncio task that probes it every `interval` seconds (sub-second
+intervals are fine), with each probe time shifted by up to +-jitter*interval so targets
+and monitors don't fall into lockstep. Probes never block: nothing is forked, all sockets
+are non-blocking, and a probe that doesn't answer within `timeout` counts as failed.
+
+Targets:
+    tcp://host:port     time to complete a TCP handshake
+    udp://host:port     send a datagram, wait for any reply (an ICMP port unreachable fails fast)
+    dns://host[:port]   udp probe carrying a DNS query for the root NS records, so any
+                        resolver answers it
+    icmp://host         echo request (unprivileged ICMP socket, or a raw socket as root)
+
+Each probe produces a Sample(time, target, ok, rtt, error); rtt is in seconds and None
+for failures. monitor() hands every sample to a callback as it arrives.
+
+    python probe.py tcp://1.1.1.1:443 dns://8.8.8.8 icmp://8.8.8.8 --interval 0.5 --duration 10
+    python probe.py --self-test     # against stand-in listeners on 127.0.0.1
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import socket
+import struct
+import time
+from collections import namedtuple
+
+Sample = namedtuple("Sample", "time target ok rtt error")
+
+def parse_target(target):
+    """'tcp://host:port' -> ('tcp', host, port)."""
+    kind, sep, rest = target.partition("://")
+    if not sep or kind not in PROBES:
+        raise ValueError(f"bad target {target!r}, expected one of {', '.join(k + '://' for k in PROBES)}")
+    host, _, port = rest.rpartition(":") if ":" in rest else (rest, "", "")
+    if kind in ("tcp", "udp") and not port:
+        raise ValueError(f"{target!r} needs a port")
+    port = int(port) if port else (53 if kind == "dns" else 0)
+    return kind, host.strip("[]"), port
+
+# --- Probes ---
+# each returns the round trip time in seconds or raises (OSError, asyncio.TimeoutError, ...)
+
+async def probe_tcp(host, port, timeout):
+    start = time.perf_counter()
+    _, writer = await asyncio.wait_for(asyncio.open_connection(host, port), timeout)
+    rtt = time.perf_counter() - start
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return rtt
+
+class _Reply(asyncio.DatagramProtocol):
+    def __init__(self, future):
+        self.future = future
+
+    def datagram_received(self, data, addr):
+        if not self.future.done():
+            self.future.set_result(data)
+
+    def error_received(self, exc):
+        if not self.future.done():
+            self.future.set_exception(exc)
+
+async def probe_udp(host, port, timeout, payload=b"ping"):
+    loop = asyncio.get_running_loop()
+    reply = loop.create_future()
+    transport, _ = await loop.create_datagram_endpoint(lambda: _Reply(reply), remote_addr=(host, port))
+    try:
+        start = time.perf_counter()
+        transport.sendto(payload)
+        await asyncio.wait_for(reply, timeout)
+        return time.perf_counter() - start
+    finally:
+        transport.close()
+
+def dns_query():
+    # header: random id, recursion desired, one question; question: root, type NS, class IN
+    return struct.pack(">HHHHHH", random.getrandbits(16), 0x0100, 1, 0, 0, 0) + b"\x00" + struct.pack(">HH", 2, 1)
+
+async def probe_dns(host, port, timeout):
+    return await probe_udp(host, port, timeout, dns_query())
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b"\x00"
+    s = sum(struct.unpack(f">{len(data) // 2}H", data))
+    s = (s >> 16) + (s & 0xFFFF)
+    s += s >> 16
+    return ~s & 0xFFFF
+
+def _icmp_socket():
+    try:
+        return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP), False
+    except PermissionError:
+        # unprivileged ICMP sockets are off (net.ipv4.ping_group_range), try raw, needs root
+        return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+
+async def probe_icmp(host, _port, timeout):
+    loop = asyncio.get_running_loop()
+    addr = (await loop.getaddrinfo(host, None, family=socket.AF_INET))[0][4][0]
+    sock, raw = _icmp_socket()
+    sock.setblocking(False)
+    try:
+        ident, seq = os.getpid() & 0xFFFF, random.getrandbits(16)
+        body = struct.pack(">d", time.time())
+        header = struct.pack(">BBHHH", 8, 0, 0, ident, seq)
+        packet = struct.pack(">BBHHH", 8, 0, _checksum(header + body), ident, seq) + body
+        start = time.perf_counter()
+        await loop.sock_sendto(sock, packet, (addr, 0))
+
+        async def reply():
+            while True:
+                data = await loop.sock_recv(sock, 1024)
+                if raw:
+                    data = data[(data[0] & 0x0F) * 4:]  # skip the ip header
+                # echo reply with our sequence number (the kernel rewrites the id on dgram sockets)
+                if len(data) >= 8 and data[0] == 0 and struct.unpack(">H", data[6:8])[0] == seq:
+                    return
+
+        await asyncio.wait_for(reply(), timeout)
+        return time.perf_counter() - start
+    finally:
+        sock.close()
+
+PROBES = {"tcp": probe_tcp, "udp": probe_udp, "dns": probe_dns, "icmp": probe_icmp}
+
+async def probe(target, timeout):
+    """One probe of target, as a Sample. Never raises for network errors."""
+    kind, host, port = parse_target(target)
+    now = time.time()
+    try:
+        rtt = await PROBES[kind](host, port, timeout)
+    except asyncio.TimeoutError:
+        return Sample(now, target, False, None, "timeout")
+    except OSError as e:
+        return Sample(now, target, False, None, e.strerror or type(e).__name__)
+    return Sample(now, target, True, rtt, None)
+
+# --- Scheduling ---
+
+async def _probe_loop(target, interval, timeout, jitter, on_sample, stop, limit):
+    loop = asyncio.get_running_loop()
+    start = loop.time() + random.uniform(0, interval)  # spread the targets over the first interval
+    k = 0
+    while not stop.is_set():
+        due = start + k * interval + random.uniform(-jitter, jitter) * interval
+        delay = due - loop.time()
+        if delay > 0:
+            try:
+                await asyncio.wait_for(stop.wait(), delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+        async with limit:
+            sample = await probe(target, timeout)
+        on_sample(sample)
+        # a probe that ran over skips the slots it missed instead of bursting to catch up
+        k = max(k + 1, int((loop.time() - start) / interval) + 1)
+
+async def monitor(targets, on_sample, interval=1.0, timeout=1.0, jitter=0.1, duration=None, max_concurrent=256, stop=None):
+    """
+    Probes every target every interval seconds until duration passes or stop (an
+    asyncio.Event) is set, calling on_sample(Sample) for each result.
+    """
+    for t in targets:
+        parse_target(t)
+    stop = stop or asyncio.Event()
+    limit = asyncio.Semaphore(max_concurrent)
+    tasks = [asyncio.create_task(_probe_loop(t, interval, timeout, jitter, on_sample, stop, limit)) for t in targets]
+    try:
+        if duration is not None:
+            try:
+                await asyncio.wait_for(stop.wait(), duration)
+            except asyncio.TimeoutError:
+                pass
+            stop.set()
+        await asyncio.gather(*tasks)
+    finally:
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+# --- Stats ---
+
+def summarize(samples):
+    """Per target: sent, ok, loss and RTT min / mean / p50 / p95 / max in milliseconds."""
+    by_target = {}
+    for s in samples:
+        by_target.setdefault(s.target, []).append(s)
+    out = {}
+    for target, ss in by_target.items():
+        rtts = sorted(s.rtt * 1000 for s in ss if s.ok)
+        ok = len(rtts)
+        pct = lambda q: rtts[min(len(rtts) - 1, int(q * len(rtts)))] if rtts else None
+        out[target] = {
+            "sent": len(ss),
+            "ok": ok,
+            "loss": 1 - ok / len(ss),
+            "min": rtts[0] if rtts else None,
+            "mean": sum(rtts) / ok if ok else None,
+            "p50": pct(0.5),
+            "p95": pct(0.95),
+            "max": rtts[-1] if rtts else None,
+        }
+    return out
+
+def format_summary(summary):
+    f = lambda v: f"{v:8.2f}" if v is not None else f"{'-':>8}"
+    lines = [f"{'target':<28} {'sent':>6} {'loss':>7} {'min':>8} {'mean':>8} {'p50':>8} {'p95':>8} {'max':>8}"]
+    for target, s in summary.items():
+        lines.append(f"{target:<28} {s['sent']:>6} {100 * s['loss']:>6.1f}% "
+                     f"{f(s['min'])} {f(s['mean'])} {f(s['p50'])} {f(s['p95'])} {f(s['max'])}")
+    return "\n".join(lines)
+
+# --- Stand-in listeners ---
+
+class _Echo(asyncio.DatagramProtocol):
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        self.transport.sendto(data, addr)
+
+async def start_standins(host="127.0.0.1"):
+    """
+    A TCP listener and a UDP echo server on free local ports, plus a port with nothing on
+    it. Returns (targets dict, close coroutine function).
+    """
+    loop = asyncio.get_running_loop()
+
+    async def _accept(reader, writer):
+        writer.close()
+
+    server = await asyncio.start_server(_accept, host, 0)
+    tcp_port = server.sockets[0].getsockname()[1]
+    udp, _ = await loop.create_datagram_endpoint(_Echo, local_addr=(host, 0))
+    udp_port = udp.get_extra_info("sockname")[1]
+    with socket.socket() as s:
+        s.bind((host, 0))
+        closed_port = s.getsockname()[1]  # free once the socket is closed
+
+    async def close():
+        server.close()
+        await server.wait_closed()
+        udp.close()
+
+    targets = {
+        "tcp": f"tcp://{host}:{tcp_port}",
+        "udp": f"udp://{host}:{udp_port}",
+        "tcp_closed": f"tcp://{host}:{closed_port}",
+        "udp_closed": f"udp://{host}:{closed_port}",
+    }
+    return targets, close
+
+async def self_test(interval=0.05, duration=1.0):
+    targets, close = await start_standins()
+    samples = []
+    try:
+        await monitor(list(targets.values()), samples.append, interval=interval, timeout=0.5, duration=duration)
+    finally:
+        await close()
+    summary = summarize(samples)
+    print(format_summary(summary))
+    expected = duration / interval
+    for name, target in targets.items():
+        s = summary[target]
+        assert s["sent"] >= expected * 0.5, (name, s["sent"])
+        if name.endswith("_closed"):
+            assert s["ok"] == 0, name
+        else:
+            assert s["loss"] == 0, name
+    print("self test ok")
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe many hosts concurrently.")
+    parser.add_argument("targets", nargs="*", help="tcp://host:port, udp://host:port, dns://host, icmp://host")
+    parser.add_argument("--interval", "-i", type=float, default=1.0, help="seconds between probes of a target")
+    parser.add_argument("--timeout", "-t", type=float, default=1.0, help="seconds before a probe counts as failed")
+    parser.add_argument("--jitter", type=float, default=0.1, help="random shift of each probe, as a fraction of the interval")
+    parser.add_argument("--duration", "-d", type=float, default=None, help="stop after this many seconds")
+    parser.add_argument("--quiet", "-q", action="store_true", help="only print the summary")
+    parser.add_argument("--self-test", action="store_true", help="probe local stand-in listeners and check the results")
+    args = parser.parse_args()
+
+    if args.self_test:
+        asyncio.run(self_test())
+        return
+    if not args.targets:
+        parser.error("no targets")
+
+    samples = []
+
+    def on_sample(s):
+        samples.append(s)
+        if not args.quiet:
+            status = f"{s.rtt * 1000:.2f} ms" if s.ok else f"FAILED ({s.error})"
+            print(f"{time.strftime('%H:%M:%S', time.localtime(s.time))} {s.target} {status}")
+
+    try:
+        asyncio.run(monitor(args.targets, on_sample, args.interval, args.timeout, args.jitter, args.duration))
+    except KeyboardInterrupt:
+        pass
+    print(format_summary(summarize(samples)))
+
+if __name__ == "__main__":
+    main()
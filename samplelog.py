@@ -0,0 +1,196 @@
+"""
+Buffered, rotating sample log for the connectivity monitor.
+
+Samples are kept in memory and written in one go when `flush_samples` have piled up or
+`flush_seconds` have passed since the last write, through a file that stays open, so a
+monitor doing many probes a second costs one write per batch instead of an open/close per
+probe. When the file would grow past `max_bytes` it is rotated like logging's
+RotatingFileHandler (log -> log.1 -> log.2 ..., the oldest of `backups` dropped) and the
+rotated file is gzip compressed on a background thread.
+
+Every file is CSV with a header line, one sample per line:
+
+    time,target,ok,rtt_ms
+    1760892718.123,tcp://1.1.1.1:443,1,0.734
+    1760892718.456,icmp://8.8.8.8,0,
+
+time is unix seconds, rtt_ms is empty for failed probes.
+
+    with SampleLog("connectivity_log.csv", echo=True) as log:
+        log.write(sample)                     # anything with time, target, ok, rtt (seconds)
+
+    python samplelog.py connectivity_log.csv  # print a log (rotated .gz files too) readably
+"""
+
+import argparse
+import gzip
+import os
+import shutil
+import sys
+import threading
+import time
+
+from probe import Sample
+
+HEADER = "time,target,ok,rtt_ms\n"
+
+def format_sample(sample):
+    rtt = f"{sample.rtt * 1000:.3f}" if sample.ok and sample.rtt is not None else ""
+    return f"{sample.time:.3f},{sample.target},{int(bool(sample.ok))},{rtt}\n"
+
+def format_echo(sample):
+    """The human-readable line printed to the console."""
+    timestamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(sample.time))
+    if sample.ok:
+        return f"[{timestamp}] - {sample.target} Connection SUCCESSFUL. ({sample.rtt * 1000:.1f} ms)"
+    error = getattr(sample, "error", None)
+    return f"[{timestamp}] - {sample.target} Connection FAILED." + (f" ({error})" if error else "")
+
+def parse_line(line):
+    """'time,target,ok,rtt_ms' -> (time, target, ok, rtt_ms or None); None for the header."""
+    t, rest = line.rstrip("\r\n").split(",", 1)
+    target, ok, rtt = rest.rsplit(",", 2)
+    if t == "time":
+        return None
+    return float(t), target, ok == "1", float(rtt) if rtt else None
+
+def gzip_file(path):
+    """path -> path.gz, written under a temporary name first so readers never see half a file."""
+    with open(path, "rb") as src, gzip.open(path + ".gz.tmp", "wb") as dst:
+        shutil.copyfileobj(src, dst, 1 << 20)
+    os.replace(path + ".gz.tmp", path + ".gz")
+    os.remove(path)
+
+class SampleLog:
+    def __init__(self, path, max_bytes=64 * 2**20, backups=10, flush_samples=1000, flush_seconds=5.0,
+                 compress=True, echo=False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.flush_samples = flush_samples
+        self.flush_seconds = flush_seconds
+        self.compress = compress
+        self.echo = echo
+        self.pending = []
+        self.last_flush = time.monotonic()
+        self.file = None
+        self.size = 0
+        self.compressor = None
+        self._open()
+
+    def _open(self):
+        self.file = open(self.path, "a", encoding="utf-8", newline="")
+        self.size = self.file.tell()
+        if self.size == 0:
+            self.file.write(HEADER)
+            self.size = len(HEADER)
+
+    def write(self, sample):
+        line = format_sample(sample)
+        self.pending.append(line)
+        if self.echo:
+            print(format_echo(sample))
+        if len(self.pending) >= self.flush_samples or time.monotonic() - self.last_flush >= self.flush_seconds:
+            self.flush()
+
+    def flush(self):
+        self.last_flush = time.monotonic()
+        if not self.pending:
+            return
+        data = "".join(self.pending)
+        self.pending = []
+        # ascii except for odd target names, len() is close enough to the byte count
+        if self.size + len(data) > self.max_bytes and self.size > len(HEADER):
+            self.rotate()
+        self.file.write(data)
+        self.file.flush()
+        self.size += len(data)
+
+    def rotate(self):
+        """
+        Closes the current file, shifts the backups up by one and starts a new file. Only
+        renames happen here, the new backup is gzipped on a background thread (zlib lets go
+        of the GIL while it compresses), so a rotation doesn't hold up the asyncio loop the
+        samples come from.
+        """
+        self.file.close()
+        self.wait()  # the previous compression, long done unless rotations come back to back
+        if self.backups > 0:
+            for i in range(self.backups, 0, -1):
+                # a backup is plain if the process stopped before compressing it
+                for suffix in (".gz", ""):
+                    name = f"{self.path}.{i}{suffix}"
+                    if not os.path.exists(name):
+                        continue
+                    if i == self.backups:
+                        os.remove(name)
+                    else:
+                        os.replace(name, f"{self.path}.{i + 1}{suffix}")
+            os.replace(self.path, f"{self.path}.1")
+            if self.compress:
+                self.compressor = threading.Thread(target=gzip_file, args=(f"{self.path}.1",))
+                self.compressor.start()
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def wait(self):
+        """Blocks until a background compression is done."""
+        if self.compressor is not None:
+            self.compressor.join()
+            self.compressor = None
+
+    def close(self):
+        if self.file is not None:
+            self.flush()
+            self.file.close()
+            self.file = None
+        self.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def log_files(path):
+    """The log and its rotated copies, oldest first."""
+    out = []
+    i = 1
+    while True:
+        for name in (f"{path}.{i}.gz", f"{path}.{i}"):
+            if os.path.exists(name):
+                out.append(name)
+                break
+        else:
+            break
+        i += 1
+    out.reverse()
+    if os.path.exists(path):
+        out.append(path)
+    return out
+
+def open_log(path):
+    return gzip.open(path, "rt", encoding="utf-8") if path.endswith(".gz") else open(path, encoding="utf-8")
+
+def main():
+    parser = argparse.ArgumentParser(description="Print a sample log, rotated files included, oldest first.")
+    parser.add_argument("path", help="the current log file, e.g. connectivity_log.csv")
+    parser.add_argument("--target", default=None, help="only this target")
+    args = parser.parse_args()
+
+    for name in log_files(args.path):
+        with open_log(name) as f:
+            for line in f:
+                parsed = parse_line(line)
+                if parsed is None or (args.target and parsed[1] != args.target):
+                    continue
+                t, target, ok, rtt = parsed
+                try:
+                    print(format_echo(Sample(t, target, ok, rtt / 1000 if rtt is not None else None, None)))
+                except BrokenPipeError:
+                    sys.stderr.close()
+                    return
+
+if __name__ == "__main__":
+    main()